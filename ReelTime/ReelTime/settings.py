@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
+from datetime import timedelta
 import dj_database_url 
 from dotenv import load_dotenv
 import cloudinary
@@ -61,6 +62,7 @@ INSTALLED_APPS = [
     'movies',
     'reservations',
     'halls',
+    'notifications',
 ]
 
 MIDDLEWARE = [
@@ -110,6 +112,27 @@ else:
     }
 
 
+# Cache
+# Shared state every worker must see (the catalog cache and its version, seat holds)
+# lives in Redis. Without REDIS_URL each process has its own memory cache, so edits
+# only invalidate the worker that made them: run a single process (checked by reel_time.checks)
+
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -186,6 +209,42 @@ LOGOUT_REDIRECT_URL = '/'  # Go to home page after logout
 # SendGrid Configuration
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY', '')
 SENDGRID_SENDER_EMAIL = os.getenv('SENDGRID_SENDER_EMAIL', '')
+SENDGRID_API_URL = os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com/v3/mail/send')
+SENDGRID_CONNECT_TIMEOUT = float(os.getenv('SENDGRID_CONNECT_TIMEOUT', '3.05'))  # seconds
+SENDGRID_READ_TIMEOUT = float(os.getenv('SENDGRID_READ_TIMEOUT', '10'))  # seconds
+SENDGRID_POOL_SIZE = int(os.getenv('SENDGRID_POOL_SIZE', '10'))  # kept-alive connections per process
+# Dynamic template for batched reminders; without it reminders are sent one by one
+SENDGRID_REMINDER_TEMPLATE_ID = os.getenv('SENDGRID_REMINDER_TEMPLATE_ID', '')
+# Provider quota shared by the reminder runner's worker threads
+SENDGRID_REQUESTS_PER_SECOND = float(os.getenv('SENDGRID_REQUESTS_PER_SECOND', '10'))
+REMINDER_CONCURRENCY = int(os.getenv('REMINDER_CONCURRENCY', '4'))
+# Scheduler mode: remind this long before each showtime, scanning every interval
+REMINDER_LEAD_TIME = timedelta(hours=float(os.getenv('REMINDER_LEAD_HOURS', '24')))
+REMINDER_SCAN_INTERVAL = int(os.getenv('REMINDER_SCAN_INTERVAL', '60'))  # seconds
+
+# Guards around outbound integrations (see reel_time.resilience): per-call timeout,
+# circuit breaker (failures before opening, seconds before a probe) and bulkhead
+OUTBOUND_CALLS = {
+    'sendgrid': {
+        'timeout': (SENDGRID_CONNECT_TIMEOUT, SENDGRID_READ_TIMEOUT),
+        'failure_threshold': int(os.getenv('SENDGRID_BREAKER_THRESHOLD', '5')),
+        'reset_timeout': float(os.getenv('SENDGRID_BREAKER_RESET', '30')),
+        'max_concurrent': SENDGRID_POOL_SIZE,
+        'max_wait': 1.0,
+    },
+    'cloudinary': {
+        'timeout': float(os.getenv('CLOUDINARY_UPLOAD_TIMEOUT', '20')),
+        'failure_threshold': int(os.getenv('CLOUDINARY_BREAKER_THRESHOLD', '3')),
+        'reset_timeout': float(os.getenv('CLOUDINARY_BREAKER_RESET', '60')),
+        'max_concurrent': int(os.getenv('CLOUDINARY_MAX_CONCURRENT', '4')),
+        'max_wait': 2.0,
+    },
+}
+
+# How emails leave the app: notifications.backends.SendGridTransport, ConsoleTransport,
+# FileTransport (writes to EMAIL_FILE_PATH) or MemoryTransport (for tests)
+EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'notifications.backends.SendGridTransport')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', os.path.join(BASE_DIR, 'sent_emails'))
 
 # Email Configuration - Using SendGrid as primary
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -196,6 +255,23 @@ EMAIL_HOST_USER = 'apikey'  # This is fixed for SendGrid
 EMAIL_HOST_PASSWORD = SENDGRID_API_KEY
 DEFAULT_FROM_EMAIL = SENDGRID_SENDER_EMAIL
 
+# Email outbox: queued emails are delivered by `python manage.py process_tasks`
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_DELAY = int(os.getenv('OUTBOX_RETRY_BASE_DELAY', '30'))  # seconds, doubled per attempt
+# A claimed email whose worker hasn't recorded a result by then is sent again
+OUTBOX_SEND_TIMEOUT = int(os.getenv('OUTBOX_SEND_TIMEOUT', '300'))  # seconds
+# Edits to one reservation within this window are summarised in a single email
+EDIT_EMAIL_COALESCE_WINDOW = int(os.getenv('EDIT_EMAIL_COALESCE_WINDOW', '120'))  # seconds
+
+# Seat holds during checkout. Holds must be visible to every worker, so they live
+# in Redis when REDIS_URL is set; the in-process store is for development only
+SEAT_HOLD_BACKEND = os.getenv(
+    'SEAT_HOLD_BACKEND',
+    'reservations.holds.RedisSeatHoldStore' if REDIS_URL else 'reservations.holds.LocMemSeatHoldStore',
+)
+SEAT_HOLD_TTL = int(os.getenv('SEAT_HOLD_TTL', '300'))  # seconds
+PENDING_RESERVATION_TTL = int(os.getenv('PENDING_RESERVATION_TTL', '900'))  # seconds
+
 # Optional: Fallback to Gmail if SendGrid fails (remove if you only want SendGrid)
 # EMAIL_BACKEND_FALLBACK = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_HOST_FALLBACK = 'smtp.gmail.com'
@@ -4,7 +4,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from cloudinary.models import CloudinaryField
+from reel_time.fields import ResilientCloudinaryField
 
 
 class User(AbstractUser):
@@ -14,7 +14,7 @@ class User(AbstractUser):
     must_change_password = models.BooleanField(default=False)
     cinema_name = models.CharField(max_length=100, blank=True, null=True)
 
-    profile_picture = CloudinaryField(
+    profile_picture = ResilientCloudinaryField(
         'profile_picture',
         folder='users/profile_pictures/',
         blank=True,
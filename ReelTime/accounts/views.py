@@ -1,11 +1,9 @@
 # accounts/views.py
 from accounts.models import User, PendingAdmin
 from accounts.forms import RegistrationForm, UserProfileForm
-from accounts.utils import (
-    create_default_admin, 
-    send_admin_confirmation_email, 
-    send_admin_credentials_email
-)
+from accounts.utils import create_default_admin
+from notifications.outbox import enqueue_email
+from reel_time.fields import UploadUnavailable
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
@@ -14,11 +12,22 @@ from django.conf import settings
 from django.contrib import messages
 from django.http import JsonResponse
 from django.urls import reverse
+from django.db import transaction
 
 
 # --------------------------
 # Admin Registration
 # --------------------------
+def queue_admin_confirmation_email(pending, confirmation_link):
+    """Queue the confirmation email for a pending admin; one per confirmation token."""
+    enqueue_email(
+        'admin_confirmation',
+        pending.email,
+        {'email': pending.email, 'confirmation_link': confirmation_link, 'cinema_name': pending.cinema_name},
+        idempotency_key=f"admin-confirmation:{pending.token}",
+    )
+
+
 def register_admin(request):
     if request.method == "POST":
         cinema_name = request.POST.get("cinema_name")
@@ -44,7 +53,7 @@ def register_admin(request):
             },
         )
 
-        # Send or resend confirmation email (synchronous)
+        # Queue or re-queue the confirmation email (delivered in the background)
         confirmation_link = request.build_absolute_uri(f"/accounts/confirm-admin/{pending.token}/")
 
         if not created:
@@ -63,8 +72,10 @@ def register_admin(request):
                 pending.cinema_name = cinema_name
                 pending.token = get_random_string(48)
                 pending.save()
+                # The link must carry the new token
+                confirmation_link = request.build_absolute_uri(f"/accounts/confirm-admin/{pending.token}/")
                 message = "A new confirmation link has been sent to your email."
-                email_sent = send_admin_confirmation_email(email, confirmation_link, cinema_name)
+                queue_admin_confirmation_email(pending, confirmation_link)
                 if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                     return JsonResponse({
                         'success': True,
@@ -75,7 +86,7 @@ def register_admin(request):
 
         else:
             message = "A confirmation email has been sent. Please check your inbox."
-            email_sent = send_admin_confirmation_email(email, confirmation_link, cinema_name)
+            queue_admin_confirmation_email(pending, confirmation_link)
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({
                     'success': True,
@@ -84,17 +95,6 @@ def register_admin(request):
             else:
                 messages.success(request, message)
         
-        if not email_sent:
-            message = "Confirmation email could not be sent. Please try again."
-            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-                return JsonResponse({
-                    'success': False,
-                    'message': message
-                }, status=500)
-            else:
-                messages.error(request, message)
-                return redirect("register_admin")
-        
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
@@ -126,20 +126,23 @@ def confirm_admin(request, token):
         messages.info(request, "This admin account has already been confirmed.")
         return redirect("login")
 
-    # Create the default admin
-    admin = create_default_admin(pending.cinema_name, pending.email)
+    with transaction.atomic():
+        # Create the default admin
+        admin = create_default_admin(pending.cinema_name, pending.email)
 
-    # Send credentials to the admin email (synchronous)
-    email_sent = send_admin_credentials_email(pending.email, pending.cinema_name, admin.username)
-    
-    if not email_sent:
-        messages.warning(request, "Admin account created but credentials email failed to send. Please contact support.")
-    else:
-        messages.success(request, "Admin account confirmed! Login details have been sent to your email.")
-    
-    # Mark as confirmed instead of deleting
-    pending.is_confirmed = True
-    pending.save()
+        # Queue credentials to the admin email (delivered in the background)
+        enqueue_email(
+            'admin_credentials',
+            pending.email,
+            {'email': pending.email, 'cinema_name': pending.cinema_name, 'username': admin.username},
+            idempotency_key=f"admin-credentials:{pending.email}",
+        )
+
+        # Mark as confirmed instead of deleting
+        pending.is_confirmed = True
+        pending.save()
+
+    messages.success(request, "Admin account confirmed! Login details are on their way to your email.")
 
     return redirect("login")
 
@@ -331,6 +334,8 @@ def edit_profile(request):
                 request.session['profile_updated'] = True
                 return redirect('profile')
                 
+            except UploadUnavailable:
+                messages.error(request, "Profile picture upload is temporarily unavailable. Please try again in a few minutes.")
             except Exception as e:
                 messages.error(request, f"Error updating profile: {str(e)}")
         else:
@@ -1,11 +1,22 @@
 from django.contrib.auth.decorators import login_required
 from accounts.decorators import admin_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from movies.catalog import (
+    admin_catalog, admin_facets, catalog_filters, catalog_json, filter_catalog, now_showing_catalog,
+    now_showing_facets, paginate_catalog,
+)
+from movies.search import search_catalog
 from movies.models import MovieAdminDetails
 from reservations.models import Reservation
+from reservations.utils import reservation_summary
+from reel_time.pagination import paginate
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+RECENT_RESERVATIONS_ORDERING = ('-reservation_date', '-id')
+RECENT_RESERVATIONS_PER_PAGE = 5
+
 @login_required
 def user_dashboard(request):
     manila_tz = ZoneInfo("Asia/Manila")
@@ -13,67 +24,38 @@ def user_dashboard(request):
 
     user = request.user
 
+    genres, ratings = catalog_filters(request.GET)
+
     # Get movies based on user type
     if user.is_authenticated and user.is_admin:
-        admin_details_qs = MovieAdminDetails.objects.select_related('movie').filter(admin=user)
-        movies_list = admin_details_qs
+        movies = admin_catalog(user, today, genres, ratings)
+        facets = admin_facets(user)
     else:
-        # Non-admin: only now showing and coming soon, get unique movies by title
-        admin_details_qs = MovieAdminDetails.objects.select_related('movie').filter(
-            end_date__gte=today  # excludes already ended movies
-        )
-        
-        # Get unique movie titles (case-insensitive)
-        seen_titles = set()
-        movies_list = []
-        for detail in admin_details_qs:
-            title_lower = detail.movie.title.lower().strip()
-            if title_lower not in seen_titles:
-                seen_titles.add(title_lower)
-                movies_list.append(detail)
-
-    movies = []
-
-    for detail in movies_list:
-        release_date = detail.release_date
-        end_date = detail.end_date
-        days_diff = (release_date - today).days
-
-        # Human-readable release label
-        if days_diff == 0:
-            release_label = "Today"
-        elif days_diff == 1:
-            release_label = "Tomorrow"
-        elif days_diff < 0 and detail.end_date < today:
-            release_label = "Ended"
-        else:
-            release_label = release_date.strftime("%B %d, %Y").replace(" 0", " ")
+        # Non-admin: only now showing and coming soon, one per title (cached, with facet counts)
+        movies = filter_catalog(now_showing_catalog(today), genres, ratings)
+        facets = now_showing_facets(today)
 
-        # Handle showing_times list
-        if isinstance(detail.showing_times, (list, tuple)):
-            showing_times_display = ", ".join(
-                s['time'] for s in detail.showing_times if 'time' in s
-            )
-        else:
-            showing_times_display = str(detail.showing_times)
+    query = request.GET.get('q', '').strip()
+    if query:
+        movies = search_catalog(movies, query)
 
-        # Format end date
-        end_date_label = end_date.strftime("%B %d, %Y").replace(" 0", " ") if end_date else "N/A"
+    page = paginate_catalog(request, movies, ranked=bool(query))
 
-        movies.append({
-            'detail': detail,
-            'release_label': release_label,
-            'end_date': end_date_label,
-            'showing_times_display': showing_times_display,
-            'days_diff': days_diff,
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'results': [catalog_json(movie) for movie in page],
+            'facets': facets,
+            **page.cursors(),
         })
 
-    # Sort: Today (0) → Upcoming (>0) → Past (<0)
-    movies.sort(key=lambda x: (x['days_diff'] != 0, x['days_diff'] > 0, abs(x['days_diff'])))
-
     return render(request, 'dashboards/user_dashboard.html', {
         'username': request.user.username,
-        'movies': movies
+        'movies': page.object_list,
+        'page': page,
+        'query': query,
+        'facets': facets,
+        'selected_genres': genres,
+        'selected_ratings': ratings,
     })
 
 @admin_required
@@ -81,19 +63,21 @@ def admin_dashboard(request):
     movies_count = MovieAdminDetails.objects.filter(admin=request.user).count()
     reservations_count = Reservation.objects.filter(movie_detail__admin=request.user).count()
     
-    # Get movies for this admin
-    admin_movies = MovieAdminDetails.objects.filter(
-        admin=request.user
-    ).select_related('movie').order_by('-created_at')
-    
-    # Get all reservations for this admin's movies (limit to 5 most recent)
+    # Most recent reservations for this admin's movies, a page at a time
     reservations = Reservation.objects.filter(
         movie_detail__admin=request.user
-    ).select_related('user', 'movie_detail__movie').order_by('-reservation_date')[:5]
+    ).select_related('user', 'movie_detail__movie')
+    page = paginate(request, reservations, ordering=RECENT_RESERVATIONS_ORDERING, per_page=RECENT_RESERVATIONS_PER_PAGE)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'results': [reservation_summary(reservation) for reservation in page],
+            **page.cursors(),
+        })
     
     return render(request, 'dashboards/admin_dashboard.html', {
         'movies_count': movies_count,
         'reservations_count': reservations_count,
-        'admin_movies': admin_movies,
-        'recent_reservations': reservations,
+        'recent_reservations': page.object_list,
+        'page': page,
     })
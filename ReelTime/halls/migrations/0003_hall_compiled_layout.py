@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('halls', '0002_hall_layout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hall',
+            name='cols',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hall',
+            name='layout_version',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='hall',
+            name='rows',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hall',
+            name='seat_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='hall',
+            name='layout',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated manually to store existing hall layouts in canonical form
+
+from django.db import migrations
+import hashlib
+import json
+
+CELL_TYPES = ('seat', 'screen', 'entrance', 'exit')
+
+
+def compile_layouts(apps, schema_editor):
+    Hall = apps.get_model('halls', 'Hall')
+    db_alias = schema_editor.connection.alias
+
+    halls = list(Hall.objects.using(db_alias).all())
+    for hall in halls:
+        layout = hall.layout
+        if isinstance(layout, str):
+            try:
+                layout = json.loads(layout) if layout else []
+            except json.JSONDecodeError:
+                layout = []
+        if isinstance(layout, dict):
+            layout = layout.get('seat_map', [])
+        if not isinstance(layout, list):
+            layout = []
+
+        # Keep only well-formed cells; later cells win on duplicate positions
+        cells = {}
+        for cell in layout:
+            try:
+                row, col = int(cell['row']), int(cell['col'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if row < 0 or col < 0 or cell.get('type') not in CELL_TYPES:
+                continue
+            cells[(row, col)] = {'row': row, 'col': col, 'type': cell['type']}
+
+        hall.layout = [cells[position] for position in sorted(cells)]
+        hall.seat_count = sum(1 for cell in hall.layout if cell['type'] == 'seat')
+        hall.rows = max((cell['row'] for cell in hall.layout), default=-1) + 1
+        hall.cols = max((cell['col'] for cell in hall.layout), default=-1) + 1
+        hall.layout_version = hashlib.sha1(
+            json.dumps(hall.layout, sort_keys=True).encode()
+        ).hexdigest()[:12]
+
+    Hall.objects.using(db_alias).bulk_update(
+        halls, ['layout', 'seat_count', 'rows', 'cols', 'layout_version'], batch_size=200
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('halls', '0003_hall_compiled_layout'),
+    ]
+
+    operations = [
+        migrations.RunPython(compile_layouts, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from .utils import compute_layout_version, normalize_layout
 
 
 # Create your models here.
@@ -13,7 +15,32 @@ class Hall(models.Model):
     name = models.CharField(max_length=100)
     capacity = models.PositiveIntegerField()
     
-    layout = models.JSONField(default=dict, blank=True)  # stores grid & objects position
+    layout = models.JSONField(default=list, blank=True)  # canonical list of {row, col, type} cells
+
+    # Derived from layout on save
+    seat_count = models.PositiveIntegerField(default=0, editable=False)
+    rows = models.PositiveIntegerField(default=0, editable=False)
+    cols = models.PositiveIntegerField(default=0, editable=False)
+    layout_version = models.CharField(max_length=12, blank=True, editable=False)
+
+    def clean(self):
+        self.compile_layout()
+        if self.capacity is not None and self.seat_count > int(self.capacity):
+            raise ValidationError(
+                f"The layout has {self.seat_count} seats but the hall capacity is {self.capacity}."
+            )
+
+    def compile_layout(self):
+        """Normalize the layout and refresh the columns derived from it."""
+        self.layout = normalize_layout(self.layout)
+        self.seat_count = sum(1 for cell in self.layout if cell['type'] == 'seat')
+        self.rows = max((cell['row'] for cell in self.layout), default=-1) + 1
+        self.cols = max((cell['col'] for cell in self.layout), default=-1) + 1
+        self.layout_version = compute_layout_version(self.layout)
+
+    def save(self, *args, **kwargs):
+        self.compile_layout()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} ({self.admin.cinema_name})"
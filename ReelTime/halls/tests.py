@@ -1,3 +1,173 @@
-from django.test import TestCase
+import base64
+import json
+from types import SimpleNamespace
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from accounts.models import User
+from .models import Hall
+from .utils import (
+    SEAT_LABEL_INDEX_LIMIT, build_occupancy, encode_occupancy, format_seat_labels, get_seat_label_index, seat_index,
+    set_seats,
+)
 
-# Create your tests here.
+
+def grid(rows, cols, screen_row=True):
+    """Return a layout of ``rows`` seat rows, behind a screen row if ``screen_row``."""
+    cells = [{"row": 0, "col": col, "type": "screen"} for col in range(cols)] if screen_row else []
+    offset = 1 if screen_row else 0
+    return cells + [
+        {"row": row + offset, "col": col, "type": "seat"} for row in range(rows) for col in range(cols)
+    ]
+
+
+class OccupancyBitsetTests(SimpleTestCase):
+    def test_seat_index(self):
+        self.assertEqual(seat_index('0-0', 4), 0)
+        self.assertEqual(seat_index('2-3', 4), 11)
+        self.assertIsNone(seat_index('1-4', 4))
+        self.assertIsNone(seat_index('-1-0', 4))
+        self.assertIsNone(seat_index('A1', 4))
+
+    def test_build_packs_least_significant_bit_first(self):
+        bits = build_occupancy(['1-0', '2-3'], rows=3, cols=4)
+        # 12 seats need 2 bytes; index 4 is bit 4 of byte 0, index 11 is bit 3 of byte 1
+        self.assertEqual(bits, bytes([0b00010000, 0b00001000]))
+
+    def test_build_ignores_seats_outside_the_grid(self):
+        self.assertEqual(build_occupancy(['4-0', '0-9', 'bad'], rows=3, cols=4), bytes(2))
+
+    def test_set_seats_flips_bits_in_place(self):
+        bits = bytearray(build_occupancy(['0-0', '0-1'], rows=1, cols=8))
+        set_seats(bits, ['0-0'], 8, occupied=False)
+        set_seats(bits, ['0-7'], 8)
+        self.assertEqual(bits, bytearray([0b10000010]))
+
+    def test_encode_round_trip(self):
+        bits = build_occupancy(['1-2', '4-4'], rows=5, cols=5)
+        encoded = encode_occupancy(bits)
+        self.assertEqual(base64.b64decode(encoded), bits)
+        self.assertEqual(encode_occupancy(b''), '')
+
+
+class SeatLabelIndexTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        indexes = mock.patch.dict('halls.utils._seat_label_indexes', clear=True)
+        self.indexes = indexes.start()
+        self.addCleanup(indexes.stop)
+
+    def hall(self, layout):
+        hall = Hall(name='Hall 1', capacity=100, layout=layout)
+        hall.compile_layout()
+        return hall
+
+    def test_labels_letter_rows_and_number_seats_right_to_left(self):
+        hall = self.hall(grid(2, 3))
+        self.assertEqual(format_seat_labels(hall, ['1-0', '1-2', '2-1', '0-0', '9-9']), ['A3', 'A1', 'B2'])
+
+    def test_halls_with_the_same_layout_share_one_index(self):
+        first, second = self.hall(grid(2, 3)), self.hall(grid(2, 3))
+        self.assertEqual(first.layout_version, second.layout_version)
+        self.assertIs(get_seat_label_index(first), get_seat_label_index(second))
+        self.assertEqual(list(self.indexes), [first.layout_version])
+
+    def test_layout_change_bumps_the_version_and_the_index(self):
+        hall = self.hall(grid(2, 3))
+        version = hall.layout_version
+        self.assertEqual(format_seat_labels(hall, ['1-2']), ['A1'])
+
+        hall.layout = grid(2, 4)
+        hall.compile_layout()
+
+        self.assertNotEqual(hall.layout_version, version)
+        self.assertEqual(format_seat_labels(hall, ['1-2', '1-3']), ['A2', 'A1'])
+
+    def test_index_survives_in_the_shared_cache(self):
+        hall = self.hall(grid(1, 2))
+        index = get_seat_label_index(hall)
+        self.indexes.clear()
+        # Another process (or a cleared dict) picks the compiled index up from the cache
+        with mock.patch('halls.utils.compile_seat_labels') as compile_seat_labels:
+            self.assertEqual(get_seat_label_index(hall), index)
+        compile_seat_labels.assert_not_called()
+
+    def test_process_dict_is_bounded(self):
+        for n in range(SEAT_LABEL_INDEX_LIMIT):
+            get_seat_label_index(SimpleNamespace(layout_version=f'v{n}', layout=[]))
+        self.assertEqual(len(self.indexes), SEAT_LABEL_INDEX_LIMIT)
+
+        hall = self.hall(grid(1, 2))
+        get_seat_label_index(hall)
+        self.assertEqual(list(self.indexes), [hall.layout_version])
+
+
+class HallLayoutTests(SimpleTestCase):
+    def hall(self, layout, capacity=100):
+        return Hall(name='Hall 1', capacity=capacity, layout=layout)
+
+    def test_malformed_layouts_are_rejected(self):
+        layouts = {
+            'invalid JSON': '[{"row": 0',
+            'not a list': 42,
+            'cell not an object': ['0-0'],
+            'missing col': [{"row": 0, "type": "seat"}],
+            'non-integer row': [{"row": "A", "col": 0, "type": "seat"}],
+            'negative col': [{"row": 0, "col": -1, "type": "seat"}],
+            'unknown type': [{"row": 0, "col": 0, "type": "sofa"}],
+        }
+        for case, layout in layouts.items():
+            with self.subTest(case), self.assertRaises(ValidationError):
+                self.hall(layout).clean()
+
+    def test_more_seats_than_capacity_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, 'The layout has 8 seats but the hall capacity is 6.'):
+            self.hall(grid(2, 4), capacity=6).clean()
+        self.hall(grid(2, 4), capacity=8).clean()
+
+    def test_compile_layout_derives_dimensions_and_version(self):
+        hall = self.hall(grid(2, 4))
+        hall.compile_layout()
+        self.assertEqual((hall.seat_count, hall.rows, hall.cols), (8, 3, 4))
+        self.assertEqual(len(hall.layout_version), 12)
+
+        empty = self.hall([])
+        empty.compile_layout()
+        self.assertEqual((empty.seat_count, empty.rows, empty.cols, empty.layout), (0, 0, 0, []))
+
+    def test_compile_layout_canonicalizes_the_cells(self):
+        hall = self.hall(grid(2, 4))
+        hall.compile_layout()
+
+        # Same cells as a JSON string in another order, wrapped the way the editor posts them,
+        # with string coordinates and one position given twice (the last one wins)
+        cells = [{**cell, "row": str(cell["row"])} for cell in reversed(grid(2, 4))]
+        cells.insert(0, {"row": 1, "col": 0, "type": "exit"})
+        again = self.hall(json.dumps({"seat_map": cells}))
+        again.compile_layout()
+
+        self.assertEqual(again.layout, hall.layout)
+        self.assertEqual(again.layout_version, hall.layout_version)
+        self.assertEqual(again.layout[:2], [
+            {"row": 0, "col": 0, "type": "screen"}, {"row": 0, "col": 1, "type": "screen"},
+        ])
+
+
+class HallModelTests(TestCase):
+    def test_save_stores_the_compiled_layout(self):
+        admin = User.objects.create_user(
+            'cinema', 'cinema@example.com', 'password', is_admin=True, cinema_name='Cinema 1'
+        )
+        hall = Hall.objects.create(admin=admin, name='Hall 1', capacity=8, layout=json.dumps(grid(2, 4)))
+        version = hall.layout_version
+
+        hall.refresh_from_db()
+        self.assertEqual((hall.seat_count, hall.rows, hall.cols, hall.layout_version), (8, 3, 4, version))
+
+        hall.layout = grid(2, 3)
+        hall.save()
+        hall.refresh_from_db()
+        self.assertEqual((hall.seat_count, hall.cols), (6, 3))
+        self.assertNotEqual(hall.layout_version, version)
@@ -0,0 +1,160 @@
+# halls/utils.py
+import base64
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+CELL_TYPES = ('seat', 'screen', 'entrance', 'exit')
+
+
+def parse_layout(layout):
+    """Return a raw layout (JSON string, dict or list) as a list of cell dicts."""
+    if isinstance(layout, str):
+        try:
+            layout = json.loads(layout) if layout else []
+        except json.JSONDecodeError:
+            raise ValidationError("Hall layout is not valid JSON.")
+    if isinstance(layout, dict):
+        layout = layout.get('seat_map', [])
+    if not isinstance(layout, list):
+        raise ValidationError("Hall layout must be a list of cells.")
+    return layout
+
+
+def normalize_layout(layout):
+    """
+    Validate a raw layout and return it in canonical form.
+
+    The canonical layout is a list of ``{"row": int, "col": int, "type": str}``
+    cells sorted by position, one cell per position, with unknown cell types
+    rejected.
+    """
+    cells = {}
+    for cell in parse_layout(layout):
+        if not isinstance(cell, dict):
+            raise ValidationError("Each layout cell must be an object.")
+        try:
+            row, col = int(cell['row']), int(cell['col'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError("Each layout cell needs an integer row and col.")
+        cell_type = cell.get('type')
+        if row < 0 or col < 0:
+            raise ValidationError("Layout rows and columns cannot be negative.")
+        if cell_type not in CELL_TYPES:
+            raise ValidationError(f"Unknown layout cell type: {cell_type!r}.")
+        cells[(row, col)] = {'row': row, 'col': col, 'type': cell_type}
+    return [cells[position] for position in sorted(cells)]
+
+
+def compute_layout_version(cells):
+    """Return a short stable hash identifying a canonical layout's contents."""
+    return hashlib.sha1(json.dumps(cells, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def get_layout_info(hall):
+    """Return a hall's canonical layout with its dimensions and version."""
+    return {
+        'cells': hall.layout,
+        'rows': hall.rows,
+        'cols': hall.cols,
+        'version': hall.layout_version,
+    }
+
+
+# --------------------------
+# Seat labels
+# --------------------------
+# Compiled label indexes keyed by layout version; shared by every hall
+# with an identical layout and bounded so edits can't grow it forever
+_seat_label_indexes = {}
+SEAT_LABEL_INDEX_LIMIT = 256
+
+
+def compile_seat_labels(cells):
+    """
+    Map every seat id ("row-col") to its printed label, e.g. "A1".
+
+    Rows are lettered from the first row that has seats and seats are
+    numbered right to left, matching the seat map shown to customers.
+    """
+    rows = {}
+    for cell in cells:
+        if cell.get('type') == 'seat':
+            rows.setdefault(cell['row'], set()).add(cell['col'])
+    if not rows:
+        return {}
+
+    min_row = min(rows)
+    labels = {}
+    for row, cols in rows.items():
+        row_letter = chr(65 + (row - min_row))
+        for number, col in enumerate(sorted(cols, reverse=True), start=1):
+            labels[f"{row}-{col}"] = f"{row_letter}{number}"
+    return labels
+
+
+def get_seat_label_index(hall):
+    """Return the compiled ``{"row-col": label}`` index for a hall's layout."""
+    version = hall.layout_version
+
+    index = _seat_label_indexes.get(version)
+    if index is None:
+        key = f"halls:seat-labels:{version}"
+        index = cache.get(key)
+        if index is None:
+            index = compile_seat_labels(hall.layout)
+            cache.set(key, index, LAYOUT_CACHE_TIMEOUT)
+        if len(_seat_label_indexes) >= SEAT_LABEL_INDEX_LIMIT:
+            _seat_label_indexes.clear()
+        _seat_label_indexes[version] = index
+    return index
+
+
+def format_seat_labels(hall, seat_ids):
+    """Return the printed labels for ``seat_ids``, skipping unknown seats."""
+    if not hall or not seat_ids:
+        return []
+    index = get_seat_label_index(hall)
+    return [index[seat_id] for seat_id in seat_ids if seat_id in index]
+
+
+# --------------------------
+# Seat occupancy bitsets
+# --------------------------
+def seat_index(seat_id, width):
+    """Map a "row-col" seat id to its integer index (row * width + col)."""
+    try:
+        row, col = map(int, str(seat_id).split('-'))
+    except ValueError:
+        return None
+    if row < 0 or col < 0 or col >= width:
+        return None
+    return row * width + col
+
+
+def build_occupancy(seat_ids, rows, cols):
+    """Pack the given seat ids into a bitset of rows * cols bits (LSB first)."""
+    bits = bytearray((rows * cols + 7) // 8)
+    set_seats(bits, seat_ids, cols)
+    return bytes(bits)
+
+
+def set_seats(bits, seat_ids, width, occupied=True):
+    """Flip the bits for ``seat_ids`` in place on a bytearray bitset."""
+    for seat_id in seat_ids:
+        index = seat_index(seat_id, width)
+        if index is None or index >= len(bits) * 8:
+            continue
+        if occupied:
+            bits[index >> 3] |= 1 << (index & 7)
+        else:
+            bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+    return bits
+
+
+def encode_occupancy(bits):
+    return base64.b64encode(bytes(bits)).decode('ascii')
@@ -1,6 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.core.exceptions import ValidationError
 from .models import Hall
+import json
 
 
 @login_required
@@ -26,46 +29,37 @@ def hall_form_view(request, pk=None):
         layout_json = request.POST.get("layout")  # JSON string from JS designer
         capacity = request.POST.get("capacity", 0)
 
-        if hall:
-            hall.name = name
-            hall.layout = layout_json
-            hall.capacity = capacity
-            hall.save()
-        else:
-            hall = Hall.objects.create(
-                admin=request.user,
-                name=name,
-                layout=layout_json,
-                capacity=capacity
-            )
+        if not hall:
+            hall = Hall(admin=request.user)
+        hall.name = name
+        hall.layout = layout_json
+        hall.capacity = capacity
 
-        return redirect("hall_list")
-    
+        # Layout is normalized and validated once here; readers use it as-is
+        try:
+            hall.full_clean()
+        except ValidationError as e:
+            for error in e.messages:
+                messages.error(request, error)
+        else:
+            hall.save()
+            return redirect("hall_list")
 
-    #EDITED HERE K
     # Default grid size for new halls (12x12)
     rows = 12
     cols = 12
     
-    # If editing existing hall, extract rows and cols from layout
-    if hall and hall.layout:
-        try:
-            import json
-            layout_data = hall.layout if isinstance(hall.layout, list) else json.loads(hall.layout) if isinstance(hall.layout, str) else []
-            if layout_data:
-                # Find max row and col from layout
-                max_row = max([item.get('row', 0) for item in layout_data]) if layout_data else 11
-                max_col = max([item.get('col', 0) for item in layout_data]) if layout_data else 11
-                rows = max_row + 1
-                cols = max_col + 1
-        except:
-            # If parsing fails, use defaults
-            pass
+    # If editing existing hall, use its stored dimensions
+    if hall and hall.rows and hall.cols:
+        rows = hall.rows
+        cols = hall.cols
+
+    layout = hall.layout if hall and isinstance(hall.layout, list) else []
 
     return render(
         request,
         "halls/hall_form.html",
-        {"hall": hall, "rows": range(rows), "cols": range(cols)}
+        {"hall": hall, "rows": range(rows), "cols": range(cols), "layout_json": json.dumps(layout)}
     )
 
 
@@ -1,5 +1,29 @@
 from django.contrib import admin
-from .models import Movie, MovieAdminDetails
+from django.db.models.expressions import RawSQL
+from .models import CanonicalMovie, Movie, MovieAdminDetails
+from .search import matching_movies_sql
+
+
+class MovieSearchAdminMixin:
+    """
+    Also match rows whose movie matches the search term in the full-text index.
+
+    ``movie_search_field`` is the lookup path from the model to its ``Movie``.
+    """
+    movie_search_field = 'movie'
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term.strip():
+            return results, may_have_duplicates
+        match = matching_movies_sql(search_term)
+        if match:
+            results |= queryset.filter(**{f'{self.movie_search_field}__in': RawSQL(*match)})
+        else:
+            # No full-text index on this backend
+            results |= queryset.filter(**{f'{self.movie_search_field}__title__icontains': search_term})
+        return results, may_have_duplicates
+
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
@@ -7,8 +31,13 @@ class MovieAdmin(admin.ModelAdmin):
     search_fields = ('title', 'genre', 'director')
     list_filter = ('genre', 'rating')
 
+@admin.register(CanonicalMovie)
+class CanonicalMovieAdmin(admin.ModelAdmin):
+    list_display = ('title', 'director', 'duration_minutes', 'rating')
+    search_fields = ('title', 'title_key', 'director')
+
 @admin.register(MovieAdminDetails)
-class MovieAdminDetailsAdmin(admin.ModelAdmin):
+class MovieAdminDetailsAdmin(MovieSearchAdminMixin, admin.ModelAdmin):
     list_display = ('movie', 'admin', 'release_date', 'end_date', 'is_now_showing')
     list_filter = ('release_date', 'end_date')
-    search_fields = ('movie__title', 'admin__cinema_name')
\ No newline at end of file
+    search_fields = ('admin__cinema_name',)
\ No newline at end of file
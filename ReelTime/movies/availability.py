@@ -0,0 +1,82 @@
+# movies/availability.py
+"""
+Remaining-seat lookups across cinemas, dates and showtimes.
+
+Seat totals come from ``Screening`` counters, so the availability of every
+showing of a title over any date range is a single query no matter how
+many cinemas or showtimes there are. Showings nobody has booked yet have no
+counter row and report their full capacity.
+"""
+from datetime import timedelta
+from django.utils import timezone
+from .models import Screening
+
+
+def showtimes_for(detail):
+    """
+    Return ``(time, max_seats)`` pairs for a movie detail's showtimes.
+
+    Capacities come from ``get_showtime_capacity``, the same source as the
+    screening counters (legacy plain-string showtimes seat the whole hall).
+    """
+    times = [s.get("time") if isinstance(s, dict) else s for s in detail.showing_times or []]
+    return [(time, detail.get_showtime_capacity(time)) for time in times]
+
+
+def get_availability_matrix(movie_details, start_date=None, end_date=None):
+    """
+    Return remaining seats for every (detail, date, showtime) in a date range.
+
+    Dates run from ``start_date`` (default today) to ``end_date`` (default
+    the last end date among the details), clipped to each detail's own run.
+    The result is ``{detail_id: {date: {showtime: remaining}}}``.
+    """
+    movie_details = list(movie_details)
+    if not movie_details:
+        return {}
+
+    start_date = start_date or timezone.localdate()
+    end_date = end_date or max(detail.end_date for detail in movie_details)
+
+    reserved = {
+        (detail_id, date, showtime): seats_reserved
+        for detail_id, date, showtime, seats_reserved in Screening.objects.filter(
+            movie_detail__in=[detail.id for detail in movie_details],
+            date__gte=start_date,
+            date__lte=end_date,
+        ).values_list('movie_detail_id', 'date', 'showtime', 'seats_reserved')
+    }
+
+    matrix = {}
+    for detail in movie_details:
+        showtimes = showtimes_for(detail)
+        day = max(start_date, detail.release_date)
+        last_day = min(end_date, detail.end_date)
+        dates = matrix.setdefault(detail.id, {})
+        while day <= last_day:
+            dates[day] = {
+                time: max_seats - reserved.get((detail.id, day, time), 0)
+                for time, max_seats in showtimes
+            }
+            day += timedelta(days=1)
+    return matrix
+
+
+def get_availability_calendar(movie_details, start_date=None):
+    """
+    Return a JSON-ready availability calendar for the rest of each run.
+
+    ``{detail_id: {"dates": {"YYYY-MM-DD": {showtime: remaining}}, "sold_out_dates": [...]}}``
+    """
+    calendar = {}
+    for detail_id, dates in get_availability_matrix(movie_details, start_date).items():
+        calendar[detail_id] = {
+            "dates": {
+                day.isoformat(): showtimes for day, showtimes in dates.items()
+            },
+            "sold_out_dates": [
+                day.isoformat() for day, showtimes in dates.items()
+                if showtimes and all(remaining <= 0 for remaining in showtimes.values())
+            ],
+        }
+    return calendar
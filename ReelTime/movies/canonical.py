@@ -0,0 +1,123 @@
+# movies/canonical.py
+"""
+Clustering of per-cinema ``Movie`` rows into ``CanonicalMovie`` films.
+
+Every admin who adds a film creates their own ``Movie`` copy. Copies are
+grouped by ``title_key`` and split where directors or runtimes disagree
+(see ``movies.models.same_film``); each group becomes one canonical film
+whose metadata is merged from its copies.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Prefetch
+from .catalog import bump_catalog_version
+from .models import CanonicalMovie, Movie, MovieAdminDetails, same_film
+
+# CanonicalMovie fields filled by merged_metadata()
+MERGED_FIELDS = ('title', 'title_key', 'description', 'genre', 'director', 'duration_minutes', 'rating')
+
+
+def cluster_movies(movies):
+    """Return ``movies`` grouped into lists of copies of the same film, in id order."""
+    clusters_by_title = {}
+    clusters = []
+    for movie in sorted(movies, key=lambda m: m.id):
+        candidates = clusters_by_title.setdefault(movie.title_key, [])
+        for cluster in candidates:
+            # Compare against every member so A~B and B~C never pulls in an unrelated C
+            if all(same_film(member, movie) for member in cluster):
+                cluster.append(movie)
+                break
+        else:
+            cluster = [movie]
+            candidates.append(cluster)
+            clusters.append(cluster)
+    return clusters
+
+
+def most_common(values):
+    """Return the most frequent truthy value (earliest on ties), or None."""
+    counts = Counter(value for value in values if value)
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def merged_metadata(cluster):
+    """Return ``CanonicalMovie`` field values merged from the copies in ``cluster``."""
+    genres = []
+    for movie in cluster:
+        for genre in movie.genre or []:
+            if genre not in genres:
+                genres.append(genre)
+
+    return {
+        'title': most_common(' '.join(movie.title.split()) for movie in cluster),
+        'title_key': cluster[0].title_key,
+        'description': max((movie.description for movie in cluster), key=len, default=''),
+        'genre': genres,
+        'director': most_common(' '.join(movie.director.split()) for movie in cluster) or '',
+        'duration_minutes': most_common(movie.duration_minutes for movie in cluster),
+        'rating': most_common(movie.rating for movie in cluster) or '',
+    }
+
+
+def merge_movies(dry_run=False):
+    """
+    Re-cluster every movie and point each showing detail at its canonical film.
+
+    Clusters keep the canonical film most of their details already use, so
+    ids stay stable across runs; canonical films left without details are
+    deleted. Returns counts of what changed (nothing is written on a dry run).
+    """
+    details = MovieAdminDetails.objects.only('id', 'movie_id', 'canonical_movie_id')
+    movies = list(Movie.objects.prefetch_related(Prefetch('admin_details', queryset=details)))
+    clusters = cluster_movies(movies)
+    stats = {'movies': len(movies), 'films': 0, 'created': 0, 'relinked': 0, 'removed': 0}
+
+    with transaction.atomic():
+        canonicals = CanonicalMovie.objects.select_for_update().in_bulk()
+        kept = set()
+        assignments = []  # (canonical, details)
+        new_canonicals = []
+
+        for cluster in clusters:
+            cluster_details = [detail for movie in cluster for detail in movie.admin_details.all()]
+            if not cluster_details:
+                continue  # Movies that aren't showing anywhere need no canonical film
+
+            metadata = merged_metadata(cluster)
+            current = most_common(
+                detail.canonical_movie_id for detail in cluster_details
+                if detail.canonical_movie_id in canonicals and detail.canonical_movie_id not in kept
+            )
+            if current:
+                canonical = canonicals[current]
+                for field, value in metadata.items():
+                    setattr(canonical, field, value)
+                kept.add(current)
+            else:
+                canonical = CanonicalMovie(**metadata)
+                new_canonicals.append(canonical)
+            assignments.append((canonical, cluster_details))
+
+        CanonicalMovie.objects.bulk_create(new_canonicals)
+        CanonicalMovie.objects.bulk_update([canonicals[pk] for pk in kept], MERGED_FIELDS)
+
+        changed = []
+        for canonical, cluster_details in assignments:
+            for detail in cluster_details:
+                if detail.canonical_movie_id != canonical.id:
+                    detail.canonical_movie_id = canonical.id
+                    changed.append(detail)
+        MovieAdminDetails.objects.bulk_update(changed, ['canonical_movie'], batch_size=500)
+
+        removed, _ = CanonicalMovie.objects.exclude(
+            id__in=kept | {canonical.id for canonical in new_canonicals}
+        ).delete()
+
+        stats.update(films=len(assignments), created=len(new_canonicals), relinked=len(changed), removed=removed)
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if not dry_run and (changed or removed or new_canonicals):
+        bump_catalog_version()
+    return stats
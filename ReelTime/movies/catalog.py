@@ -0,0 +1,265 @@
+# movies/catalog.py
+"""
+Movie listings shown on the movie list and the user dashboard.
+
+The public "now showing and coming soon" catalog only changes when a movie
+or its showing details change, or when the day rolls over, so it is built
+once and cached under the current date and a catalog version. Saving or
+deleting a ``Movie`` or ``MovieAdminDetails`` bumps the version (see
+``movies.signals``), which retires every cached copy at once.
+
+Genre and rating facet counts are cached with the catalog, and filtering the
+cached catalog only tests each movie's ``genre_mask`` bits, so filter chips
+and filtered listings cost no queries. Admin listings aren't cached and
+filter in SQL instead.
+"""
+import time
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.db.models.lookups import GreaterThan
+from django.urls import reverse
+from django.utils import timezone
+from reel_time.pagination import paginate
+from .models import GENRE_BITS, GENRE_CHOICES, Movie, MovieAdminDetails, genre_mask
+
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_PER_PAGE = 24
+CATALOG_VERSION_KEY = 'movies:catalog:version'
+
+
+def format_date_label(value):
+    return value.strftime("%B %d, %Y").replace(" 0", " ")
+
+
+def catalog_entry(detail, today):
+    """Return the listing dict the movie templates render for one showing detail."""
+    release_date = detail.release_date
+    end_date = detail.end_date
+    days_diff = (release_date - today).days
+
+    # Human-readable release label
+    if days_diff == 0:
+        release_label = "Today"
+    elif days_diff == 1:
+        release_label = "Tomorrow"
+    elif days_diff < 0 and end_date < today:
+        release_label = "Ended"
+    else:
+        release_label = format_date_label(release_date)
+
+    # Handle showing_times list
+    if isinstance(detail.showing_times, (list, tuple)):
+        showing_times_display = ", ".join(
+            s['time'] for s in detail.showing_times if 'time' in s
+        )
+    else:
+        showing_times_display = str(detail.showing_times)
+
+    return {
+        'detail': detail,
+        'release_label': release_label,
+        'end_date': format_date_label(end_date) if end_date else "N/A",
+        'showing_times_display': showing_times_display,
+        'days_diff': days_diff,
+    }
+
+
+def catalog_sort_key(movie):
+    """
+    Return the listing order of a listing dict: Today (0) → Past (<0, latest
+    release first) → Upcoming (>0, soonest first), ties broken by detail id.
+
+    Also the keyset the catalog is paged by, so it holds only JSON-friendly ints.
+    """
+    days_diff = movie['days_diff']
+    return [int(days_diff != 0), int(days_diff > 0), abs(days_diff), movie['detail'].pk]
+
+
+def build_catalog(details, today):
+    """Return listing dicts for ``details`` in ``catalog_sort_key`` order."""
+    movies = [catalog_entry(detail, today) for detail in details]
+    movies.sort(key=catalog_sort_key)
+    return movies
+
+
+def paginate_catalog(request, movies, ranked=False):
+    """
+    Return the requested page of a catalog.
+
+    ``ranked`` lists (search results, best match first) aren't in catalog
+    order, so they are paged by position instead.
+    """
+    if ranked:
+        positions = {movie['detail'].pk: i for i, movie in enumerate(movies)}
+
+        def key(movie):
+            return [positions[movie['detail'].pk]]
+    else:
+        key = catalog_sort_key
+    return paginate(request, movies, key=key, per_page=CATALOG_PER_PAGE)
+
+
+def catalog_json(movie):
+    """Return a listing dict as JSON for the catalog views' AJAX responses."""
+    detail = movie['detail']
+    return {
+        'id': detail.pk,
+        'movie_id': detail.movie_id,
+        'title': detail.movie.title,
+        'genres': detail.movie.genre,
+        'rating': detail.movie.rating,
+        'duration_minutes': detail.movie.duration_minutes,
+        'release_label': movie['release_label'],
+        'end_date': movie['end_date'],
+        'showing_times': movie['showing_times_display'],
+        'url': reverse('movie_detail', args=[detail.pk]),
+    }
+
+
+RATING_VALUES = {value for value, _ in Movie.RATING_CHOICES}
+
+
+def catalog_filters(params):
+    """Return the ``(genres, ratings)`` selected in a request's GET params, ignoring unknown values."""
+    genres = [genre for genre in params.getlist('genre') if genre in GENRE_BITS]
+    ratings = [rating for rating in params.getlist('rating') if rating in RATING_VALUES]
+    return genres, ratings
+
+
+def filter_details(details, genres=(), ratings=()):
+    """
+    Narrow a ``MovieAdminDetails`` queryset to movies with any of ``genres``
+    and any of ``ratings`` (an empty selection doesn't filter).
+    """
+    mask = genre_mask(genres)
+    if mask:
+        details = details.filter(GreaterThan(F('movie__genre_mask').bitand(mask), 0))
+    if ratings:
+        details = details.filter(movie__rating__in=ratings)
+    return details
+
+
+def filter_catalog(movies, genres=(), ratings=()):
+    """Return the listing dicts in ``movies`` matching the filters (same rules as ``filter_details``)."""
+    mask = genre_mask(genres)
+    return [
+        movie for movie in movies
+        if (not mask or movie['detail'].movie.genre_mask & mask)
+        and (not ratings or movie['detail'].movie.rating in ratings)
+    ]
+
+
+def facet_counts(details):
+    """
+    Return how many of ``details`` fall under each genre and rating, in one query.
+
+    ``{'genres': [{'value', 'label', 'count'}, ...], 'ratings': [...]}`` in
+    choice order, for rendering filter chips.
+    """
+    counts = details.aggregate(
+        **{
+            f'genre_{i}': Count('id', filter=GreaterThan(F('movie__genre_mask').bitand(GENRE_BITS[value]), 0))
+            for i, (value, _) in enumerate(GENRE_CHOICES)
+        },
+        **{
+            f'rating_{i}': Count('id', filter=Q(movie__rating=value))
+            for i, (value, _) in enumerate(Movie.RATING_CHOICES)
+        },
+    )
+    return {
+        'genres': [
+            {'value': value, 'label': label, 'count': counts[f'genre_{i}']}
+            for i, (value, label) in enumerate(GENRE_CHOICES)
+        ],
+        'ratings': [
+            {'value': value, 'label': label, 'count': counts[f'rating_{i}']}
+            for i, (value, label) in enumerate(Movie.RATING_CHOICES)
+        ],
+    }
+
+
+def admin_catalog(admin, today=None, genres=(), ratings=()):
+    """Return every movie an admin has added (not cached; admins see their edits at once)."""
+    today = today or timezone.localdate()
+    details = MovieAdminDetails.objects.select_related('movie').filter(admin=admin)
+    return build_catalog(filter_details(details, genres, ratings), today)
+
+
+def admin_facets(admin):
+    """Return facet counts over every movie an admin has added."""
+    return facet_counts(MovieAdminDetails.objects.filter(admin=admin))
+
+
+def first_detail_per_title(details):
+    """
+    Narrow ``details`` to the lowest-id detail of each canonical film.
+
+    The dedup runs in the database: ``DISTINCT ON`` where supported
+    (PostgreSQL), otherwise a ``ROW_NUMBER()`` window partitioned by film.
+    """
+    if connections[details.db].features.can_distinct_on_fields:
+        first_ids = details.order_by('canonical_movie', 'id').distinct('canonical_movie').values('id')
+        return MovieAdminDetails.objects.filter(id__in=first_ids)
+    return details.annotate(
+        title_rank=Window(RowNumber(), partition_by=F('canonical_movie'), order_by=F('id').asc()),
+    ).filter(title_rank=1)
+
+
+def showings_of(movie):
+    """Return every cinema's showing details for the film ``movie`` is a copy of."""
+    # Resolve the film ids first so the lookup is a plain indexed IN list
+    canonical_ids = set(
+        MovieAdminDetails.objects.filter(movie=movie).values_list('canonical_movie_id', flat=True)
+    )
+    return MovieAdminDetails.objects.filter(canonical_movie_id__in=canonical_ids)
+
+
+def build_now_showing(today):
+    """Return one listing per film for movies that haven't ended, and their facet counts."""
+    details = MovieAdminDetails.objects.filter(
+        end_date__gte=today  # excludes already ended movies
+    )
+    unique_details = first_detail_per_title(details)
+    return {
+        'movies': build_catalog(unique_details.select_related('movie').order_by('id'), today),
+        'facets': facet_counts(unique_details),
+    }
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost version never reuses an old one
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Retire every cached catalog; the next request rebuilds it."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Version not in the cache yet (or evicted)
+        cache.set(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def cached_now_showing(today):
+    key = f"movies:now-showing:{today.isoformat()}:{catalog_version()}"
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_now_showing(today)
+        cache.set(key, catalog, CATALOG_CACHE_TIMEOUT)
+    return catalog
+
+
+def now_showing_catalog(today=None):
+    """Return the cached public catalog for ``today`` (built on a miss)."""
+    return cached_now_showing(today or timezone.localdate())['movies']
+
+
+def now_showing_facets(today=None):
+    """Return the cached genre and rating counts of the public catalog for ``today``."""
+    return cached_now_showing(today or timezone.localdate())['facets']
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Movie, MovieAdminDetails
+from .models import CanonicalMovie, Movie, MovieAdminDetails
 from django.forms.widgets import DateInput, Textarea
 from halls.models import Hall
 import json
@@ -273,6 +273,10 @@ class MovieForm(forms.ModelForm):
                     # Cloudinary will automatically handle the replacement
                     admin_details.poster = poster
 
+                # Relink if the edit made this a different film (e.g. a retitle)
+                if not admin_details.canonical_movie.matches(movie):
+                    admin_details.canonical_movie = CanonicalMovie.for_movie(movie)
+
                 admin_details.save()
 
         return movie
\ No newline at end of file
@@ -0,0 +1,105 @@
+# movies/management/commands/benchmark_movie_search.py
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from movies.models import GENRE_CHOICES, Movie, genre_mask, title_key
+from movies.search import SUGGESTION_LIMIT, search_movie_ids, search_terms
+
+# ~4k made-up words, so single words are about as selective as real titles
+SYLLABLES = ('ka', 'lo', 'ri', 'ma', 'tan', 'sen', 'vo', 'gri', 'dul', 'pe', 'ra', 'mi', 'no', 'sha', 'ter', 'bu')
+WORDS = [a + b for a in SYLLABLES for b in SYLLABLES] + [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+DIRECTORS = ('Lino Brocka', 'Ishmael Bernal', 'Lav Diaz', 'Erik Matti', 'Antoinette Jadaone', 'Jerrold Tarog')
+GENRES = [value for value, _ in GENRE_CHOICES]
+
+
+def synthetic_movie(rng, i):
+    title = ' '.join(rng.sample(WORDS, rng.randint(1, 3))).title() + f' {i}'
+    genres = rng.sample(GENRES, rng.randint(1, 3))
+    return Movie(
+        title=title,
+        title_key=title_key(title),
+        description=' '.join(rng.choices(WORDS, k=30)),
+        genre=genres,
+        genre_mask=genre_mask(genres),
+        director=rng.choice(DIRECTORS),
+        duration_minutes=rng.randint(80, 180),
+        rating=rng.choice(('G', 'PG', 'SPG')),
+    )
+
+
+def icontains_ids(text, limit):
+    movies = Movie.objects.all()
+    for term in search_terms(text):
+        movies = movies.filter(
+            Q(title__icontains=term) | Q(description__icontains=term)
+            | Q(director__icontains=term) | Q(genre__icontains=term)
+        )
+    return list(movies.order_by('id').values_list('id', flat=True)[:limit])
+
+
+def timed(func, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+class Command(BaseCommand):
+    help = 'Compare full-text movie search with icontains scans on synthetic movies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=100_000, help='Synthetic movies to create')
+        parser.add_argument('--queries', type=int, default=200, help='Queries per measurement')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic movies (rolled back by default)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['movies']
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            for start in range(0, count, 5000):
+                # bulk_create skips Movie.save(); the search triggers still fire
+                Movie.objects.bulk_create([
+                    synthetic_movie(rng, i) for i in range(start, min(start + 5000, count))
+                ])
+            self.stdout.write(f"Created {count} movies in {time.perf_counter() - started:.1f}s ({connection.vendor})")
+
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            phrases = [' '.join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(options['queries'])]
+            director_queries = [rng.choice(DIRECTORS).split()[-1] for _ in range(options['queries'])]
+            prefixes = [rng.choice(WORDS)[:rng.randint(2, 4)] for _ in range(options['queries'])]
+
+            runs = [
+                ('words, top 20', phrases,
+                 lambda q: search_movie_ids(q, limit=20), lambda q: icontains_ids(q, 20)),
+                ('director, top 20', director_queries,  # matches ~1 in 6 movies
+                 lambda q: search_movie_ids(q, limit=20), lambda q: icontains_ids(q, 20)),
+                (f'prefix, top {SUGGESTION_LIMIT}', prefixes,
+                 lambda q: search_movie_ids(q, prefix=True, limit=SUGGESTION_LIMIT),
+                 lambda q: icontains_ids(q, SUGGESTION_LIMIT)),
+            ]
+
+            self.stdout.write(
+                f"{'query':<18}{'fts mean ms':>13}{'fts p95 ms':>12}{'scan mean ms':>14}{'scan p95 ms':>13}"
+            )
+            for name, queries, search, scan in runs:
+                fts_mean, fts_p95 = timed(search, queries)
+                scan_mean, scan_p95 = timed(scan, queries)
+                self.stdout.write(
+                    f"{name:<18}{fts_mean * 1e3:>13.2f}{fts_p95 * 1e3:>12.2f}"
+                    f"{scan_mean * 1e3:>14.2f}{scan_p95 * 1e3:>13.2f}"
+                )
+
+            if not options['keep']:
+                transaction.set_rollback(True)
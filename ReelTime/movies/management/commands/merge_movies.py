@@ -0,0 +1,23 @@
+# movies/management/commands/merge_movies.py
+from django.core.management.base import BaseCommand
+from movies.canonical import merge_movies
+
+
+class Command(BaseCommand):
+    help = 'Cluster per-cinema movie copies into canonical films and relink showing details'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        stats = merge_movies(dry_run=options['dry_run'])
+        prefix = "Would merge" if options['dry_run'] else "Merged"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['movies']} movies into {stats['films']} films: "
+            f"{stats['created']} canonical films created, {stats['relinked']} showings relinked, "
+            f"{stats['removed']} unused canonical films removed"
+        ))
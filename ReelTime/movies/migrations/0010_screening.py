@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_alter_movie_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Screening',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('showtime', models.CharField(max_length=50)),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('seats_reserved', models.IntegerField(default=0)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('movie_detail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screenings', to='movies.movieadmindetails')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('movie_detail', 'date', 'showtime'), name='unique_screening_per_showtime')],
+            },
+        ),
+    ]
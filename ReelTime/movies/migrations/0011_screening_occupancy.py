@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_screening'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screening',
+            name='occupancy',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='screening',
+            name='occupancy_layout',
+            field=models.CharField(blank=True, max_length=12),
+        ),
+    ]
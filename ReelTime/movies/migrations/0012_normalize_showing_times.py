@@ -0,0 +1,42 @@
+# Generated manually to store minutes-of-day on every showtime entry
+
+from django.db import migrations
+from datetime import datetime
+
+SHOWTIME_FORMATS = ('%I:%M %p', '%H:%M', '%H:%M:%S')
+
+
+def parse_minutes(value):
+    value = str(value or '').strip().upper()
+    for fmt in SHOWTIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return parsed.hour * 60 + parsed.minute
+    return None
+
+
+def add_showtime_minutes(apps, schema_editor):
+    MovieAdminDetails = apps.get_model('movies', 'MovieAdminDetails')
+    db_alias = schema_editor.connection.alias
+
+    details = list(MovieAdminDetails.objects.using(db_alias).all())
+    for detail in details:
+        detail.showing_times = [
+            {**s, 'minutes': parse_minutes(s.get('time'))} if isinstance(s, dict) else s
+            for s in detail.showing_times or []
+        ]
+
+    MovieAdminDetails.objects.using(db_alias).bulk_update(details, ['showing_times'], batch_size=200)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_screening_occupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_showtime_minutes, migrations.RunPython.noop),
+    ]
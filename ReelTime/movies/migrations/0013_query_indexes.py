@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('halls', '0004_compile_existing_layouts'),
+        ('movies', '0012_normalize_showing_times'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movieadmindetails',
+            index=models.Index(fields=['end_date'], name='detail_end_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movieadmindetails',
+            index=models.Index(fields=['admin', 'end_date'], name='detail_admin_end_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='title_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+    ]
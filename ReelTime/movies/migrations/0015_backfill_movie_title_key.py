@@ -0,0 +1,28 @@
+# Generated manually to fill Movie.title_key for existing movies
+
+from django.db import migrations
+
+
+def title_key(title):
+    return ' '.join(str(title or '').split()).lower()
+
+
+def backfill_title_key(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    db_alias = schema_editor.connection.alias
+
+    movies = list(Movie.objects.using(db_alias).only('id', 'title'))
+    for movie in movies:
+        movie.title_key = title_key(movie.title)
+    Movie.objects.using(db_alias).bulk_update(movies, ['title_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0014_movie_title_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_title_key, migrations.RunPython.noop),
+    ]
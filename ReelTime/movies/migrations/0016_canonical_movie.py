@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0015_backfill_movie_title_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CanonicalMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('title_key', models.CharField(db_index=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('genre', models.JSONField(blank=True, default=list)),
+                ('director', models.CharField(blank=True, max_length=255)),
+                ('duration_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('rating', models.CharField(blank=True, choices=[('G', 'G - General Audiences'), ('PG', 'PG - Parental Guidance'), ('SPG', 'SPG - Strict Parental Guidance')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='movieadmindetails',
+            name='canonical_movie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admin_details', to='movies.canonicalmovie'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated manually to group existing movies into canonical films
+# (`python manage.py merge_movies` re-runs the full clustering later)
+
+from django.db import migrations
+
+DURATION_TOLERANCE = 15
+
+
+def normalize(value):
+    return ' '.join(str(value or '').split()).lower()
+
+
+def same_film(a, b):
+    if a.title_key != b.title_key:
+        return False
+    if normalize(a.director) and normalize(b.director) and normalize(a.director) != normalize(b.director):
+        return False
+    if a.duration_minutes and b.duration_minutes:
+        return abs(a.duration_minutes - b.duration_minutes) <= DURATION_TOLERANCE
+    return True
+
+
+def backfill_canonical_movies(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    CanonicalMovie = apps.get_model('movies', 'CanonicalMovie')
+    MovieAdminDetails = apps.get_model('movies', 'MovieAdminDetails')
+    db_alias = schema_editor.connection.alias
+
+    # Each film is represented by its lowest-id copy
+    canonical_by_movie = {}
+    films = {}  # title_key -> [(representative movie, canonical)]
+    for movie in Movie.objects.using(db_alias).filter(admin_details__isnull=False).distinct().order_by('id'):
+        for representative, canonical in films.get(movie.title_key, []):
+            if same_film(representative, movie):
+                break
+        else:
+            canonical = CanonicalMovie.objects.using(db_alias).create(
+                title=' '.join(movie.title.split()),
+                title_key=movie.title_key,
+                description=movie.description,
+                genre=movie.genre or [],
+                director=movie.director,
+                duration_minutes=movie.duration_minutes,
+                rating=movie.rating,
+            )
+            films.setdefault(movie.title_key, []).append((movie, canonical))
+        canonical_by_movie[movie.id] = canonical
+
+    details = list(MovieAdminDetails.objects.using(db_alias).only('id', 'movie_id'))
+    for detail in details:
+        detail.canonical_movie = canonical_by_movie[detail.movie_id]
+    MovieAdminDetails.objects.using(db_alias).bulk_update(details, ['canonical_movie'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0016_canonical_movie'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_canonical_movies, migrations.RunPython.noop),
+    ]
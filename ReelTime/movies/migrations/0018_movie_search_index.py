@@ -0,0 +1,25 @@
+# Generated manually: the search index is raw SQL per backend (see movies/search.py)
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from movies.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from movies.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    """Full-text search index over movies (see movies/search.py)."""
+
+    dependencies = [
+        ('movies', '0017_backfill_canonical_movies'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
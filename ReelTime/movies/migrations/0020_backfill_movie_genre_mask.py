@@ -0,0 +1,38 @@
+# Generated manually to fill Movie.genre_mask for existing movies
+
+from django.db import migrations
+
+# Genre order as of this migration; a genre's position is its bit
+GENRES = (
+    'action', 'adventure', 'animation', 'comedy', 'crime', 'documentary', 'drama', 'fantasy',
+    'horror', 'musical', 'mystery', 'romance', 'sci-fi', 'thriller', 'war', 'western',
+)
+
+
+def genre_mask(genres):
+    mask = 0
+    for genre in genres or []:
+        if genre in GENRES:
+            mask |= 1 << GENRES.index(genre)
+    return mask
+
+
+def backfill_genre_mask(apps, schema_editor):
+    Movie = apps.get_model('movies', 'Movie')
+    db_alias = schema_editor.connection.alias
+
+    movies = list(Movie.objects.using(db_alias).only('id', 'genre'))
+    for movie in movies:
+        movie.genre_mask = genre_mask(movie.genre)
+    Movie.objects.using(db_alias).bulk_update(movies, ['genre_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0019_movie_genre_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_genre_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated manually to link details that still have no canonical film
+# (rows saved through bulk_create/update() skip MovieAdminDetails.save)
+
+from django.db import migrations
+
+DURATION_TOLERANCE = 15
+
+
+def normalize(value):
+    return ' '.join(str(value or '').split()).lower()
+
+
+def same_film(a, b):
+    if a.title_key != b.title_key:
+        return False
+    if normalize(a.director) and normalize(b.director) and normalize(a.director) != normalize(b.director):
+        return False
+    if a.duration_minutes and b.duration_minutes:
+        return abs(a.duration_minutes - b.duration_minutes) <= DURATION_TOLERANCE
+    return True
+
+
+def backfill_missing_canonical_movies(apps, schema_editor):
+    CanonicalMovie = apps.get_model('movies', 'CanonicalMovie')
+    MovieAdminDetails = apps.get_model('movies', 'MovieAdminDetails')
+    db_alias = schema_editor.connection.alias
+
+    details = list(
+        MovieAdminDetails.objects.using(db_alias)
+        .filter(canonical_movie__isnull=True)
+        .select_related('movie')
+        .order_by('id')
+    )
+    canonical_by_movie = {}
+    for detail in details:
+        movie = detail.movie
+        if movie.id not in canonical_by_movie:
+            candidates = CanonicalMovie.objects.using(db_alias).filter(title_key=movie.title_key).order_by('id')
+            canonical = next((candidate for candidate in candidates if same_film(candidate, movie)), None)
+            if canonical is None:
+                canonical = CanonicalMovie.objects.using(db_alias).create(
+                    title=' '.join(movie.title.split()),
+                    title_key=movie.title_key,
+                    description=movie.description,
+                    genre=movie.genre or [],
+                    director=movie.director,
+                    duration_minutes=movie.duration_minutes,
+                    rating=movie.rating,
+                )
+            canonical_by_movie[movie.id] = canonical
+        detail.canonical_movie = canonical_by_movie[movie.id]
+    MovieAdminDetails.objects.using(db_alias).bulk_update(details, ['canonical_movie'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0020_backfill_movie_genre_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_missing_canonical_movies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0021_backfill_missing_canonical_movies'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movieadmindetails',
+            name='canonical_movie',
+            field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.PROTECT, related_name='admin_details', to='movies.canonicalmovie'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0022_canonical_movie_required'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movie',
+            name='movie_rating_genre_idx',
+        ),
+    ]
@@ -1,34 +1,110 @@
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from halls.models import Hall
-from cloudinary.models import CloudinaryField
+from reel_time.fields import ResilientCloudinaryField
+
+# Accepted spellings of a showtime, e.g. "1:30 PM" or "13:30"
+SHOWTIME_FORMATS = ('%I:%M %p', '%H:%M', '%H:%M:%S')
 
 def get_tomorrow():
     return date.today() + timedelta(days=1)
 
 
+def parse_showtime(value):
+    """Return a showtime string as a ``datetime.time``, or None if it can't be parsed."""
+    value = str(value or '').strip().upper()
+    for fmt in SHOWTIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def title_key(title):
+    """Return the key that identifies a film across cinemas: lowercased, whitespace collapsed."""
+    return ' '.join(str(title or '').split()).lower()
+
+
+# Copies of one film may disagree on runtime by this much (trailers, rounding)
+DURATION_TOLERANCE = 15
+
+
+def same_film(a, b):
+    """
+    Return True if movies (or canonical movies) ``a`` and ``b`` are the same film.
+
+    Titles must share a ``title_key``; directors and runtimes only tell films
+    apart when both sides have them, so sparse entries join a richer one.
+    """
+    if a.title_key != b.title_key:
+        return False
+    director_a, director_b = title_key(a.director), title_key(b.director)
+    if director_a and director_b and director_a != director_b:
+        return False
+    if a.duration_minutes and b.duration_minutes:
+        return abs(a.duration_minutes - b.duration_minutes) <= DURATION_TOLERANCE
+    return True
+
+
+def normalize_showing_times(showing_times):
+    """
+    Return ``showing_times`` with each entry's minutes-of-day filled in.
+
+    Entries are ``{"time": "1:30 PM", "max_seats": 80, "minutes": 810}``;
+    showtimes that can't be parsed keep ``minutes`` as None.
+    """
+    normalized = []
+    for s in showing_times or []:
+        if isinstance(s, dict):
+            entry = dict(s)
+            showtime = parse_showtime(entry.get("time"))
+            entry["minutes"] = showtime.hour * 60 + showtime.minute if showtime else None
+            normalized.append(entry)
+        else:
+            normalized.append(s)
+    return normalized
+
+
+# Append new genres at the end: each genre's position is its bit in Movie.genre_mask
+GENRE_CHOICES = [
+    ('action', 'Action'),
+    ('adventure', 'Adventure'),
+    ('animation', 'Animation'),
+    ('comedy', 'Comedy'),
+    ('crime', 'Crime'),
+    ('documentary', 'Documentary'),
+    ('drama', 'Drama'),
+    ('fantasy', 'Fantasy'),
+    ('horror', 'Horror'),
+    ('musical', 'Musical'),
+    ('mystery', 'Mystery'),
+    ('romance', 'Romance'),
+    ('sci-fi', 'Sci-Fi'),
+    ('thriller', 'Thriller'),
+    ('war', 'War'),
+    ('western', 'Western'),
+]
+
+GENRE_LABELS = dict(GENRE_CHOICES)
+
+# One bit per genre (16 genres fit in an int)
+GENRE_BITS = {value: 1 << i for i, (value, _) in enumerate(GENRE_CHOICES)}
+
+
+def genre_mask(genres):
+    """Return the ``Movie.genre_mask`` bits for a list of genre values (unknown values are ignored)."""
+    mask = 0
+    for genre in genres or []:
+        mask |= GENRE_BITS.get(genre, 0)
+    return mask
+
+
 class Movie(models.Model):
-    GENRE_CHOICES = [
-        ('action', 'Action'),
-        ('adventure', 'Adventure'),
-        ('animation', 'Animation'),
-        ('comedy', 'Comedy'),
-        ('crime', 'Crime'),
-        ('documentary', 'Documentary'),
-        ('drama', 'Drama'),
-        ('fantasy', 'Fantasy'),
-        ('horror', 'Horror'),
-        ('musical', 'Musical'),
-        ('mystery', 'Mystery'),
-        ('romance', 'Romance'),
-        ('sci-fi', 'Sci-Fi'),
-        ('thriller', 'Thriller'),
-        ('war', 'War'),
-        ('western', 'Western'),
-    ]
-    
+    GENRE_CHOICES = GENRE_CHOICES
+
     RATING_CHOICES = [
         ('G', 'G - General Audiences'),
         ('PG', 'PG - Parental Guidance'),
@@ -36,27 +112,85 @@ class Movie(models.Model):
     ]
     
     title = models.CharField(max_length=255)
+    # Normalized title (see title_key()) so same-titled movies match through an index
+    title_key = models.CharField(max_length=255, db_index=True, editable=False, blank=True)
     description = models.TextField()
 
     # Optional attributes
     genre = models.JSONField(default=list, blank=True)  # Store multiple genres as a list
+    # Bits of GENRE_BITS for ``genre`` (see genre_mask()), so genre filters are integer tests in SQL
+    genre_mask = models.PositiveIntegerField(default=0, editable=False)
     director = models.CharField(max_length=255, blank=True)
     duration_minutes = models.PositiveIntegerField(blank=True, null=True)
     rating = models.CharField(max_length=10, choices=RATING_CHOICES, blank=True)  # PG or SPG
-    
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.title_key = title_key(self.title)
+        self.genre_mask = genre_mask(self.genre)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'title': 'title_key', 'genre': 'genre_mask'}
+            kwargs['update_fields'] = set(update_fields) | {
+                derived[field] for field in update_fields if field in derived
+            }
+        super().save(*args, **kwargs)
     
     def get_genres_display(self):
         """Return comma-separated genre display names."""
         if not self.genre:
             return ""
-        genre_dict = dict(self.GENRE_CHOICES)
-        return ", ".join([genre_dict.get(g, g.title()) for g in self.genre])
+        return ", ".join([GENRE_LABELS.get(g, g.title()) for g in self.genre])
     
 
+class CanonicalMovie(models.Model):
+    """
+    One film, shared by every cinema's ``Movie`` copy of it.
+
+    Each ``MovieAdminDetails`` points at its film here, so cross-cinema
+    lookups join on this id. ``python manage.py merge_movies`` clusters
+    existing movies into canonical films and refreshes their metadata.
+    """
+    title = models.CharField(max_length=255)
+    title_key = models.CharField(max_length=255, db_index=True)
+    description = models.TextField(blank=True)
+    genre = models.JSONField(default=list, blank=True)
+    director = models.CharField(max_length=255, blank=True)
+    duration_minutes = models.PositiveIntegerField(blank=True, null=True)
+    rating = models.CharField(max_length=10, choices=Movie.RATING_CHOICES, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title
+
+    def matches(self, movie):
+        """Return True if ``movie`` is a copy of this film (see ``same_film``)."""
+        return same_film(self, movie)
+
+    @classmethod
+    def for_movie(cls, movie):
+        """Return the canonical film for ``movie``, creating it if there is none yet."""
+        for canonical in cls.objects.filter(title_key=movie.title_key).order_by('id'):
+            if canonical.matches(movie):
+                return canonical
+        return cls.objects.create(
+            title=' '.join(movie.title.split()),
+            title_key=movie.title_key,
+            description=movie.description,
+            genre=list(movie.genre or []),
+            director=movie.director,
+            duration_minutes=movie.duration_minutes,
+            rating=movie.rating,
+        )
+
+
 class MovieAdminDetails(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='admin_details')
+    canonical_movie = models.ForeignKey(
+        CanonicalMovie, on_delete=models.PROTECT, blank=True, related_name='admin_details'
+    )
     admin = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     hall = models.ForeignKey(Hall, on_delete=models.PROTECT, null=True)
     
@@ -67,7 +201,7 @@ class MovieAdminDetails(models.Model):
 
     showing_times = models.JSONField(default=list, blank=True)
 
-    poster = CloudinaryField(
+    poster = ResilientCloudinaryField(
         'poster', 
         folder='movies/posters/', 
         blank=True, 
@@ -83,6 +217,10 @@ class MovieAdminDetails(models.Model):
 
     class Meta:
         unique_together = ('movie', 'admin', 'release_date', 'end_date')
+        indexes = [
+            models.Index(fields=['end_date'], name='detail_end_date_idx'),
+            models.Index(fields=['admin', 'end_date'], name='detail_admin_end_date_idx'),
+        ]
 
     @property
     def is_now_showing(self):
@@ -132,22 +270,76 @@ class MovieAdminDetails(models.Model):
                     return None
         return None
     
-    def get_remaining_seats(self, showtime):
-        """Return the remaining number of seats for the given showtime."""
-        from reservations.models import Reservation
+    def save(self, *args, **kwargs):
+        self.showing_times = normalize_showing_times(self.showing_times)
+        if self.canonical_movie_id is None and self.movie_id is not None:
+            self.canonical_movie = CanonicalMovie.for_movie(self.movie)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'canonical_movie'}
+        super().save(*args, **kwargs)
 
-        showtime_info = next((s for s in self.showing_times if s["time"] == showtime), None)
-        if not showtime_info:
-            return 0
+    def get_showtime_capacity(self, showtime):
+        """Return the seat capacity configured for the given showtime."""
+        for s in self.showing_times or []:
+            if isinstance(s, dict) and s.get("time") == showtime:
+                return s.get("max_seats", 0)
+            if s == showtime:
+                return self.hall.capacity if self.hall else 0
+        return 0
 
-        total = showtime_info.get("max_seats", 0)
+    def get_remaining_seats(self, showtime, selected_date=None):
+        """Return the remaining number of seats for the given showtime and date."""
+        if selected_date is None:
+            selected_date = timezone.localdate()
 
-        reserved = Reservation.objects.filter(
+        counters = Screening.objects.filter(
             movie_detail=self,
-            selected_showtime=showtime
-        ).aggregate(total_reserved=models.Sum('number_of_seats'))['total_reserved'] or 0
+            date=selected_date,
+            showtime=showtime,
+        ).values_list('capacity', 'seats_reserved').first()
+
+        if counters is None:
+            return self.get_showtime_capacity(showtime)
+
+        capacity, reserved = counters
+        return capacity - reserved
+
+    def __str__(self):
+        return f"{self.admin.username}'s details for {self.movie.title}"
+
 
-        return total - reserved
+class Screening(models.Model):
+    """
+    Materialized seat counters for one showing of a movie on one date.
+
+    ``seats_reserved`` is kept in step with active reservations by the
+    reservation create/edit/cancel paths using ``F()`` updates, and
+    ``version`` is bumped on every change. ``occupancy`` mirrors the taken
+    seats as a bitset that is flipped in place on booking and cancellation.
+    """
+    movie_detail = models.ForeignKey(MovieAdminDetails, on_delete=models.CASCADE, related_name='screenings')
+    date = models.DateField()
+    showtime = models.CharField(max_length=50)
+    capacity = models.PositiveIntegerField(default=0)
+    seats_reserved = models.IntegerField(default=0)
+    version = models.PositiveIntegerField(default=0)
+
+    # Packed seat bitset (bit row * width + col) and the layout it was built for
+    occupancy = models.BinaryField(default=b'', blank=True)
+    occupancy_layout = models.CharField(max_length=12, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['movie_detail', 'date', 'showtime'],
+                name='unique_screening_per_showtime',
+            ),
+        ]
+
+    @property
+    def remaining_seats(self):
+        return self.capacity - self.seats_reserved
 
     def __str__(self):
-        return f"{self.admin.username}'s details for {self.movie.title}"
\ No newline at end of file
+        return f"{self.movie_detail.movie.title} ({self.date} {self.showtime})"
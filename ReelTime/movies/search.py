@@ -0,0 +1,297 @@
+# movies/search.py
+"""
+Full-text movie search over title, description, director and genres.
+
+The index lives in the database and is kept current by triggers, so every
+way of writing a ``Movie`` (forms, ``bulk_create``, raw SQL) stays
+searchable:
+
+- PostgreSQL: a stored ``movies_movie.search_vector`` tsvector (title
+  weighted highest, then director and genres, then description) with a GIN
+  index, ranked with ``ts_rank``.
+- SQLite: an FTS5 shadow table ``movies_movie_fts`` over ``movies_movie``,
+  ranked with ``bm25``. Words aren't stemmed (a stemming tokenizer would
+  also stem autocomplete prefixes, so "goy" would no longer find "Goyo").
+- Other backends fall back to ``icontains`` matching without ranking.
+
+The index is created by migration ``0018_movie_search_index``. SQLite drops
+triggers whenever a migration rebuilds ``movies_movie``, so
+``ensure_search_index`` re-installs them after every ``migrate``.
+"""
+import re
+from django.db import connection as default_connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from .models import Movie
+
+# Query words beyond this are ignored
+MAX_SEARCH_TERMS = 8
+
+# Autocomplete suggestions returned per request
+SUGGESTION_LIMIT = 8
+
+# Bind parameters per "IN (...)" chunk (SQLite allows 999 per statement)
+ID_CHUNK_SIZE = 500
+
+SEARCH_MIGRATION = ('movies', '0018_movie_search_index')
+
+FTS_TABLE = 'movies_movie_fts'
+# bm25 column weights: title, description, director, genre
+FTS_WEIGHTS = '10.0, 1.0, 4.0, 4.0'
+
+SQLITE_TRIGGERS = ('movies_movie_fts_insert', 'movies_movie_fts_delete', 'movies_movie_fts_update')
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, director, genre,
+        content='movies_movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_insert AFTER INSERT ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, director, genre)
+        VALUES (new.id, new.title, new.description, new.director, new.genre);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_delete AFTER DELETE ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, director, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.director, old.genre);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_movie_fts_update
+    AFTER UPDATE OF title, description, director, genre ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, director, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.director, old.genre);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, director, genre)
+        VALUES (new.id, new.title, new.description, new.director, new.genre);
+    END
+    """,
+    # Re-index existing rows from movies_movie
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    *(f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS),
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Weighted document for one movies_movie row; {row} is "NEW." in the trigger
+POSTGRES_VECTOR = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce({row}director, '')), 'B')
+    || setweight(to_tsvector('english', coalesce({row}genre::text, '')), 'B')
+    || setweight(to_tsvector('english', coalesce({row}description, '')), 'C')
+"""
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE movies_movie ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION movies_movie_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRES_VECTOR.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS movies_movie_search_vector ON movies_movie",
+    """
+    CREATE TRIGGER movies_movie_search_vector
+    BEFORE INSERT OR UPDATE OF title, description, director, genre ON movies_movie
+    FOR EACH ROW EXECUTE PROCEDURE movies_movie_search_vector()
+    """,
+    f"UPDATE movies_movie SET search_vector = {POSTGRES_VECTOR.format(row='')}",
+    "CREATE INDEX IF NOT EXISTS movies_movie_search_idx ON movies_movie USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS movies_movie_search_vector ON movies_movie",
+    "DROP FUNCTION IF EXISTS movies_movie_search_vector()",
+    "DROP INDEX IF EXISTS movies_movie_search_idx",
+    "ALTER TABLE movies_movie DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def install_search_index(connection):
+    """Create (or re-create) the search index and its triggers, then index every movie."""
+    statements = {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def uninstall_search_index(connection):
+    statements = {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def search_index_installed(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE (type = 'table' AND name = %s)"
+                f" OR (type = 'trigger' AND name IN ({', '.join(['%s'] * len(SQLITE_TRIGGERS))}))",
+                [FTS_TABLE, *SQLITE_TRIGGERS],
+            )
+            return cursor.fetchone()[0] == len(SQLITE_TRIGGERS) + 1
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT count(*) FROM pg_trigger WHERE tgname = 'movies_movie_search_vector'"
+                " AND tgrelid = 'movies_movie'::regclass"
+            )
+            return cursor.fetchone()[0] == 1
+    return True
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """post_migrate receiver: re-install the index if a migration dropped it."""
+    connection = connections[using]
+    if (SEARCH_MIGRATION not in MigrationRecorder(connection).applied_migrations()
+            or search_index_installed(connection)):
+        return  # Not installed yet (or migrated back past it), or intact
+    # Quiet at verbosity 0, e.g. while the test runner creates its database
+    if kwargs.get('verbosity', 1) >= 1:
+        print("🟡 Movie search index missing, rebuilding")
+    install_search_index(connection)
+
+
+def search_terms(text):
+    """Return the lowercased words of ``text`` (punctuation and operators dropped)."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def match_expression(vendor, terms, prefix=False):
+    """
+    Return the backend's query string matching every term.
+
+    Prefix queries (autocomplete) match the last term as a prefix and only
+    look at titles, which keeps short prefixes from matching most descriptions.
+    """
+    if vendor == 'postgresql':
+        if prefix:
+            # Weight A is the title (see POSTGRES_VECTOR)
+            return ' & '.join([f'{term}:A' for term in terms[:-1]] + [f'{terms[-1]}:*A'])
+        return ' & '.join(terms)
+    # Quoted FTS5 strings, so words like "and"/"not" aren't read as operators
+    words = [f'"{term}"' for term in terms]
+    if prefix:
+        words[-1] += '*'
+        return f"title : ({' '.join(words)})"
+    return ' '.join(words)
+
+
+def search_sql(vendor, terms, prefix=False, among=None, limit=None):
+    """
+    Return ``(sql, params)`` selecting ``(movie id, rank)`` best match first.
+
+    ``among`` restricts the search to those movie ids.
+    """
+    params = [match_expression(vendor, terms, prefix)]
+    if vendor == 'postgresql':
+        sql = (
+            "SELECT id, ts_rank(search_vector, query) AS rank"
+            " FROM movies_movie, to_tsquery('english', %s) query"
+            " WHERE search_vector @@ query"
+        )
+        if among is not None:
+            sql += " AND id = ANY(%s)"
+            params.append(list(among))
+        sql += " ORDER BY rank DESC, id"
+    else:
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, {FTS_WEIGHTS}) AS rank"
+            f" FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        )
+        if among is not None:
+            sql += f" AND rowid IN ({', '.join(['%s'] * len(among))})"
+            params.extend(among)
+        sql += " ORDER BY rank, rowid"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def icontains_search(terms, among=None, limit=None):
+    """Unranked fallback for backends without a full-text index."""
+    movies = Movie.objects.all()
+    for term in terms:
+        movies = movies.filter(
+            Q(title__icontains=term) | Q(description__icontains=term)
+            | Q(director__icontains=term) | Q(genre__icontains=term)
+        )
+    if among is not None:
+        movies = movies.filter(id__in=among)
+    ids = movies.order_by('id').values_list('id', flat=True)
+    return list(ids[:limit] if limit is not None else ids)
+
+
+def search_movie_ids(text, prefix=False, among=None, limit=None, connection=default_connection):
+    """
+    Return ids of movies matching every word of ``text``, best match first.
+
+    With ``prefix`` the last word also matches longer words (for
+    autocomplete). ``among`` restricts the search to those movie ids.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return icontains_search(terms, among, limit)
+
+    if among is not None and connection.vendor == 'sqlite' and len(among) > ID_CHUNK_SIZE:
+        # Rank each chunk, then merge
+        among = list(among)
+        ranked = []
+        for start in range(0, len(among), ID_CHUNK_SIZE):
+            sql, params = search_sql('sqlite', terms, prefix, among[start:start + ID_CHUNK_SIZE], limit)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                ranked.extend(cursor.fetchall())
+        ranked.sort(key=lambda row: (row[1], row[0]))
+        return [movie_id for movie_id, _ in ranked[:limit]]
+
+    sql, params = search_sql(connection.vendor, terms, prefix, among, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [movie_id for movie_id, _ in cursor.fetchall()]
+
+
+def search_catalog(movies, text, prefix=False, limit=None):
+    """
+    Return the listing dicts in ``movies`` whose movie matches ``text``, best match first.
+
+    ``movies`` is a catalog from ``movies.catalog``, so searching adds one
+    indexed query on top of the (usually cached) catalog.
+    """
+    by_movie = {}
+    for entry in movies:
+        by_movie.setdefault(entry['detail'].movie_id, []).append(entry)
+    if not by_movie:
+        return []
+    ids = search_movie_ids(text, prefix=prefix, among=list(by_movie), limit=limit)
+    return [entry for movie_id in ids for entry in by_movie[movie_id]][:limit]
+
+
+def matching_movies_sql(text, connection=default_connection):
+    """
+    Return ``(sql, params)`` selecting the ids of movies matching ``text``, for ``id__in``
+    subqueries, or None when ``text`` has no words or the backend has no full-text index.
+    """
+    terms = search_terms(text)
+    if not terms or connection.vendor not in ('postgresql', 'sqlite'):
+        return None
+    if connection.vendor == 'postgresql':
+        return (
+            "SELECT id FROM movies_movie WHERE search_vector @@ to_tsquery('english', %s)",
+            [match_expression('postgresql', terms)],
+        )
+    return (
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+        [match_expression('sqlite', terms)],
+    )
@@ -0,0 +1,13 @@
+# movies/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .catalog import bump_catalog_version
+from .models import Movie, MovieAdminDetails
+
+
+@receiver([post_save, post_delete], sender=Movie)
+@receiver([post_save, post_delete], sender=MovieAdminDetails)
+def invalidate_catalog(sender, using, **kwargs):
+    # After commit, so a request racing the write can't cache the old rows under the new version
+    transaction.on_commit(bump_catalog_version, using=using)
@@ -1,3 +1,222 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from accounts.models import User
+from halls.models import Hall
+from .availability import get_availability_calendar, showtimes_for
+from .canonical import cluster_movies, merge_movies
+from .catalog import catalog_version, now_showing_catalog, now_showing_facets, showings_of
+from .models import CanonicalMovie, Movie, MovieAdminDetails, Screening, parse_showtime
 
-# Create your tests here.
+
+class CatalogTestCase(TestCase):
+    """A cinema admin with a six-seat hall, for catalog and availability tests."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'cinema', 'cinema@example.com', 'password', is_admin=True, cinema_name='Cinema 1'
+        )
+        layout = [{"row": 0, "col": col, "type": "seat"} for col in range(6)]
+        cls.hall = Hall.objects.create(admin=cls.admin, name='Hall 1', capacity=6, layout=layout)
+
+    def show(self, title, admin=None, showing_times=None, **kwargs):
+        """Create ``title`` (if new) and a showing of it for ``admin``."""
+        movie = kwargs.pop('movie', None) or Movie.objects.create(title=title, description=f'About {title}')
+        admin = admin or self.admin
+        return MovieAdminDetails.objects.create(
+            movie=movie,
+            admin=admin,
+            hall=kwargs.pop('hall', self.hall),
+            release_date=kwargs.pop('release_date', date.today()),
+            end_date=kwargs.pop('end_date', date.today() + timedelta(days=7)),
+            price=250,
+            showing_times=showing_times or [{"time": "7:30 PM", "max_seats": 6}],
+            **kwargs,
+        )
+
+
+class ShowtimeParsingTests(SimpleTestCase):
+    def test_accepted_spellings(self):
+        for value, expected in (
+            ('7:30 PM', time(19, 30)),
+            (' 7:30 pm ', time(19, 30)),
+            ('07:30 AM', time(7, 30)),
+            ('12:00 AM', time(0, 0)),
+            ('12:15 PM', time(12, 15)),
+            ('19:30', time(19, 30)),
+            ('19:30:45', time(19, 30, 45)),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(parse_showtime(value), expected)
+
+    def test_garbage_is_none(self):
+        for value in ('', None, 'soon', '25:00', '7:30 XM', '7.30 PM', '13:00 PM'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_showtime(value))
+
+
+class AvailabilityTests(CatalogTestCase):
+    def test_legacy_showtimes_seat_the_whole_hall(self):
+        detail = self.show('Oro', showing_times=['1:00 PM', {"time": "4:00 PM", "max_seats": 4}])
+        self.assertEqual(showtimes_for(detail), [('1:00 PM', 6), ('4:00 PM', 4)])
+        self.assertEqual(detail.get_showtime_capacity('1:00 PM'), 6)
+
+    def test_calendar_and_counters_agree_on_sold_out(self):
+        detail = self.show('Oro', showing_times=['1:00 PM'], end_date=date.today() + timedelta(days=1))
+        tomorrow = date.today() + timedelta(days=1)
+        Screening.objects.create(
+            movie_detail=detail, date=tomorrow, showtime='1:00 PM', capacity=6, seats_reserved=6
+        )
+
+        calendar = get_availability_calendar([detail])[detail.id]
+
+        self.assertEqual(calendar['dates'][tomorrow.isoformat()], {'1:00 PM': 0})
+        self.assertEqual(calendar['sold_out_dates'], [tomorrow.isoformat()])
+        self.assertEqual(detail.get_remaining_seats('1:00 PM', tomorrow), 0)
+        self.assertEqual(calendar['dates'][date.today().isoformat()], {'1:00 PM': 6})
+
+
+class CatalogCacheTests(CatalogTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def titles(self):
+        return [entry['detail'].movie.title for entry in now_showing_catalog()]
+
+    def test_catalog_is_served_from_the_cache(self):
+        self.show('Oro')
+        self.assertEqual(self.titles(), ['Oro'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(), ['Oro'])
+            now_showing_facets()
+
+    def test_saving_a_movie_bumps_the_version_and_rebuilds(self):
+        detail = self.show('Oro')
+        self.titles()
+        version = catalog_version()
+
+        detail.movie.title = 'Oro Plata Mata'
+        with self.captureOnCommitCallbacks(execute=True):
+            detail.movie.save()
+
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(self.titles(), ['Oro Plata Mata'])
+
+    def test_saving_or_deleting_a_showing_rebuilds(self):
+        self.show('Oro')
+        self.titles()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            detail = self.show('Himala')
+        self.assertEqual(sorted(self.titles()), ['Himala', 'Oro'])
+
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            detail.delete()
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(self.titles(), ['Oro'])
+
+    def test_version_only_changes_once_the_write_commits(self):
+        detail = self.show('Oro')
+        self.titles()
+        version = catalog_version()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            detail.movie.title = 'Oro Plata Mata'
+            detail.movie.save()
+            # A request racing the open transaction still caches under the old version
+            self.assertEqual(catalog_version(), version)
+            self.assertEqual(self.titles(), ['Oro'])
+
+        self.assertEqual(catalog_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(self.titles(), ['Oro Plata Mata'])
+
+
+class CanonicalMovieTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admins = [
+            User.objects.create_user(
+                f'cinema{n}', f'cinema{n}@example.com', 'password', is_admin=True, cinema_name=f'Cinema {n}'
+            )
+            for n in (2, 3)
+        ]
+
+    def copies(self, title='Himala', count=3):
+        """Give each admin their own copy of ``title``; return the showing details."""
+        return [
+            self.show(title, admin=admin, director='Ishmael Bernal', duration_minutes=124)
+            for admin in [self.admin, *self.admins][:count]
+        ]
+
+    def show(self, title, admin=None, showing_times=None, director='', duration_minutes=None, **kwargs):
+        if 'movie' not in kwargs:
+            kwargs['movie'] = Movie.objects.create(
+                title=title, description=f'About {title}', director=director, duration_minutes=duration_minutes
+            )
+        return super().show(title, admin, showing_times, **kwargs)
+
+    def stray(self, detail):
+        """Point ``detail`` at a fresh canonical film the way a bulk write would."""
+        canonical = CanonicalMovie.objects.create(title=detail.movie.title, title_key=detail.movie.title_key)
+        MovieAdminDetails.objects.filter(id=detail.id).update(canonical_movie=canonical)
+        return canonical
+
+    def test_cluster_movies_splits_on_director_and_runtime(self):
+        bernal = Movie.objects.create(title='Himala', director='Ishmael Bernal', duration_minutes=124)
+        sparse = Movie.objects.create(title='  HIMALA ', duration_minutes=120)
+        remake = Movie.objects.create(title='Himala', director='Someone Else')
+        short = Movie.objects.create(title='Himala', duration_minutes=20)
+        other = Movie.objects.create(title='Oro')
+
+        clusters = cluster_movies([other, short, remake, sparse, bernal])
+
+        self.assertEqual(clusters, [[bernal, sparse], [remake, short], [other]])
+
+    def test_copies_share_one_film_in_the_catalog(self):
+        details = self.copies()
+        self.show('Oro')
+
+        self.assertEqual(len({detail.canonical_movie_id for detail in details}), 1)
+        self.assertEqual(set(showings_of(details[1].movie)), set(details))
+        titles = sorted(entry['detail'].movie.title for entry in now_showing_catalog())
+        self.assertEqual(titles, ['Himala', 'Oro'])
+
+    def test_merge_relinks_strays_and_keeps_canonical_ids(self):
+        details = self.copies()
+        canonical_id = details[0].canonical_movie_id
+        stray = self.stray(details[2])
+
+        stats = merge_movies()
+
+        self.assertEqual((stats['created'], stats['relinked'], stats['removed']), (0, 1, 1))
+        self.assertFalse(CanonicalMovie.objects.filter(id=stray.id).exists())
+        self.assertEqual(
+            set(MovieAdminDetails.objects.values_list('canonical_movie_id', flat=True)), {canonical_id}
+        )
+
+        stats = merge_movies()
+        self.assertEqual((stats['created'], stats['relinked'], stats['removed']), (0, 0, 0))
+        self.assertEqual(list(CanonicalMovie.objects.values_list('id', flat=True)), [canonical_id])
+
+    def test_dry_run_reports_without_writing(self):
+        details = self.copies()
+        stray = self.stray(details[2])
+        version = catalog_version()
+        out = StringIO()
+
+        call_command('merge_movies', '--dry-run', stdout=out)
+
+        self.assertIn('Would merge', out.getvalue())
+        self.assertIn('1 showings relinked', out.getvalue())
+        details[2].refresh_from_db()
+        self.assertEqual(details[2].canonical_movie_id, stray.id)
+        self.assertEqual(catalog_version(), version)
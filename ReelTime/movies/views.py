@@ -1,7 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from .forms import MovieForm
-from .models import Movie, MovieAdminDetails
+from .models import Movie, MovieAdminDetails, Screening
+from .catalog import (
+    admin_catalog, admin_facets, catalog_filters, catalog_json, filter_catalog, now_showing_catalog,
+    now_showing_facets, paginate_catalog, showings_of,
+)
+from .search import SUGGESTION_LIMIT, search_catalog
+from .availability import get_availability_calendar, get_availability_matrix, showtimes_for
 from reservations.models import Reservation
+from reservations.inventory import SeatUnavailableError, get_occupancy, normalize_seats, reserved_seats_for
+from reservations.holds import get_hold_store, screening_key
+from halls.utils import build_occupancy, encode_occupancy, get_layout_info
+from reel_time.fields import UploadUnavailable
+from django.conf import settings
+from django.db import transaction
+from django.views.decorators.http import require_POST
 from accounts.decorators import admin_required
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -9,15 +22,25 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import MovieAdminDetailsForm
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
 import json
 
+POSTER_UPLOAD_UNAVAILABLE = "Poster upload is temporarily unavailable. Please try again in a few minutes."
+
 @admin_required
 def add_movie(request):
     if request.method == 'POST':
         form = MovieForm(request.POST, request.FILES, admin=request.user)
         if form.is_valid():
-            form.save()
-            return redirect('admin_dashboard')  # Redirect back to admin home
+            try:
+                # Roll back the movie if its poster can't be uploaded
+                with transaction.atomic():
+                    form.save()
+            except UploadUnavailable:
+                messages.error(request, POSTER_UPLOAD_UNAVAILABLE)
+            else:
+                return redirect('admin_dashboard')  # Redirect back to admin home
     else:
         form = MovieForm(admin=request.user)
 
@@ -52,10 +75,15 @@ def edit_movie_view(request, pk):
                 detail.save()
 
         if movie_form.is_valid() and detail_form.is_valid():
-            movie_form.save()
-            detail_form.save()
-            messages.success(request, "Movie details updated successfully!")
-            return redirect('movie_detail', pk=pk)
+            try:
+                with transaction.atomic():
+                    movie_form.save()
+                    detail_form.save()
+            except UploadUnavailable:
+                messages.error(request, POSTER_UPLOAD_UNAVAILABLE)
+            else:
+                messages.success(request, "Movie details updated successfully!")
+                return redirect('movie_detail', pk=pk)
         else:
             # Edited here: Added detailed error notifications
             if not movie_form.is_valid():
@@ -103,65 +131,67 @@ def movie_list_view(request):
 
     user = request.user
 
+    genres, ratings = catalog_filters(request.GET)
+
     # ✅ Filter: only show movies added by the current admin
     if user.is_authenticated and user.is_admin:
-        admin_details_qs = MovieAdminDetails.objects.select_related('movie').filter(admin=user)
-        movies_list = admin_details_qs
+        movies = admin_catalog(user, today, genres, ratings)
+        facets = admin_facets(user)
     else:
-        # 👥 Non-admin: only now showing and coming soon, get unique movies by title
-        admin_details_qs = MovieAdminDetails.objects.select_related('movie').filter(
-            end_date__gte=today  # excludes already ended movies
-        )
-        
-        # Get unique movie titles (case-insensitive)
-        seen_titles = set()
-        movies_list = []
-        for detail in admin_details_qs:
-            title_lower = detail.movie.title.lower().strip()
-            if title_lower not in seen_titles:
-                seen_titles.add(title_lower)
-                movies_list.append(detail)
-
-    movies = []
-
-    for detail in movies_list:
-        release_date = detail.release_date
-        end_date = detail.end_date
-        days_diff = (release_date - today).days
-
-        # Human-readable release label
-        if days_diff == 0:
-            release_label = "Today"
-        elif days_diff == 1:
-            release_label = "Tomorrow"
-        elif days_diff < 0 and detail.end_date < today:
-            release_label = "Ended"
-        else:
-            release_label = release_date.strftime("%B %d, %Y").replace(" 0", " ")
+        # 👥 Non-admin: only now showing and coming soon, one per title (cached, with facet counts)
+        movies = filter_catalog(now_showing_catalog(today), genres, ratings)
+        facets = now_showing_facets(today)
+
+    # 🔎 Full-text search within the listing, best match first
+    query = request.GET.get('q', '').strip()
+    if query:
+        movies = search_catalog(movies, query)
+
+    page = paginate_catalog(request, movies, ranked=bool(query))
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'results': [catalog_json(movie) for movie in page],
+            'facets': facets,
+            **page.cursors(),
+        })
 
-        # Handle showing_times list
-        if isinstance(detail.showing_times, (list, tuple)):
-            showing_times_display = ", ".join(
-                s['time'] for s in detail.showing_times if 'time' in s
-            )
-        else:
-            showing_times_display = str(detail.showing_times)
+    return render(request, 'movies/movie_list.html', {
+        'movies': page.object_list,
+        'page': page,
+        'query': query,
+        'facets': facets,
+        'selected_genres': genres,
+        'selected_ratings': ratings,
+    })
 
-        # ✅ Include end date (formatted)
-        end_date_label = end_date.strftime("%B %d, %Y").replace(" 0", " ") if end_date else "N/A"
 
-        movies.append({
-            'detail': detail,  # this is a MovieAdminDetails instance
-            'release_label': release_label,
-            'end_date': end_date_label,
-            'showing_times_display': showing_times_display,
-            'days_diff': days_diff,
-        })
+# Search autocomplete (JSON)
+def movie_search_suggest_view(request):
+    manila_tz = ZoneInfo("Asia/Manila")
+    today = datetime.now(manila_tz).date()
 
-    # Sort: Today (0) → Upcoming (>0) → Past (<0)
-    movies.sort(key=lambda x: (x['days_diff'] != 0, x['days_diff'] > 0, abs(x['days_diff'])))
+    user = request.user
+    if user.is_authenticated and user.is_admin:
+        movies = admin_catalog(user, today)
+    else:
+        movies = now_showing_catalog(today)
 
-    return render(request, 'movies/movie_list.html', {'movies': movies})
+    query = request.GET.get('q', '').strip()
+    matches = search_catalog(movies, query, prefix=True, limit=SUGGESTION_LIMIT) if query else []
+
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'id': movie['detail'].pk,
+                'title': movie['detail'].movie.title,
+                'release_label': movie['release_label'],
+                'url': reverse('movie_detail', args=[movie['detail'].pk]),
+            }
+            for movie in matches
+        ],
+    })
 
 
 @login_required
@@ -199,47 +229,30 @@ def reserve_movie_view(request, movie_id):
     """
     Show all cinemas that have movies with the same title
     """
-    from django.contrib.auth import get_user_model
-    from django.db.models import Sum
-
-    User = get_user_model()
-
     # Get the movie
     movie = get_object_or_404(Movie, id=movie_id)
     
-    # Get ALL movie details for movies with the same title (case-insensitive)
-    # This includes all cinemas showing a movie with this title
-    movie_details = MovieAdminDetails.objects.filter(
-        movie__title__iexact=movie.title
-    ).select_related('admin', 'movie').order_by('admin__cinema_name')
+    # Get ALL movie details for the same film (joined through its canonical movie)
+    # This includes all cinemas showing a copy of this movie
+    movie_details = showings_of(movie).select_related('admin', 'movie', 'hall').order_by('admin__cinema_name')
+
+    # Remaining seats for today's showings of every cinema in one query
+    today = timezone.localdate()
+    availability = get_availability_matrix(movie_details, today, today)
 
     # Prepare cinema data - only for cinemas that have the movie
     cinemas = []
     for movie_detail in movie_details:
         # Cinema has this movie - build showtimes with remaining seats
-        showtimes_data = []
-        for s in movie_detail.showing_times:  # this is already a Python list of dicts
-            # Expect each item to be a dict with 'time' and 'max_seats'
-            if isinstance(s, dict):
-                time = s.get("time")
-                max_seats = s.get("max_seats", 0)
-            else:
-                # If legacy string format, assume a default max_seats (e.g., 100)
-                time = s
-                max_seats = 100  # arbitrary fallback
-
-            # Calculate reserved seats
-            reserved = Reservation.objects.filter(
-                movie_detail=movie_detail,
-                selected_showtime=time
-            ).aggregate(total_reserved=Sum('number_of_seats'))['total_reserved'] or 0
-
-            remaining = max_seats - reserved
-            showtimes_data.append({
+        remaining_today = availability.get(movie_detail.id, {}).get(today, {})
+        showtimes_data = [
+            {
                 "time": time,
                 "max_seats": max_seats,
-                "remaining": remaining,
-            })
+                "remaining": remaining_today.get(time, max_seats),
+            }
+            for time, max_seats in showtimes_for(movie_detail)
+        ]
 
         # Get the poster URL safely
         poster_url = None
@@ -279,6 +292,20 @@ def reserve_movie_view(request, movie_id):
     return render(request, 'movies/reserve_movie.html', context)
 
 
+@login_required
+def movie_availability_view(request, movie_id):
+    """
+    Return remaining seats per cinema, date and showtime for the rest of a
+    movie's run, plus the dates that are completely sold out.
+    """
+    movie = get_object_or_404(Movie, id=movie_id)
+    movie_details = showings_of(movie).select_related('hall').filter(end_date__gte=timezone.localdate())
+
+    return JsonResponse({
+        "cinemas": get_availability_calendar(movie_details),
+    })
+
+
 @login_required
 def confirm_reservation_view(request, detail_id):
     """
@@ -303,39 +330,35 @@ def confirm_reservation_view(request, detail_id):
             messages.error(request, "Number of selected seats does not match your input.")
             return redirect('reserve_movie', movie_id=detail.movie.id)
 
-        # Check that seats are not already reserved
-        existing_reservations = Reservation.objects.filter(
-            movie_detail=detail,
-            selected_date=selected_date,
-            selected_showtime=selected_showtime,
-            status__in=['pending', 'confirmed']
-        ).values_list('selected_seats', flat=True)
-
-        already_reserved = []
-        for seats in existing_reservations:
-            if isinstance(seats, str):
-                seats = json.loads(seats)
-            already_reserved.extend(seats)
-
-        if any(seat in already_reserved for seat in selected_seats):
-            messages.error(request, "One or more of your selected seats have already been reserved.")
+        # Seats another shopper is holding at checkout are off limits
+        hold_key = screening_key(detail.id, selected_date, selected_showtime)
+        hold_store = get_hold_store()
+        if hold_store.held_seats(hold_key, exclude_owner=request.user.id) & set(selected_seats):
+            messages.error(request, "One or more of your selected seats are being held by another customer.")
             return redirect('reserve_movie', movie_id=detail.movie.id)
 
         # Calculate total cost
         total_cost = detail.price * number_of_seats
 
-        # Create the reservation
-        reservation = Reservation.objects.create(
-            user=request.user,
-            movie_detail=detail,
-            cinema_name=detail.admin.cinema_name,
-            selected_date=selected_date,
-            selected_showtime=selected_showtime,
-            number_of_seats=number_of_seats,
-            selected_seats=selected_seats,
-            total_cost=total_cost,  # Add total cost
-            status='confirmed',
-        )
+        # Create the reservation; the seat inventory insert fails on any
+        # seat that was taken in the meantime
+        try:
+            reservation = Reservation.objects.create(
+                user=request.user,
+                movie_detail=detail,
+                cinema_name=detail.admin.cinema_name,
+                selected_date=selected_date,
+                selected_showtime=selected_showtime,
+                number_of_seats=number_of_seats,
+                selected_seats=selected_seats,
+                total_cost=total_cost,  # Add total cost
+                status='confirmed',
+            )
+        except SeatUnavailableError:
+            messages.error(request, "One or more of your selected seats have already been reserved.")
+            return redirect('reserve_movie', movie_id=detail.movie.id)
+
+        hold_store.release(hold_key, request.user.id)
 
         messages.success(
             request,
@@ -351,38 +374,91 @@ def confirm_reservation_view(request, detail_id):
     return render(request, 'movies/confirm_reservation.html', context)
 
 
+def parse_showing_date(value):
+    """Return the ``YYYY-MM-DD`` date in ``value``, or None if it isn't one."""
+    try:
+        return datetime.strptime(value or '', '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
 @login_required
 def hall_seat_layout_view(request, detail_id, selected_date, selected_showtime):
     """
-    Return the seat layout and already reserved seats for a given movie detail, date, and showtime.
+    Return the seat occupancy bitset for a given movie detail, date, and showtime.
+
+    Seat ``row-col`` maps to bit ``row * width + col`` of the base64
+    ``occupancy`` bitset (least significant bit first); ``held`` uses the
+    same encoding for seats other shoppers are holding. The full layout is
+    only included when the client's ``layout_version`` is missing or stale.
     """
-    detail = get_object_or_404(MovieAdminDetails, id=detail_id)
+    detail = get_object_or_404(MovieAdminDetails.objects.select_related('hall'), id=detail_id)
+    selected_date = parse_showing_date(selected_date)
+    if selected_date is None:
+        return JsonResponse({"error": "Invalid date."}, status=400)
+
+    if not detail.hall:
+        return JsonResponse({"seat_map": [], "layout_version": "", "width": 0, "occupancy": ""})
 
-    # Hall layout: default to empty dict if not set
-    hall_layout = detail.hall.layout or {}
+    layout = get_layout_info(detail.hall)
 
-    # Get reserved seats for this showtime and date (exclude cancelled reservations)
-    reserved_qs = Reservation.objects.filter(
+    screening = Screening.objects.filter(
         movie_detail=detail,
-        selected_date=selected_date,
-        selected_showtime=selected_showtime,
-        status__in=['pending', 'confirmed']  # Only include active reservations
-    ).values_list('selected_seats', flat=True)
-
-    reserved_seats = []
-    for seats in reserved_qs:
-        if seats:
-            try:
-                if isinstance(seats, str):
-                    seat_list = json.loads(seats)
-                else:
-                    seat_list = seats
-                reserved_seats.extend(seat_list)
-            except (json.JSONDecodeError, TypeError):
-                # Handle case where selected_seats might be stored differently
-                continue
+        date=selected_date,
+        showtime=selected_showtime,
+    ).first()
+    occupancy = get_occupancy(screening, layout) if screening else b''
+
+    held = get_hold_store().held_seats(
+        screening_key(detail.id, selected_date, selected_showtime),
+        exclude_owner=request.user.id,
+    )
+
+    data = {
+        "layout_version": layout['version'],
+        "width": layout['cols'],
+        "occupancy": encode_occupancy(occupancy),
+        "held": encode_occupancy(build_occupancy(held, layout['rows'], layout['cols'])) if held else "",
+    }
+    if request.GET.get('layout_version') != layout['version']:
+        data["seat_map"] = layout['cells']
 
-    return JsonResponse({
-        "seat_map": hall_layout,
-        "reserved": reserved_seats,
-    })
\ No newline at end of file
+    return JsonResponse(data)
+
+
+@login_required
+@require_POST
+def hold_seats_view(request, detail_id):
+    """
+    Hold the user's current seat selection for a showtime during checkout.
+
+    Replaces any seats the user was holding for the same showtime. Responds
+    with 409 and the clashing seats if any are reserved or held by someone else.
+    """
+    detail = get_object_or_404(MovieAdminDetails, id=detail_id)
+    selected_date = request.POST.get('selected_date')
+    selected_showtime = request.POST.get('selected_showtime')
+    selected_seats = normalize_seats(request.POST.get('selected_seats', '[]'))
+
+    if not selected_date or not selected_showtime:
+        return JsonResponse({"error": "Date and showtime are required."}, status=400)
+    # Parsed so the hold key matches the one bookings release (e.g. 2025-1-5 -> 2025-01-05)
+    selected_date = parse_showing_date(selected_date)
+    if selected_date is None:
+        return JsonResponse({"error": "Invalid date."}, status=400)
+
+    reserved = set(reserved_seats_for(detail, selected_date, selected_showtime)) & set(selected_seats)
+    if reserved:
+        return JsonResponse({"conflicts": sorted(reserved)}, status=409)
+
+    ttl = settings.SEAT_HOLD_TTL
+    conflicts = get_hold_store().hold(
+        screening_key(detail.id, selected_date, selected_showtime),
+        selected_seats,
+        request.user.id,
+        ttl,
+    )
+    if conflicts:
+        return JsonResponse({"conflicts": sorted(conflicts)}, status=409)
+
+    return JsonResponse({"held": selected_seats, "expires_in": ttl})
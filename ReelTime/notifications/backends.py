@@ -0,0 +1,170 @@
+# notifications/backends.py
+"""
+Email transports selectable with the ``EMAIL_TRANSPORT`` setting.
+
+- ``SendGridTransport`` posts to the SendGrid v3 API (the default). Point
+  ``SENDGRID_API_URL`` at ``python manage.py run_sendgrid_stub`` to load
+  test against a slow or failing provider offline.
+- ``ConsoleTransport`` prints each email to stdout.
+- ``FileTransport`` writes each email to a file under ``EMAIL_FILE_PATH``.
+- ``MemoryTransport`` keeps emails in ``MemoryTransport.outbox`` for tests.
+
+A transport implements ``send`` for a single rendered email and
+``send_batch`` for one dynamic template sent to many recipients; both
+return True on success.
+"""
+import json
+import logging
+import sys
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+import requests
+from django.conf import settings
+from django.utils import timezone
+from reel_time.resilience import OutboundCallRejected
+from .transport import build_message, post_message
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTransport(ABC):
+    @abstractmethod
+    def send(self, to_email, subject, plain_text_content, html_content=None):
+        """Send one rendered email; return True on success."""
+
+    @abstractmethod
+    def send_batch(self, template_id, personalizations):
+        """Send ``template_id`` to each ``(to_email, data)`` pair; return True on success."""
+
+
+class SendGridTransport(BaseTransport):
+    def send(self, to_email, subject, plain_text_content, html_content=None):
+        """
+        Send email using SendGrid Web API
+        """
+        try:
+            # Check if SendGrid is configured
+            if not settings.SENDGRID_API_KEY:
+                print("🔴 SendGrid API key not configured")
+                logger.error("SendGrid API key not configured")
+                return False
+
+            response = post_message(build_message(to_email, subject, plain_text_content, html_content))
+
+            if response.status_code in [200, 202]:
+                print(f"🟢 SendGrid: Email sent successfully to {to_email}, Status: {response.status_code}")
+                return True
+            else:
+                print(f"🔴 SendGrid: Failed to send email, Status: {response.status_code}, Body: {response.text}")
+                logger.error(f"SendGrid API error: {response.status_code} - {response.text}")
+                return False
+
+        except OutboundCallRejected as e:
+            print(f"🔴 SendGrid: Not sent: {e}")
+            logger.warning(f"SendGrid call rejected: {e}")
+            return False
+        except requests.RequestException as e:
+            print(f"🔴 SendGrid: Request failed: {e}")
+            logger.error(f"SendGrid request failed: {e}")
+            return False
+
+    def send_batch(self, template_id, personalizations):
+        try:
+            if not settings.SENDGRID_API_KEY:
+                logger.error("SendGrid API key not configured")
+                return False
+
+            response = post_message({
+                'from': {'email': settings.SENDGRID_SENDER_EMAIL},
+                'template_id': template_id,
+                'personalizations': [
+                    {'to': [{'email': to_email}], 'dynamic_template_data': data}
+                    for to_email, data in personalizations
+                ],
+            })
+
+            if response.status_code in [200, 202]:
+                print(f"🟢 SendGrid: Batch of {len(personalizations)} emails accepted, Status: {response.status_code}")
+                return True
+            else:
+                print(f"🔴 SendGrid: Batch failed, Status: {response.status_code}, Body: {response.text}")
+                logger.error(f"SendGrid API error: {response.status_code} - {response.text}")
+                return False
+
+        except OutboundCallRejected as e:
+            print(f"🔴 SendGrid: Batch not sent: {e}")
+            logger.warning(f"SendGrid batch call rejected: {e}")
+            return False
+        except requests.RequestException as e:
+            print(f"🔴 SendGrid: Batch request failed: {e}")
+            logger.error(f"SendGrid batch request failed: {e}")
+            return False
+
+
+class RecordingTransport(BaseTransport):
+    """Turn each email into a message dict and ``record`` it instead of sending it."""
+
+    @abstractmethod
+    def record(self, message):
+        """Keep or write out one message dict."""
+
+    def send(self, to_email, subject, plain_text_content, html_content=None):
+        self.record({
+            'to': to_email,
+            'subject': subject,
+            'text': plain_text_content,
+            'html': html_content,
+        })
+        return True
+
+    def send_batch(self, template_id, personalizations):
+        for to_email, data in personalizations:
+            self.record({'to': to_email, 'template_id': template_id, 'data': data})
+        return True
+
+
+class MemoryTransport(RecordingTransport):
+    """Record emails in the class-level ``outbox`` list instead of sending them."""
+    outbox = []
+    _lock = threading.Lock()
+
+    def record(self, message):
+        with self._lock:
+            self.outbox.append(message)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls.outbox.clear()
+
+
+class ConsoleTransport(RecordingTransport):
+    """Write emails to a stream (stdout by default) instead of sending them."""
+    _lock = threading.Lock()
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def record(self, message):
+        body = message.pop('text', None)
+        message.pop('html', None)
+        with self._lock:
+            self.stream.write(f"{json.dumps(message, default=str, ensure_ascii=False)}\n")
+            if body is not None:
+                self.stream.write(f"{body}\n")
+            self.stream.write(f"{'-' * 79}\n")
+            self.stream.flush()
+
+
+class FileTransport(RecordingTransport):
+    """Write each email as a JSON file under ``EMAIL_FILE_PATH``."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.EMAIL_FILE_PATH)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def record(self, message):
+        name = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.json"
+        (self.path / name).write_text(json.dumps(message, default=str, ensure_ascii=False, indent=2), encoding='utf-8')
@@ -0,0 +1,101 @@
+# notifications/emails.py
+"""
+Email rendering from Django templates.
+
+Each email is a pair of app templates, ``<app>/emails/<name>.txt`` and
+``<app>/emails/<name>.html``, rendered from a small context dict through the
+template engine's cached loader, so templates are parsed once per process.
+
+The HTML templates are build artefacts: authors edit
+``<app>/emails/src/<name>.html``, which keeps its CSS in a ``<style>`` block,
+and ``python manage.py build_email_templates`` writes the copy with every
+rule inlined into ``style`` attributes. Nothing is inlined per message.
+"""
+import re
+from pathlib import Path
+from django.apps import apps
+from django.template.loader import render_to_string
+
+GENERATED_HEADER = "{# Generated by build_email_templates from src/%s - edit the source instead #}\n"
+
+_STYLE_BLOCK = re.compile(r'\s*<style[^>]*>(.*?)</style>', re.S | re.I)
+_CSS_RULE = re.compile(r'([^{}]+)\{([^}]*)\}')
+_START_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+_ATTRIBUTE = re.compile(r'\s([a-zA-Z-]+)\s*=\s*"([^"]*)"')
+
+
+def render_email(template_base, context):
+    """Render ``<template_base>.txt`` and ``.html``; returns ``(text, html)``."""
+    return (
+        render_to_string(f"{template_base}.txt", context),
+        render_to_string(f"{template_base}.html", context),
+    )
+
+
+def parse_css(css):
+    """
+    Return ``[(tag, class, declarations)]`` for simple CSS rules.
+
+    Only the selectors used in email stylesheets are supported: ``tag``,
+    ``.class`` and ``tag.class``, optionally comma separated.
+    """
+    rules = []
+    for selectors, body in _CSS_RULE.findall(css):
+        declarations = [d.strip() for d in body.split(';') if d.strip()]
+        for selector in selectors.split(','):
+            selector = selector.strip()
+            if not re.fullmatch(r'[a-zA-Z0-9]*(\.[\w-]+)?', selector):
+                raise ValueError(f"Unsupported selector in email CSS: {selector!r}")
+            tag, _, css_class = selector.partition('.')
+            rules.append((tag.lower(), css_class, declarations))
+    return rules
+
+
+def inline_css(source):
+    """Move the ``<style>`` rules of an HTML document into ``style`` attributes."""
+    rules = []
+    for css in _STYLE_BLOCK.findall(source):
+        rules.extend(parse_css(css))
+    html = _STYLE_BLOCK.sub('', source)
+
+    def apply(match):
+        tag, attributes = match.group(1), match.group(2)
+        values = dict(_ATTRIBUTE.findall(attributes))
+        classes = values.get('class', '').split()
+
+        # Less specific rules first so tag.class wins over .class over tag
+        matched = sorted(
+            (bool(rule_tag) + 2 * bool(rule_class), index, declarations)
+            for index, (rule_tag, rule_class, declarations) in enumerate(rules)
+            if (not rule_tag or rule_tag == tag.lower()) and (not rule_class or rule_class in classes)
+        )
+        if not matched:
+            return match.group(0)
+
+        declarations = [d for _, _, rule_declarations in matched for d in rule_declarations]
+        if 'style' in values:
+            declarations.extend(d.strip() for d in values['style'].split(';') if d.strip())
+            attributes = _ATTRIBUTE.sub(
+                lambda m: '' if m.group(1) == 'style' else m.group(0), attributes
+            )
+        style = '; '.join(declarations) + ';'
+        return f'<{tag}{attributes} style="{style}">'
+
+    return _START_TAG.sub(apply, html)
+
+
+def email_template_sources():
+    """Yield ``(source_path, compiled_path)`` for every app's email templates."""
+    for app_config in apps.get_app_configs():
+        for source in sorted(Path(app_config.path).glob('templates/*/emails/src/*.html')):
+            yield source, source.parent.parent / source.name
+
+
+def build_email_templates():
+    """Write the CSS-inlined HTML templates; returns the paths written."""
+    written = []
+    for source, compiled in email_template_sources():
+        html = inline_css(source.read_text(encoding='utf-8'))
+        compiled.write_text(GENERATED_HEADER % source.name + html, encoding='utf-8')
+        written.append(compiled)
+    return written
@@ -0,0 +1,118 @@
+# notifications/fake_server.py
+"""
+In-process stand-in for the SendGrid mail endpoint.
+
+``FakeSendGridServer`` listens on localhost, accepts v3 mail bodies on
+``/v3/mail/send``, answers 202 and records every message, so the transport
+(pooling, timeouts, metrics) can be exercised without network access::
+
+    with FakeSendGridServer() as server, override_settings(SENDGRID_API_URL=server.url):
+        send_email('user@example.com', 'Subject', 'Body')
+    server.messages  # -> [{...}]
+
+``latency`` and ``jitter`` (seconds) delay every response and a fraction
+``error_rate`` of requests fail with ``error_status``, to benchmark against
+a slow or flaky provider. ``python manage.py run_sendgrid_stub`` runs one
+standalone.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAIL_SEND_PATH = '/v3/mail/send'
+
+
+class _MailHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def respond(self, status, message=None):
+        body = json.dumps({'errors': [{'message': message}]}).encode() if message else b''
+        self.send_response(status)
+        if body:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.path.split('?')[0] != MAIL_SEND_PATH:
+            return self.respond(404, 'Not found')
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self.respond(401, 'Authorization header missing or invalid')
+
+        delay, fail = self.server.next_outcome()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self.server.lock:
+                self.server.failures += 1
+            return self.respond(self.server.error_status, 'Injected failure')
+
+        try:
+            message = json.loads(body or b'{}')
+        except ValueError:
+            return self.respond(400, 'Body is not valid JSON')
+        if not message.get('personalizations'):
+            return self.respond(400, 'The personalizations field is required')
+
+        with self.server.lock:
+            self.server.messages.append(message)
+        self.respond(202)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSendGridServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=500, seed=None):
+        super().__init__((host, port), _MailHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.failures = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._thread = None
+
+    def next_outcome(self):
+        """Return ``(delay_seconds, fail)`` for the next request."""
+        with self.lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        return delay, fail
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v3/mail/send"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
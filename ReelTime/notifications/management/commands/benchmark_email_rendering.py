@@ -0,0 +1,57 @@
+# notifications/management/commands/benchmark_email_rendering.py
+import time
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from notifications.emails import render_email
+
+SAMPLE_CONTEXT = {
+    'name': 'Juan',
+    'movie_title': 'Sample Movie',
+    'cinema_name': 'ReelTime Cinema',
+    'date': '2025-01-31',
+    'showtime': '7:30 PM',
+    'number_of_seats': 2,
+    'seats': '3-4, 3-5',
+    'total_cost': '500.00',
+    'reservation_id': 1234,
+    'subject': 'Sample subject',
+    'changes': [
+        {'field': 'seats', 'label': 'Seats', 'old': '3-4, 3-5', 'new': '5-1, 5-2'},
+        {'field': 'number_of_seats', 'label': 'Number Of Seats', 'old': '3', 'new': '2'},
+    ],
+}
+
+EMAILS = ('confirmation', 'reminder', 'cancellation', 'edit')
+
+
+class Command(BaseCommand):
+    help = 'Measure per-message render cost of the reservation emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Renders per email')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        # A loader without caching re-reads and re-parses templates on every
+        # render, which is the per-message cost the cached loader avoids
+        uncached = Engine(loaders=['django.template.loaders.app_directories.Loader'])
+
+        self.stdout.write(f"{'email':<14}{'cached us/msg':>16}{'uncached us/msg':>18}{'speedup':>10}")
+        for name in EMAILS:
+            base = f"reservations/emails/{name}"
+            render_email(base, SAMPLE_CONTEXT)  # warm the cache
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                render_email(base, SAMPLE_CONTEXT)
+            cached = (time.perf_counter() - started) / iterations
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for suffix in ('txt', 'html'):
+                    uncached.get_template(f"{base}.{suffix}").render(Context(SAMPLE_CONTEXT))
+            fresh = (time.perf_counter() - started) / iterations
+
+            self.stdout.write(
+                f"{name:<14}{cached * 1e6:>16.1f}{fresh * 1e6:>18.1f}{fresh / cached:>9.1f}x"
+            )
@@ -0,0 +1,12 @@
+# notifications/management/commands/build_email_templates.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.emails import build_email_templates
+
+
+class Command(BaseCommand):
+    help = 'Inline the CSS of email source templates (emails/src/*.html) into the templates used for sending'
+
+    def handle(self, *args, **options):
+        for path in build_email_templates():
+            self.stdout.write(f"Built {path.relative_to(settings.BASE_DIR)}")
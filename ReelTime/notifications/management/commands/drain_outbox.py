@@ -0,0 +1,19 @@
+# notifications/management/commands/drain_outbox.py
+from django.core.management.base import BaseCommand
+from notifications.outbox import deliver_due
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails that are due (picks up any whose background task was lost)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='Maximum number of emails to attempt in this run',
+        )
+
+    def handle(self, *args, **options):
+        sent = deliver_due(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Delivered {sent} queued emails"))
@@ -0,0 +1,44 @@
+# notifications/management/commands/run_sendgrid_stub.py
+from django.core.management.base import BaseCommand
+from notifications.fake_server import FakeSendGridServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the SendGrid mail endpoint with optional latency and failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+        parser.add_argument('--port', type=int, default=8025, help='Port to listen on')
+        parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds added to every response')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Up to this many extra random milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction (0-1) of requests that fail')
+        parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures (e.g. 429)')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible latency and failures')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            self.stderr.write(self.style.ERROR("--error-rate must be between 0 and 1"))
+            return
+
+        server = FakeSendGridServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            error_status=options['error_status'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"SendGrid stub listening on {server.url}"))
+        self.stdout.write(f"Run the app with SENDGRID_API_URL={server.url} and any SENDGRID_API_KEY")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(
+                f"Accepted {len(server.messages)} messages, injected {server.failures} failures "
+                f"over {server.connections} connections"
+            )
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='coalesce_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='outboundemail',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('coalesce_key',), name='unique_pending_coalesce_key'),
+        ),
+    ]
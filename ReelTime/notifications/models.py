@@ -0,0 +1,50 @@
+# notifications/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """
+    One email waiting to be (or already) delivered.
+
+    Rows are written in the same transaction as the change that triggers
+    them and delivered afterwards by a background worker, so a request
+    never waits on the email provider.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    to_email = models.EmailField()
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    # Emails sharing a key while pending are merged into one (see coalesce_email)
+    coalesce_key = models.CharField(max_length=255, null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['coalesce_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_coalesce_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
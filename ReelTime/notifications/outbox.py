@@ -0,0 +1,199 @@
+# notifications/outbox.py
+"""
+Transactional email outbox.
+
+``enqueue_email`` writes an ``OutboundEmail`` row inside the caller's
+transaction and, once that transaction commits, schedules a
+``background_task`` to deliver it. Delivery looks the email's ``kind`` up
+in ``EMAIL_SENDERS`` and calls the sender with the stored payload. Failed
+sends are retried with exponential backoff until ``OUTBOX_MAX_ATTEMPTS``;
+the idempotency key makes enqueueing the same email twice a no-op.
+
+``coalesce_email`` holds an email back for a short window and merges later
+emails with the same coalesce key into it, so a burst of related events
+(such as repeated seat edits) produces one message.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from reel_time import metrics
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Email kind -> sender called as sender(**payload), returning True on success
+EMAIL_SENDERS = {
+    'reservation_confirmation': 'reservations.utils.deliver_reservation_confirmation',
+    'reservation_cancellation': 'reservations.utils.send_reservation_cancellation_email',
+    'reservation_edit': 'reservations.utils.send_reservation_edit_email',
+    'admin_confirmation': 'accounts.utils.send_admin_confirmation_email',
+    'admin_credentials': 'accounts.utils.send_admin_credentials_email',
+}
+
+
+def enqueue_email(kind, to_email, payload=None, idempotency_key=None, delay=None):
+    """
+    Queue an email for background delivery and return its ``OutboundEmail``.
+
+    Call inside the transaction that makes the email necessary; nothing is
+    scheduled if that transaction rolls back. Emails with an
+    ``idempotency_key`` that was already queued are not queued again.
+    """
+    if kind not in EMAIL_SENDERS:
+        raise ValueError(f"Unknown email kind: {kind}")
+
+    email, created = OutboundEmail.objects.get_or_create(
+        idempotency_key=idempotency_key or f"{kind}:{uuid.uuid4()}",
+        defaults={
+            'kind': kind,
+            'to_email': to_email,
+            'payload': payload or {},
+            'next_attempt_at': timezone.now() + (delay or timedelta()),
+        },
+    )
+    if created:
+        transaction.on_commit(lambda: schedule_delivery(email))
+    return email
+
+
+def coalesce_email(kind, to_email, coalesce_key, payload, merge, window):
+    """
+    Queue an email that absorbs later emails with the same ``coalesce_key``.
+
+    The first call queues the email for delivery after ``window``; calls made
+    while it is still pending replace its payload with
+    ``merge(queued_payload, payload)`` instead of queueing another email. If
+    ``merge`` returns None there is nothing left to say and the queued email
+    is dropped. Returns the queued ``OutboundEmail``, or None if dropped.
+    """
+    if kind not in EMAIL_SENDERS:
+        raise ValueError(f"Unknown email kind: {kind}")
+
+    with transaction.atomic():
+        # An email already being delivered is 'sending', not pending, so
+        # later edits start a new email instead of merging into it
+        pending = OutboundEmail.objects.select_for_update().filter(
+            coalesce_key=coalesce_key, status='pending'
+        ).first()
+        if pending is None:
+            try:
+                with transaction.atomic():
+                    email = OutboundEmail.objects.create(
+                        kind=kind,
+                        to_email=to_email,
+                        payload=payload,
+                        idempotency_key=f"{kind}:{uuid.uuid4()}",
+                        coalesce_key=coalesce_key,
+                        next_attempt_at=timezone.now() + window,
+                    )
+            except IntegrityError:
+                # A concurrent request queued the email first; merge into it
+                pending = OutboundEmail.objects.select_for_update().get(
+                    coalesce_key=coalesce_key, status='pending'
+                )
+            else:
+                transaction.on_commit(lambda: schedule_delivery(email))
+                return email
+
+        metrics.increment('email.coalesced')
+        merged = merge(pending.payload, payload)
+        if merged is None:
+            pending.delete()
+            return None
+        pending.payload = merged
+        pending.save(update_fields=['payload'])
+        return pending
+
+
+def schedule_delivery(email):
+    """Schedule a background task to deliver ``email`` at its next attempt time."""
+    from .tasks import deliver_outbound_email
+
+    deliver_outbound_email(email.id, schedule=email.next_attempt_at)
+
+
+def retry_delay(attempts):
+    """Return the backoff before the next try after ``attempts`` failures."""
+    return timedelta(seconds=settings.OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+
+
+def claim(email_id):
+    """
+    Mark a due email as ``sending`` and return it, or return why it can't be sent.
+
+    Returns ``(email, None)`` when claimed, otherwise ``(None, result)``
+    with ``deliver``'s return value. The claim commits on return, so no row
+    lock is held while the provider is called; a claim whose worker died is
+    picked up again once ``OUTBOX_SEND_TIMEOUT`` has passed.
+    """
+    with transaction.atomic():
+        email = OutboundEmail.objects.select_for_update().filter(id=email_id).first()
+        if email is None or email.status not in ('pending', 'sending'):
+            return None, email is not None and email.status == 'sent'
+        if email.next_attempt_at > timezone.now():
+            if email.status == 'pending':
+                # The task fired early; try again when the email is due
+                schedule_delivery(email)
+            return None, False
+
+        email.status = 'sending'
+        email.attempts += 1
+        email.next_attempt_at = timezone.now() + timedelta(seconds=settings.OUTBOX_SEND_TIMEOUT)
+        email.save(update_fields=['status', 'attempts', 'next_attempt_at'])
+    return email, None
+
+
+def deliver(email_id):
+    """
+    Try to deliver one queued email.
+
+    The email is claimed in one short transaction, sent outside of any
+    transaction, and the outcome recorded in a second one, so a slow
+    provider never holds a database connection's lock. Returns True when
+    the email is (or already was) sent.
+    """
+    email, result = claim(email_id)
+    if email is None:
+        return result
+
+    try:
+        sent = import_string(EMAIL_SENDERS[email.kind])(**email.payload)
+        error = '' if sent else 'Sender reported failure'
+    except Exception as e:
+        sent, error = False, str(e)
+        logger.exception(f"Outbound email {email.id} ({email.kind}) raised")
+
+    if sent:
+        email.status = 'sent'
+        email.sent_at = timezone.now()
+        email.last_error = ''
+    else:
+        email.last_error = error
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.status = 'failed'
+            logger.error(f"Outbound email {email.id} ({email.kind}) failed after {email.attempts} attempts: {error}")
+        else:
+            email.status = 'pending'
+            email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    with transaction.atomic():
+        email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'sent_at'])
+
+    if email.status == 'pending':
+        schedule_delivery(email)
+    return sent
+
+
+def deliver_due(limit=100):
+    """Deliver pending emails whose next attempt is due; returns how many were sent."""
+    # Includes emails whose sending worker died (their claim has lapsed)
+    due_ids = list(
+        OutboundEmail.objects.filter(
+            status__in=('pending', 'sending'),
+            next_attempt_at__lte=timezone.now(),
+        ).values_list('id', flat=True)[:limit]
+    )
+    return sum(1 for email_id in due_ids if deliver(email_id))
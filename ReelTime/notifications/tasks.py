@@ -0,0 +1,9 @@
+# notifications/tasks.py
+from background_task import background
+from .outbox import deliver
+
+
+@background(schedule=0)
+def deliver_outbound_email(email_id):
+    """Background task: deliver one queued email (retries reschedule themselves)."""
+    deliver(email_id)
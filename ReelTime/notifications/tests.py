@@ -0,0 +1,503 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from reel_time.resilience import (
+    CLOSED, HALF_OPEN, OPEN, Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, OutboundCall,
+    outbound_call,
+)
+from reservations.models import ReminderCheckpoint, Reservation
+from reservations.tests import ShowingTestCase
+from reservations.utils import merge_edit_payloads
+from .backends import BaseTransport, ConsoleTransport, FileTransport, MemoryTransport, RecordingTransport
+from .emails import GENERATED_HEADER, email_template_sources, inline_css, render_email
+from .fake_server import FakeSendGridServer
+from .management.commands.benchmark_email_rendering import SAMPLE_CONTEXT
+from .models import OutboundEmail
+from .outbox import coalesce_email, deliver, deliver_due, enqueue_email
+from .transport import MAX_PERSONALIZATIONS, get_transport, send_email, send_template_batch
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE_DELAY=30)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.sender = mock.Mock(return_value=True)
+        patcher = mock.patch('notifications.outbox.import_string', return_value=self.sender)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Retries reschedule themselves; keep them out of the task queue
+        patcher = mock.patch('notifications.outbox.schedule_delivery')
+        self.schedule_delivery = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, **kwargs):
+        return enqueue_email('reservation_confirmation', 'user@example.com', {'reservation_id': 1}, **kwargs)
+
+    def test_idempotency_key_queues_once(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            first = self.queue(idempotency_key='reservation:1:confirmation')
+            second = self.queue(idempotency_key='reservation:1:confirmation')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+        self.assertEqual(len(callbacks), 1)
+        self.schedule_delivery.assert_called_once_with(first)
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue_email('newsletter', 'user@example.com')
+
+    def test_deliver_marks_sent(self):
+        email = self.queue()
+
+        self.assertTrue(deliver(email.id))
+
+        email.refresh_from_db()
+        self.sender.assert_called_once_with(reservation_id=1)
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertIsNotNone(email.sent_at)
+        # Already sent: not sent again
+        self.assertTrue(deliver(email.id))
+        self.assertEqual(self.sender.call_count, 1)
+
+    def test_failures_back_off_then_fail(self):
+        self.sender.side_effect = [False, RuntimeError('provider down'), False]
+        email = self.queue()
+
+        before = timezone.now()
+        self.assertFalse(deliver(email.id))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('pending', 1, 'Sender reported failure'))
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=30))
+        self.schedule_delivery.assert_called_once()
+
+        # Not due yet: rescheduled for when it is
+        self.assertFalse(deliver(email.id))
+        self.assertEqual(self.sender.call_count, 1)
+        self.assertEqual(self.schedule_delivery.call_count, 2)
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        self.assertFalse(deliver(email.id))
+        email.refresh_from_db()
+        self.assertEqual((email.attempts, email.last_error), (2, 'provider down'))
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=60))
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertFalse(deliver(email.id))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 3))
+        self.assertEqual(self.schedule_delivery.call_count, 3)
+
+    def test_email_is_claimed_before_sending(self):
+        email = self.queue()
+        seen = []
+        self.sender.side_effect = lambda **payload: seen.append(
+            OutboundEmail.objects.values_list('status', 'attempts').get(pk=email.pk)
+        ) or True
+
+        self.assertTrue(deliver(email.id))
+
+        self.assertEqual(seen, [('sending', 1)])
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+
+    def test_claimed_email_is_not_sent_twice_until_the_claim_lapses(self):
+        email = self.queue()
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            status='sending', attempts=1, next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertFalse(deliver(email.id))
+        self.assertEqual(deliver_due(), 0)
+        self.sender.assert_not_called()
+        self.schedule_delivery.assert_not_called()
+
+        # The worker that claimed it died; the next drain sends it
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_due(), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 2))
+
+    def test_deliver_due_sends_only_due_emails(self):
+        self.queue()
+        self.queue(delay=timedelta(hours=1))
+        self.assertEqual(deliver_due(), 1)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 1)
+
+
+class FakeSendGridMixin:
+    """Point the SendGrid transport at a ``FakeSendGridServer`` started by ``serve``."""
+
+    def setUp(self):
+        super().setUp()
+        # Fresh circuit breaker per test so earlier failures can't open it
+        outbound_call.cache_clear()
+        self.addCleanup(outbound_call.cache_clear)
+
+    def serve(self, **kwargs):
+        server = FakeSendGridServer(**kwargs).start()
+        self.addCleanup(server.stop)
+        settings_override = override_settings(SENDGRID_API_URL=server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+
+SENDGRID_TEST_SETTINGS = {
+    'EMAIL_TRANSPORT': 'notifications.backends.SendGridTransport',
+    'SENDGRID_API_KEY': 'test-key',
+    'SENDGRID_SENDER_EMAIL': 'noreply@example.com',
+}
+
+
+@override_settings(**SENDGRID_TEST_SETTINGS)
+class SendGridTransportTests(FakeSendGridMixin, TestCase):
+
+    def test_sends_over_one_kept_alive_connection(self):
+        server = self.serve()
+
+        for i in range(3):
+            self.assertTrue(send_email(f'user{i}@example.com', 'Subject', 'Body', '<p>Body</p>'))
+
+        self.assertEqual(len(server.messages), 3)
+        message = server.messages[0]
+        self.assertEqual(message['from'], {'email': 'noreply@example.com'})
+        self.assertEqual(message['personalizations'][0]['to'], [{'email': 'user0@example.com'}])
+        self.assertEqual(server.connections, 1)
+
+    def test_provider_errors_return_false(self):
+        server = self.serve(error_rate=1.0, error_status=503)
+        self.assertFalse(send_email('user@example.com', 'Subject', 'Body'))
+        self.assertEqual((server.failures, server.messages), (1, []))
+
+    def test_missing_api_key_sends_nothing(self):
+        server = self.serve()
+        with override_settings(SENDGRID_API_KEY=''):
+            self.assertFalse(send_email('user@example.com', 'Subject', 'Body'))
+        self.assertEqual(server.messages, [])
+
+
+@override_settings(**SENDGRID_TEST_SETTINGS, SENDGRID_REMINDER_TEMPLATE_ID='d-reminder')
+class ReminderBatchTests(FakeSendGridMixin, ShowingTestCase):
+    def remind(self, *args):
+        out = StringIO()
+        call_command(
+            'send_reservation_reminders', '--concurrency', '1', '--rate', '1000', *args, stdout=out
+        )
+        return out.getvalue()
+
+    def test_batch_size_is_capped(self):
+        too_many = [('user@example.com', {})] * (MAX_PERSONALIZATIONS + 1)
+        with self.assertRaises(ValueError):
+            send_template_batch('d-reminder', too_many)
+        self.assertTrue(send_template_batch('d-reminder', []))
+
+    def test_reminders_go_out_in_chunks(self):
+        server = self.serve()
+        for seat in ('1-0', '1-1', '1-2', '1-3', '2-0'):
+            self.reserve([seat])
+
+        output = self.remind('--chunk-size', '2')
+
+        self.assertIn('Successfully sent 5 reminder emails', output)
+        self.assertEqual([len(m['personalizations']) for m in server.messages], [2, 2, 1])
+        self.assertEqual({m['template_id'] for m in server.messages}, {'d-reminder'})
+        data = server.messages[0]['personalizations'][0]['dynamic_template_data']
+        self.assertEqual(data['movie_title'], self.movie.title)
+        self.assertFalse(Reservation.objects.filter(reminder_sent=False).exists())
+
+    def test_rejected_batch_is_left_unsent(self):
+        self.serve(error_rate=1.0)
+        self.reserve(['1-0'])
+
+        output = self.remind()
+
+        self.assertIn('Failed to send 1 reminder emails', output)
+        self.assertFalse(Reservation.objects.get().reminder_sent)
+
+
+@override_settings(SENDGRID_REMINDER_TEMPLATE_ID='d-reminder')
+class ReminderCheckpointTests(ShowingTestCase):
+    def remind(self, failing_ids=()):
+        def send_batch(chunk):
+            return not any(reservation.id in failing_ids for reservation in chunk)
+
+        out = StringIO()
+        with mock.patch(
+            'reservations.management.commands.send_reservation_reminders.send_reservation_reminder_batch',
+            side_effect=send_batch,
+        ) as sender:
+            call_command(
+                'send_reservation_reminders', '--chunk-size', '2', '--concurrency', '1', '--rate', '1000',
+                stdout=out,
+            )
+        return out.getvalue(), [[r.id for r in call.args[0]] for call in sender.call_args_list]
+
+    def test_failed_chunk_holds_the_checkpoint_and_is_retried(self):
+        ids = [self.reserve([seat]).id for seat in ('1-0', '1-1', '1-2', '1-3', '2-0')]
+
+        output, chunks = self.remind(failing_ids={ids[2]})
+
+        self.assertEqual(chunks, [ids[:2], ids[2:4], ids[4:]])
+        self.assertIn('Failed to send 2 reminder emails', output)
+        checkpoint = ReminderCheckpoint.objects.get(run_date=self.date)
+        # The last chunk was sent, but the watermark stops before the failed one
+        self.assertEqual((checkpoint.last_reservation_id, checkpoint.sent_count), (ids[1], 3))
+        self.assertIsNone(checkpoint.completed_at)
+
+        output, chunks = self.remind()
+
+        self.assertIn(f'Resuming after reservation {ids[1]}', output)
+        self.assertEqual(chunks, [ids[2:4]])
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.last_reservation_id, checkpoint.sent_count), (ids[3], 5))
+        self.assertIsNotNone(checkpoint.completed_at)
+        self.assertFalse(Reservation.objects.filter(reminder_sent=False).exists())
+
+
+class CoalesceEmailTests(TestCase):
+    KEY = 'reservation:1:edit'
+
+    def edit(self, changes):
+        return coalesce_email(
+            'reservation_edit', 'user@example.com', self.KEY,
+            {'reservation_id': 1, 'changes': changes},
+            merge=merge_edit_payloads,
+            window=timedelta(minutes=2),
+        )
+
+    def test_edits_within_the_window_merge(self):
+        first = self.edit({'seats': ['A1', 'A2'], 'total_cost': ['$500', '$500']})
+        due_at = first.next_attempt_at
+        second = self.edit({'seats': ['A2', 'B1']})
+
+        self.assertEqual(first.pk, second.pk)
+        email = OutboundEmail.objects.get()
+        # Oldest old value, newest new value; unchanged fields dropped
+        self.assertEqual(email.payload['changes'], {'seats': ['A1', 'B1']})
+        self.assertEqual(email.next_attempt_at, due_at)
+
+    def test_edit_undone_drops_the_email(self):
+        self.edit({'seats': ['A1', 'A2']})
+        self.assertIsNone(self.edit({'seats': ['A2', 'A1']}))
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_edit_after_delivery_starts_a_new_email(self):
+        first = self.edit({'seats': ['A1', 'A2']})
+        OutboundEmail.objects.filter(pk=first.pk).update(status='sent')
+
+        second = self.edit({'seats': ['A2', 'B1']})
+
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.payload['changes'], {'seats': ['A2', 'B1']})
+
+    def test_one_pending_email_per_coalesce_key(self):
+        fields = {'kind': 'reservation_edit', 'to_email': 'user@example.com', 'coalesce_key': self.KEY}
+        OutboundEmail.objects.create(idempotency_key='edit-1', status='sent', **fields)
+        OutboundEmail.objects.create(idempotency_key='edit-2', **fields)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            OutboundEmail.objects.create(idempotency_key='edit-3', **fields)
+
+
+class TransportSelectionTests(TestCase):
+    def setUp(self):
+        MemoryTransport.clear()
+        self.addCleanup(MemoryTransport.clear)
+
+    def test_override_settings_swaps_and_restores_the_transport(self):
+        configured = get_transport()
+        with override_settings(EMAIL_TRANSPORT='notifications.backends.MemoryTransport'):
+            self.assertIsInstance(get_transport(), MemoryTransport)
+            self.assertTrue(send_email('user@example.com', 'Subject', 'Body', '<p>Body</p>'))
+            self.assertTrue(send_template_batch(
+                'd-reminder', [('a@example.com', {'n': 1}), ('b@example.com', {'n': 2})]
+            ))
+        self.assertIs(type(get_transport()), type(configured))
+
+        self.assertEqual(MemoryTransport.outbox, [
+            {'to': 'user@example.com', 'subject': 'Subject', 'text': 'Body', 'html': '<p>Body</p>'},
+            {'to': 'a@example.com', 'template_id': 'd-reminder', 'data': {'n': 1}},
+            {'to': 'b@example.com', 'template_id': 'd-reminder', 'data': {'n': 2}},
+        ])
+
+    def test_file_transport_writes_one_file_per_email(self):
+        with tempfile.TemporaryDirectory() as path:
+            transport = FileTransport(path)
+            transport.send('user@example.com', 'Subject', 'Body')
+            transport.send_batch('d-reminder', [('a@example.com', {})])
+
+            messages = [json.loads(f.read_text(encoding='utf-8')) for f in sorted(Path(path).iterdir())]
+        self.assertEqual(sorted(message['to'] for message in messages), ['a@example.com', 'user@example.com'])
+        self.assertEqual(MemoryTransport.outbox, [])
+
+    def test_console_transport_writes_to_its_stream(self):
+        stream = StringIO()
+        ConsoleTransport(stream).send('user@example.com', 'Subject', 'Body', '<p>Body</p>')
+        output = stream.getvalue()
+        self.assertIn('"subject": "Subject"', output)
+        self.assertIn('Body\n', output)
+        self.assertNotIn('<p>', output)
+        self.assertEqual(MemoryTransport.outbox, [])
+
+    def test_transport_interfaces_are_abstract(self):
+        for interface in (BaseTransport, RecordingTransport):
+            with self.subTest(interface=interface.__name__), self.assertRaises(TypeError):
+                interface()
+        # Only the test transport keeps a shared outbox
+        self.assertFalse(issubclass(ConsoleTransport, MemoryTransport))
+        self.assertFalse(issubclass(FileTransport, MemoryTransport))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_half_open_probe_closes_on_success(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+        self.breaker.before_call()
+        # Only one probe at a time
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+
+    def test_half_open_probe_reopens_on_failure(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.now += 29
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+
+class BulkheadTests(SimpleTestCase):
+    def test_rejects_calls_beyond_the_limit(self):
+        bulkhead = Bulkhead('test', max_concurrent=1, max_wait=0)
+        with bulkhead.slot():
+            with self.assertRaises(BulkheadFullError):
+                with bulkhead.slot():
+                    pass
+        with bulkhead.slot():
+            pass
+
+    def test_outbound_call_counts_failed_results(self):
+        call = OutboundCall('test', timeout=1, failure_threshold=1, max_concurrent=1)
+        self.assertEqual(call.call(lambda: 503, is_failure=lambda status: status >= 500), 503)
+        self.assertEqual(call.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            call.call(lambda: 200)
+
+
+@override_settings(**SENDGRID_TEST_SETTINGS)
+class SendGridBreakerTests(FakeSendGridMixin, TestCase):
+    def test_open_circuit_stops_calling_sendgrid(self):
+        server = self.serve(error_rate=1.0)
+        outbound = {
+            **settings.OUTBOUND_CALLS,
+            'sendgrid': {**settings.OUTBOUND_CALLS['sendgrid'], 'failure_threshold': 2},
+        }
+        with override_settings(OUTBOUND_CALLS=outbound):
+            for _ in range(4):
+                self.assertFalse(send_email('user@example.com', 'Subject', 'Body'))
+            self.assertEqual(outbound_call('sendgrid').breaker.state, OPEN)
+        self.assertEqual(server.failures, 2)
+
+
+class EmailTemplateTests(SimpleTestCase):
+    def template_names(self):
+        """Yield ``(source_name, compiled_name)`` template names for every email."""
+        for source, compiled in email_template_sources():
+            templates = source.parents[3]
+            yield source.relative_to(templates).as_posix(), compiled.relative_to(templates).as_posix()
+
+    def test_compiled_templates_render_like_their_inlined_sources(self):
+        names = list(self.template_names())
+        self.assertTrue(names)
+        for source_name, compiled_name in names:
+            with self.subTest(template=compiled_name):
+                # The generated-file comment renders as an empty first line
+                self.assertEqual(
+                    render_to_string(compiled_name, SAMPLE_CONTEXT),
+                    '\n' + inline_css(render_to_string(source_name, SAMPLE_CONTEXT)),
+                )
+
+    def test_compiled_templates_are_up_to_date(self):
+        for source, compiled in email_template_sources():
+            with self.subTest(template=compiled.name):
+                self.assertEqual(
+                    compiled.read_text(encoding='utf-8'),
+                    GENERATED_HEADER % source.name + inline_css(source.read_text(encoding='utf-8')),
+                )
+
+    def test_plain_text_matches_the_original_message(self):
+        text, html = render_email('reservations/emails/confirmation', {**SAMPLE_CONTEXT, 'name': 'Juan & Co'})
+        self.assertEqual(text, (
+            "Hello Juan & Co,\n\n"
+            "Your movie reservation has been confirmed!\n\n"
+            "📋 Reservation Details:\n"
+            "Movie: Sample Movie\n"
+            "Cinema: ReelTime Cinema\n"
+            "Date: 2025-01-31\n"
+            "Showtime: 7:30 PM\n"
+            "Number of Seats: 2\n"
+            "Seats: 3-4, 3-5\n"
+            "Total Cost: $500.00\n"
+            "Reservation ID: 1234\n\n"
+            "We look forward to seeing you at the cinema!\n\n"
+            "Thank you for choosing ReelTime!\n"
+        ))
+        self.assertIn('<strong>Juan &amp; Co</strong>', html)
+        self.assertNotIn('<style', html)
+
+    def test_build_command_writes_inlined_templates(self):
+        with tempfile.TemporaryDirectory() as path:
+            base = Path(path)
+            source = base / 'app' / 'templates' / 'app' / 'emails' / 'src' / 'hello.html'
+            source.parent.mkdir(parents=True)
+            source.write_text(
+                '<html><head><style>p { color: red; } p.note { font-size: 12px; }</style></head>'
+                '<body><p class="note" style="margin: 0">{{ name }}</p><p>Bye</p></body></html>',
+                encoding='utf-8',
+            )
+            compiled = source.parent.parent / 'hello.html'
+            out = StringIO()
+            with mock.patch('notifications.emails.email_template_sources', return_value=[(source, compiled)]), \
+                    override_settings(BASE_DIR=base):
+                call_command('build_email_templates', stdout=out)
+
+            self.assertEqual(out.getvalue(), f"Built {Path('app/templates/app/emails/hello.html')}\n")
+            self.assertEqual(compiled.read_text(encoding='utf-8'), GENERATED_HEADER % 'hello.html' + (
+                '<html><head></head><body>'
+                '<p class="note" style="color: red; font-size: 12px; margin: 0;">{{ name }}</p>'
+                '<p style="color: red;">Bye</p></body></html>'
+            ))
@@ -0,0 +1,124 @@
+# notifications/transport.py
+"""
+Email sending entry points and the shared SendGrid connection.
+
+``send_email`` and ``send_template_batch`` hand messages to the transport
+named by ``EMAIL_TRANSPORT`` (see ``notifications.backends``) and count
+results into ``reel_time.metrics``.
+
+The SendGrid transport posts through one process-wide ``requests.Session``
+whose connection pool keeps TLS connections to the SendGrid API alive, so
+bursts of confirmations and reminder batches reuse sockets instead of
+paying a handshake per send. Requests go through the ``sendgrid`` guard in
+``reel_time.resilience`` (timeouts, circuit breaker, bulkhead), and each
+send is timed into ``reel_time.metrics`` under ``email.send``.
+
+Point ``SENDGRID_API_URL`` at ``notifications.fake_server.FakeSendGridServer``
+(or ``python manage.py run_sendgrid_stub``) to exercise the transport
+locally without talking to SendGrid.
+"""
+import time
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from sendgrid.helpers.mail import Mail, To
+from reel_time import metrics
+from reel_time.resilience import outbound_call
+
+# SendGrid accepts at most this many personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+
+@lru_cache(maxsize=None)
+def get_session():
+    """Return the process-wide pooled HTTP session for the SendGrid API."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.SENDGRID_POOL_SIZE,
+        max_retries=0,  # the outbox owns retries
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def build_message(to_email, subject, plain_text_content, html_content=None):
+    """Return the SendGrid v3 JSON body for a single-recipient email."""
+    return Mail(
+        from_email=settings.SENDGRID_SENDER_EMAIL,
+        to_emails=[To(email=to_email)],
+        subject=subject,
+        plain_text_content=plain_text_content,
+        html_content=html_content,
+    ).get()
+
+
+def provider_failed(response):
+    """Responses that mean SendGrid itself is struggling and count toward opening the circuit."""
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def post_message(body):
+    """
+    POST a v3 mail body to SendGrid over the pooled session and return the response.
+
+    Runs under the ``sendgrid`` outbound guard, so it raises
+    ``OutboundCallRejected`` while SendGrid is failing or saturated.
+    """
+    guard = outbound_call('sendgrid')
+    started = time.perf_counter()
+    try:
+        return guard.call(
+            get_session().post,
+            settings.SENDGRID_API_URL,
+            json=body,
+            headers={'Authorization': f'Bearer {settings.SENDGRID_API_KEY}'},
+            timeout=guard.timeout,
+            is_failure=provider_failed,
+        )
+    finally:
+        metrics.observe('email.send', time.perf_counter() - started)
+
+
+@lru_cache(maxsize=None)
+def get_transport():
+    """Return the transport configured by ``EMAIL_TRANSPORT`` (see ``notifications.backends``)."""
+    return import_string(settings.EMAIL_TRANSPORT)()
+
+
+@receiver(setting_changed)
+def reset_transport(setting, **kwargs):
+    if setting == 'EMAIL_TRANSPORT':
+        get_transport.cache_clear()
+    elif setting == 'SENDGRID_POOL_SIZE':
+        get_session.cache_clear()
+
+
+def send_email(to_email, subject, plain_text_content, html_content=None):
+    """Send one email through the configured transport; returns True on success."""
+    sent = get_transport().send(to_email, subject, plain_text_content, html_content)
+    metrics.increment('email.sent' if sent else 'email.failed')
+    return sent
+
+
+def send_template_batch(template_id, personalizations):
+    """
+    Send one dynamic-template email to many recipients in a single request.
+
+    ``personalizations`` is a list of ``(to_email, dynamic_template_data)``
+    pairs, at most ``MAX_PERSONALIZATIONS`` long. Returns True when the
+    transport accepts the whole batch.
+    """
+    if len(personalizations) > MAX_PERSONALIZATIONS:
+        raise ValueError(f"At most {MAX_PERSONALIZATIONS} personalizations per request")
+    if not personalizations:
+        return True
+
+    sent = get_transport().send_batch(template_id, personalizations)
+    metrics.increment('email.sent' if sent else 'email.failed', len(personalizations))
+    return sent
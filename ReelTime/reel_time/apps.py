@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ReelTimeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'reel_time'
\ No newline at end of file
+    name = 'reel_time'
+
+    def ready(self):
+        from . import checks  # noqa: F401
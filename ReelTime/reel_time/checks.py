@@ -0,0 +1,42 @@
+# reel_time/checks.py
+import os
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_process_local():
+    return settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The catalog cache version and seat holds must be shared by every worker.
+
+    A process-local cache is only correct with a single process: under several
+    gunicorn workers the others keep serving a stale catalog after an edit.
+    """
+    workers = int(os.getenv('WEB_CONCURRENCY') or 1)
+    if workers > 1 and cache_is_process_local():
+        return [Error(
+            f"WEB_CONCURRENCY is {workers} but the default cache is process-local.",
+            hint="Set REDIS_URL so every worker shares the cache, or run a single worker.",
+            id='reel_time.E001',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    if cache_is_process_local():
+        return [Warning(
+            "The default cache is process-local; only a single worker process is supported.",
+            hint="Set REDIS_URL to share the cache and seat holds between workers.",
+            id='reel_time.W001',
+        )]
+    return []
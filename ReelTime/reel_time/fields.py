@@ -0,0 +1,40 @@
+# reel_time/fields.py
+from cloudinary.exceptions import Error as CloudinaryError
+from cloudinary.models import CloudinaryField
+from django.core.files.uploadedfile import UploadedFile
+from .resilience import OutboundCallRejected, outbound_call
+
+
+class UploadUnavailable(Exception):
+    """Raised when an image upload fails or Cloudinary is unavailable."""
+
+
+def cloudinary_timeout(instance):
+    return outbound_call('cloudinary').timeout
+
+
+class ResilientCloudinaryField(CloudinaryField):
+    """
+    CloudinaryField whose uploads run under the ``cloudinary`` outbound guard.
+
+    Uploads get the guard's timeout and go through its bulkhead and circuit
+    breaker; any failure surfaces as ``UploadUnavailable`` so views can keep
+    the rest of the page working.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('timeout', cloudinary_timeout)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        if not isinstance(getattr(model_instance, self.attname), UploadedFile):
+            return super().pre_save(model_instance, add)
+        try:
+            return outbound_call('cloudinary').call(super().pre_save, model_instance, add)
+        except (OutboundCallRejected, CloudinaryError) as e:
+            raise UploadUnavailable(f"Image upload failed: {e}") from e
+
+    def deconstruct(self):
+        # Same column as CloudinaryField, so migrations keep referring to it
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'cloudinary.models.CloudinaryField', args, kwargs
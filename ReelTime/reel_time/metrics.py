@@ -0,0 +1,91 @@
+# reel_time/metrics.py
+"""
+Process-wide latency and counter metrics.
+
+Timings are kept as a bounded window of recent samples per metric name, so
+``snapshot()`` can report counts and percentiles without any external
+metrics service. Management commands print snapshots after batch runs.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Recent samples kept per timing metric
+SAMPLE_LIMIT = 2048
+
+_lock = threading.Lock()
+_timings = defaultdict(lambda: deque(maxlen=SAMPLE_LIMIT))
+_counters = defaultdict(int)
+_gauges = {}
+
+
+def observe(name, seconds):
+    """Record one timing sample (in seconds) for ``name``."""
+    with _lock:
+        _timings[name].append(seconds)
+
+
+def increment(name, amount=1):
+    """Add ``amount`` to the counter ``name``."""
+    with _lock:
+        _counters[name] += amount
+
+
+def gauge(name, value):
+    """Set the current value of ``name`` (e.g. a state or an in-use count)."""
+    with _lock:
+        _gauges[name] = value
+
+
+@contextmanager
+def timer(name):
+    """Time the wrapped block and record it under ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def percentile(samples, fraction):
+    """Return the ``fraction`` (0-1) percentile of ``samples`` (nearest rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def snapshot(prefix=''):
+    """
+    Return current metrics whose names start with ``prefix``.
+
+    Timings are summarised as ``{"count", "avg_ms", "p50_ms", "p95_ms", "max_ms"}``
+    over the recent sample window; counters and gauges are returned as plain values.
+    """
+    with _lock:
+        timings = {name: list(samples) for name, samples in _timings.items() if name.startswith(prefix)}
+        counters = {name: value for name, value in _counters.items() if name.startswith(prefix)}
+        gauges = {name: value for name, value in _gauges.items() if name.startswith(prefix)}
+
+    summary = {}
+    for name, samples in timings.items():
+        summary[name] = {
+            'count': len(samples),
+            'avg_ms': round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+            'p50_ms': round(percentile(samples, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+            'max_ms': round(max(samples, default=0.0) * 1000, 2),
+        }
+    summary.update(counters)
+    summary.update(gauges)
+    return summary
+
+
+def reset(prefix=''):
+    """Drop metrics whose names start with ``prefix``."""
+    with _lock:
+        for store in (_timings, _counters, _gauges):
+            for name in [name for name in store if name.startswith(prefix)]:
+                del store[name]
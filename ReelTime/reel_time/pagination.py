@@ -0,0 +1,211 @@
+# reel_time/pagination.py
+"""
+Keyset (seek) pagination with opaque cursor tokens.
+
+A page is addressed by the sort key of the row it continues from rather
+than by an offset, so page 50 costs the same as page 1: the database seeks
+into the ordering index and reads ``per_page + 1`` rows, with no COUNT and
+no OFFSET, and rows added or removed meanwhile don't shift later pages.
+
+``KeysetPaginator`` pages either
+
+- a queryset, by ``ordering``: field names (``-`` for descending) ending in
+  a unique field such as ``id``, ideally matching an index; or
+- a list already sorted by ``key(item)`` (e.g. the cached catalog), seeking
+  with a binary search. Keys must be JSON-serializable as they are.
+"""
+import base64
+import binascii
+import datetime
+import json
+from bisect import bisect_left, bisect_right
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+CURSOR_PARAM = 'cursor'
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursor tokens that can't be decoded or don't fit the ordering."""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # Keep microseconds (DjangoJSONEncoder rounds to milliseconds), so seeks are exact
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, backwards=False):
+    """Return an opaque, URL-safe token for the sort key ``values``."""
+    payload = json.dumps([list(values), backwards], cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(values, backwards)`` from a token made by ``encode_cursor``."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values, backwards = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token!r}") from e
+    if not isinstance(values, list) or not isinstance(backwards, bool):
+        raise InvalidCursor(f"Invalid cursor: {token!r}")
+    return values, backwards
+
+
+def parse_ordering(ordering):
+    """Return ``[(field, descending), ...]`` for ``('-created_at', '-id')``-style orderings."""
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def seek_filter(ordering, values, backwards=False):
+    """
+    Return a ``Q`` for rows after (or with ``backwards``, before) ``values`` in ``ordering``.
+
+    Expands the row comparison into ``a > x OR (a = x AND b > y) OR ...``,
+    with each field's direction, and adds a plain bound on the first field
+    so the database can start an index range scan there.
+    """
+    fields = parse_ordering(ordering)
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(fields, values):
+        op = 'lt' if descending != backwards else 'gt'
+        condition |= equal & Q(**{f'{field}__{op}': value})
+        equal &= Q(**{field: value})
+
+    first_field, descending = fields[0]
+    bound = Q(**{f"{first_field}__{'lte' if descending != backwards else 'gte'}": values[0]})
+    return bound & condition
+
+
+def item_value(item, field):
+    """Return ``field`` (possibly ``a__b``) of a model instance."""
+    for attr in field.split('__'):
+        item = getattr(item, attr)
+    return item
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def cursors(self):
+        """Return the cursor fields JSON responses include next to their results."""
+        return {'next_cursor': self.next_cursor, 'previous_cursor': self.previous_cursor}
+
+
+class KeysetPaginator:
+    def __init__(self, object_list, ordering=None, key=None, per_page=DEFAULT_PAGE_SIZE):
+        if isinstance(object_list, QuerySet):
+            if not ordering:
+                raise ValueError("Paginating a queryset requires an ordering")
+            self.key = lambda item: [item_value(item, field) for field, _ in parse_ordering(ordering)]
+        elif key is None:
+            raise ValueError("Paginating a list requires a key function")
+        else:
+            self.key = key
+        self.object_list = object_list
+        self.ordering = tuple(ordering or ())
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        """Return the page after ``cursor`` (the first page without one); raise ``InvalidCursor``."""
+        values, backwards = decode_cursor(cursor) if cursor else (None, False)
+        if values is not None and isinstance(self.object_list, QuerySet) and len(values) != len(self.ordering):
+            raise InvalidCursor(f"Cursor doesn't match ordering {self.ordering}")
+
+        if isinstance(self.object_list, QuerySet):
+            rows, more = self._seek_queryset(values, backwards)
+        else:
+            rows, more = self._seek_list(values, backwards)
+
+        # "more" is whether rows continue past the page in the direction we read
+        has_next = more if not backwards else True
+        has_previous = more if backwards else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(self.key(rows[-1])) if rows and has_next else None,
+            previous_cursor=encode_cursor(self.key(rows[0]), backwards=True) if rows and has_previous else None,
+        )
+
+    def get_page(self, cursor=None):
+        """Like ``page``, but fall back to the first page for a bad cursor."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _seek_queryset(self, values, backwards):
+        if backwards:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        queryset = self.object_list.order_by(*ordering)
+        try:
+            if values is not None:
+                queryset = queryset.filter(seek_filter(self.ordering, values, backwards))
+            rows = list(queryset[:self.per_page + 1])
+        except (ValidationError, ValueError, TypeError) as e:
+            # A cursor value the field can't parse (e.g. a hand-edited date)
+            raise InvalidCursor(str(e)) from e
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        return rows, more
+
+    def _seek_list(self, values, backwards):
+        items = self.object_list
+        if values is None:
+            return list(items[:self.per_page]), len(items) > self.per_page
+        try:
+            values = tuple(values)
+            if backwards:
+                end = bisect_left(items, values, key=lambda item: tuple(self.key(item)))
+                start = max(end - self.per_page, 0)
+                return list(items[start:end]), start > 0
+            start = bisect_right(items, values, key=lambda item: tuple(self.key(item)))
+        except TypeError as e:
+            raise InvalidCursor(f"Cursor doesn't match the list's keys: {e}") from e
+        return list(items[start:start + self.per_page]), len(items) > start + self.per_page
+
+
+def page_size(request, default=DEFAULT_PAGE_SIZE):
+    """Return the ``per_page`` GET parameter, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(request.GET.get('per_page', default)), MAX_PAGE_SIZE))
+    except ValueError:
+        return default
+
+
+def paginate(request, object_list, ordering=None, key=None, per_page=DEFAULT_PAGE_SIZE):
+    """Return the ``KeysetPage`` of ``object_list`` named by the request's ``cursor`` parameter."""
+    paginator = KeysetPaginator(object_list, ordering=ordering, key=key, per_page=page_size(request, per_page))
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
@@ -0,0 +1,190 @@
+# reel_time/resilience.py
+"""
+Guards for calls to outbound integrations (SendGrid, Cloudinary).
+
+Every integration named in ``OUTBOUND_CALLS`` gets one process-wide
+``OutboundCall`` (see ``outbound_call``) that combines:
+
+- a deadline: ``timeout``, which callers hand to their HTTP client so a hung
+  provider cannot hold a worker indefinitely;
+- a bulkhead: at most ``max_concurrent`` calls in flight. Further callers
+  wait up to ``max_wait`` seconds for a slot, then fail with
+  ``BulkheadFullError``;
+- a circuit breaker: after ``failure_threshold`` consecutive failures the
+  circuit opens and calls fail immediately with ``CircuitOpenError``. After
+  ``reset_timeout`` seconds one probe call is let through (half-open) and
+  its outcome closes or re-opens the circuit.
+
+State goes to ``reel_time.metrics`` under ``outbound.<name>.``: the
+``state`` and ``in_flight`` gauges, ``failures``, ``rejected`` and
+``opened`` counters, and a ``call`` timing.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class OutboundCallRejected(Exception):
+    """Raised instead of calling an integration that is failing or saturated."""
+
+
+class CircuitOpenError(OutboundCallRejected):
+    pass
+
+
+class BulkheadFullError(OutboundCallRejected):
+    pass
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker counting consecutive failures."""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        metrics.gauge(f'outbound.{self.name}.state', self._state)
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self):
+        """Raise ``CircuitOpenError`` unless a call may go ahead now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                # Let exactly one probe through
+                self._state = HALF_OPEN
+                self._probing = True
+                self._publish()
+                return
+        metrics.increment(f'outbound.{self.name}.rejected')
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._probing = False
+                self._publish()
+                logger.info(f"Circuit for {self.name} closed")
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+                self._publish()
+                metrics.increment(f'outbound.{self.name}.opened')
+                logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+
+
+class Bulkhead:
+    """Limit the number of concurrent calls to one integration."""
+
+    def __init__(self, name, max_concurrent, max_wait=0.0):
+        self.name = name
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _track(self, delta):
+        with self._lock:
+            self._in_flight += delta
+            metrics.gauge(f'outbound.{self.name}.in_flight', self._in_flight)
+
+    @contextmanager
+    def slot(self):
+        if not self._slots.acquire(timeout=self.max_wait):
+            metrics.increment(f'outbound.{self.name}.rejected')
+            raise BulkheadFullError(f"{self.name} is busy (too many calls in flight)")
+        self._track(1)
+        try:
+            yield
+        finally:
+            self._track(-1)
+            self._slots.release()
+
+
+class OutboundCall:
+    """Deadline, bulkhead and circuit breaker for one integration."""
+
+    def __init__(self, name, timeout, failure_threshold=5, reset_timeout=30.0, max_concurrent=10, max_wait=0.0):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.bulkhead = Bulkhead(name, max_concurrent, max_wait)
+
+    def call(self, func, *args, is_failure=None, **kwargs):
+        """
+        Call ``func(*args, **kwargs)`` through the bulkhead and breaker.
+
+        Exceptions count as failures and are re-raised, as do results for
+        which ``is_failure(result)`` is true (those are still returned).
+        Raises ``OutboundCallRejected`` without calling ``func`` when the
+        circuit is open or no slot frees up in time.
+        """
+        with self.bulkhead.slot():
+            self.breaker.before_call()
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self.breaker.record_failure()
+                metrics.increment(f'outbound.{self.name}.failures')
+                raise
+            finally:
+                metrics.observe(f'outbound.{self.name}.call', time.perf_counter() - started)
+
+            if is_failure is not None and is_failure(result):
+                self.breaker.record_failure()
+                metrics.increment(f'outbound.{self.name}.failures')
+            else:
+                self.breaker.record_success()
+            return result
+
+
+@lru_cache(maxsize=None)
+def outbound_call(name):
+    """Return the process-wide ``OutboundCall`` configured in ``OUTBOUND_CALLS[name]``."""
+    return OutboundCall(name, **settings.OUTBOUND_CALLS[name])
+
+
+@receiver(setting_changed)
+def reset_outbound_calls(setting, **kwargs):
+    if setting == 'OUTBOUND_CALLS':
+        outbound_call.cache_clear()
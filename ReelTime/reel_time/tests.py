@@ -1,3 +1,112 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from accounts.models import User
+from .pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor, page_size,
+)
 
-# Create your tests here.
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip_keeps_microseconds(self):
+        joined = datetime(2026, 10, 17, 18, 30, 5, 123456, tzinfo=timezone.utc)
+        values, backwards = decode_cursor(encode_cursor([joined, 7], backwards=True))
+        self.assertEqual(values, [joined.isoformat(), 7])
+        self.assertIs(backwards, True)
+
+    def test_tampered_tokens_are_rejected(self):
+        for token in ('not a cursor', encode_cursor([1])[:-3], 'WzEsMl0'):  # WzEsMl0 is [1,2]
+            with self.subTest(token=token), self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+    def test_page_size_is_clamped(self):
+        factory = RequestFactory()
+        for per_page, expected in (('500', MAX_PAGE_SIZE), ('0', 1), ('-3', 1), ('5', 5), ('abc', DEFAULT_PAGE_SIZE)):
+            with self.subTest(per_page=per_page):
+                self.assertEqual(page_size(factory.get('/', {'per_page': per_page})), expected)
+        self.assertEqual(page_size(factory.get('/')), DEFAULT_PAGE_SIZE)
+
+
+class ListPaginationTests(SimpleTestCase):
+    def setUp(self):
+        # Sorted by (score, name), which is unique
+        self.items = [{'score': score // 2, 'name': f'item{score}'} for score in range(10)]
+        self.paginator = KeysetPaginator(self.items, key=lambda item: [item['score'], item['name']], per_page=4)
+
+    def test_pages_forward_and_back(self):
+        first = self.paginator.page()
+        second = self.paginator.page(first.next_cursor)
+        last = self.paginator.page(second.next_cursor)
+
+        self.assertEqual(first.object_list, self.items[:4])
+        self.assertFalse(first.has_previous)
+        self.assertEqual(second.object_list, self.items[4:8])
+        self.assertEqual(last.object_list, self.items[8:])
+        self.assertFalse(last.has_next)
+
+        back = self.paginator.page(last.previous_cursor)
+        self.assertEqual(back.object_list, second.object_list)
+        self.assertEqual(back.next_cursor, second.next_cursor)
+        self.assertEqual(self.paginator.page(back.previous_cursor).object_list, first.object_list)
+
+    def test_cursor_seeks_past_its_key(self):
+        # The cursor names a key, not a position: items removed before it don't shift the page
+        cursor = encode_cursor([1, 'item3'])
+        self.assertEqual(self.paginator.page(cursor).object_list, self.items[4:8])
+        del self.items[0]
+        self.assertEqual(self.paginator.page(cursor).object_list, self.items[3:7])
+
+    def test_mismatched_keys_fall_back_to_the_first_page(self):
+        cursor = encode_cursor([{'not': 'comparable'}])
+        with self.assertRaises(InvalidCursor):
+            self.paginator.page(cursor)
+        self.assertEqual(self.paginator.get_page(cursor).object_list, self.items[:4])
+
+
+class QuerySetPaginationTests(TestCase):
+    ordering = ('-date_joined', '-id')
+
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2026, 10, 1, 9, 0, 0, 500, tzinfo=timezone.utc)
+        # Pairs share a date_joined, so pages must break ties on id
+        cls.users = [
+            User.objects.create_user(
+                f'user{n}', f'user{n}@example.com', 'password', date_joined=start + timedelta(microseconds=n // 2)
+            )
+            for n in range(7)
+        ]
+        cls.newest_first = sorted(cls.users, key=lambda user: (user.date_joined, user.id), reverse=True)
+
+    def paginator(self):
+        return KeysetPaginator(User.objects.all(), ordering=self.ordering, per_page=3)
+
+    def test_pages_forward_and_back(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        last = paginator.page(second.next_cursor)
+
+        self.assertEqual(first.object_list, self.newest_first[:3])
+        self.assertEqual(second.object_list, self.newest_first[3:6])
+        self.assertEqual(last.object_list, self.newest_first[6:])
+        self.assertFalse(last.has_next)
+
+        back = paginator.page(last.previous_cursor)
+        self.assertEqual(back.object_list, second.object_list)
+        first_again = paginator.page(back.previous_cursor)
+        self.assertEqual(first_again.object_list, first.object_list)
+        self.assertFalse(first_again.has_previous)
+
+    def test_tampered_cursors_fall_back_to_the_first_page(self):
+        paginator = self.paginator()
+        for cursor in ('garbage', encode_cursor([1]), encode_cursor(['not-a-date', 1])):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    paginator.page(cursor)
+                self.assertEqual(paginator.get_page(cursor).object_list, self.newest_first[:3])
+
+    def test_a_page_is_one_query(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
@@ -1,9 +1,11 @@
 from django.contrib import admin
+from movies.admin import MovieSearchAdminMixin
 from .models import Reservation
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(MovieSearchAdminMixin, admin.ModelAdmin):
+    movie_search_field = 'movie_detail__movie'
     list_display = (
         'user',
         'movie_detail',
@@ -15,4 +17,4 @@ class ReservationAdmin(admin.ModelAdmin):
         'reservation_date',
     )
     list_filter = ('status', 'selected_date', 'cinema_name')
-    search_fields = ('user__email', 'movie_detail__movie__title', 'cinema_name')
\ No newline at end of file
+    search_fields = ('user__email', 'cinema_name')
\ No newline at end of file
@@ -0,0 +1,218 @@
+# reservations/holds.py
+"""
+Short-lived seat holds for the checkout window.
+
+A hold reserves seats for one user between picking them on the seat map and
+posting the reservation, so other shoppers see them as taken. Holds expire
+after ``SEAT_HOLD_TTL`` seconds. The store is chosen with
+``SEAT_HOLD_BACKEND``:
+
+* ``RedisSeatHoldStore`` keeps holds in Redis so every worker sees them
+  (the default when ``REDIS_URL`` is set).
+* ``LocMemSeatHoldStore`` keeps holds in process memory. Other workers
+  can't see them, so it is only for development and single-process runs.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def screening_key(movie_detail_id, selected_date, selected_showtime):
+    """Return the string key identifying one showing for the hold store."""
+    return f"{movie_detail_id}:{selected_date}:{selected_showtime}"
+
+
+class BaseSeatHoldStore(ABC):
+    @abstractmethod
+    def hold(self, key, seats, owner, ttl):
+        """
+        Replace ``owner``'s holds on ``key`` with ``seats``.
+
+        Returns the seats held by someone else; when any exist nothing is
+        changed.
+        """
+
+    @abstractmethod
+    def release(self, key, owner, seats=None):
+        """Release ``owner``'s holds on ``key`` (all of them when ``seats`` is None)."""
+
+    @abstractmethod
+    def held_seats(self, key, exclude_owner=None):
+        """Return the set of seats currently held on ``key``."""
+
+    @abstractmethod
+    def purge_expired(self):
+        """Drop expired holds and return how many were removed."""
+
+
+class LocMemSeatHoldStore(BaseSeatHoldStore):
+    def __init__(self):
+        self._holds = {}  # key -> {seat: (owner, expires_at)}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        seats = self._holds.get(key, {})
+        for seat in [s for s, (_, expires_at) in seats.items() if expires_at <= now]:
+            del seats[seat]
+        return seats
+
+    def hold(self, key, seats, owner, ttl):
+        owner = str(owner)
+        now = time.time()
+        with self._lock:
+            current = self._live(key, now)
+            conflicts = {seat for seat in seats if seat in current and current[seat][0] != owner}
+            if conflicts:
+                return conflicts
+
+            for seat in [s for s, (o, _) in current.items() if o == owner]:
+                del current[seat]
+            expires_at = now + ttl
+            for seat in seats:
+                current[seat] = (owner, expires_at)
+            if current:
+                self._holds[key] = current
+            return set()
+
+    def release(self, key, owner, seats=None):
+        owner = str(owner)
+        with self._lock:
+            current = self._holds.get(key, {})
+            for seat in [s for s, (o, _) in current.items() if o == owner and (seats is None or s in seats)]:
+                del current[seat]
+            if not current:
+                self._holds.pop(key, None)
+
+    def held_seats(self, key, exclude_owner=None):
+        exclude_owner = str(exclude_owner) if exclude_owner is not None else None
+        with self._lock:
+            current = self._live(key, time.time())
+            return {seat for seat, (owner, _) in current.items() if owner != exclude_owner}
+
+    def purge_expired(self):
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for key in list(self._holds):
+                before = len(self._holds[key])
+                current = self._live(key, now)
+                removed += before - len(current)
+                if not current:
+                    del self._holds[key]
+        return removed
+
+
+# Check-and-set in one round trip: fail if any seat is held by another
+# live owner, otherwise replace this owner's holds with the new seats.
+_HOLD_SCRIPT = """
+local now = tonumber(ARGV[2])
+local conflicts = {}
+local existing = redis.call('HGETALL', KEYS[1])
+for i = 1, #existing, 2 do
+    local sep = string.find(existing[i + 1], '|', 1, true)
+    local owner = string.sub(existing[i + 1], 1, sep - 1)
+    local expires_at = tonumber(string.sub(existing[i + 1], sep + 1))
+    if owner ~= ARGV[1] and expires_at > now then
+        for j = 4, #ARGV do
+            if ARGV[j] == existing[i] then
+                table.insert(conflicts, existing[i])
+            end
+        end
+    end
+end
+if #conflicts > 0 then
+    return conflicts
+end
+for i = 1, #existing, 2 do
+    local sep = string.find(existing[i + 1], '|', 1, true)
+    if string.sub(existing[i + 1], 1, sep - 1) == ARGV[1] then
+        redis.call('HDEL', KEYS[1], existing[i])
+    end
+end
+for j = 4, #ARGV do
+    redis.call('HSET', KEYS[1], ARGV[j], ARGV[1] .. '|' .. ARGV[3])
+end
+if #ARGV >= 4 then
+    redis.call('SADD', KEYS[2], KEYS[1])
+    local ttl = redis.call('TTL', KEYS[1])
+    local wanted = math.ceil(tonumber(ARGV[3]) - now)
+    if ttl < wanted then
+        redis.call('EXPIRE', KEYS[1], wanted)
+    end
+end
+return conflicts
+"""
+
+
+class RedisSeatHoldStore(BaseSeatHoldStore):
+    """
+    Holds live in one Redis hash per showing (seat -> "owner|expires_at"),
+    with a set indexing the hashes for the sweeper.
+    """
+    prefix = 'seatholds'
+
+    def __init__(self, url=None):
+        import redis
+
+        self._redis = redis.Redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self._hold_script = self._redis.register_script(_HOLD_SCRIPT)
+        self._index_key = f"{self.prefix}:index"
+
+    def _hash_key(self, key):
+        return f"{self.prefix}:{key}"
+
+    @staticmethod
+    def _parse(value):
+        owner, _, expires_at = value.rpartition('|')
+        return owner, float(expires_at)
+
+    def hold(self, key, seats, owner, ttl):
+        now = time.time()
+        conflicts = self._hold_script(
+            keys=[self._hash_key(key), self._index_key],
+            args=[str(owner), now, now + ttl, *seats],
+        )
+        return set(conflicts)
+
+    def release(self, key, owner, seats=None):
+        hash_key = self._hash_key(key)
+        owner = str(owner)
+        mine = [
+            seat for seat, value in self._redis.hgetall(hash_key).items()
+            if self._parse(value)[0] == owner and (seats is None or seat in seats)
+        ]
+        if mine:
+            self._redis.hdel(hash_key, *mine)
+
+    def held_seats(self, key, exclude_owner=None):
+        exclude_owner = str(exclude_owner) if exclude_owner is not None else None
+        now = time.time()
+        held = set()
+        for seat, value in self._redis.hgetall(self._hash_key(key)).items():
+            owner, expires_at = self._parse(value)
+            if expires_at > now and owner != exclude_owner:
+                held.add(seat)
+        return held
+
+    def purge_expired(self):
+        now = time.time()
+        removed = 0
+        for hash_key in self._redis.smembers(self._index_key):
+            expired = [
+                seat for seat, value in self._redis.hgetall(hash_key).items()
+                if self._parse(value)[1] <= now
+            ]
+            if expired:
+                removed += self._redis.hdel(hash_key, *expired)
+            if not self._redis.exists(hash_key):
+                self._redis.srem(self._index_key, hash_key)
+        return removed
+
+
+@lru_cache(maxsize=None)
+def get_hold_store():
+    """Return the process-wide seat hold store configured in settings."""
+    return import_string(settings.SEAT_HOLD_BACKEND)()
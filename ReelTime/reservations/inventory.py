@@ -0,0 +1,313 @@
+# reservations/inventory.py
+"""
+Seat inventory for screenings.
+
+Every active seat of a reservation is mirrored into a ``ReservedSeat`` row.
+The unique constraint on (movie_detail, selected_date, selected_showtime, seat)
+turns double booking into a failed insert instead of a Python scan over every
+``Reservation.selected_seats`` list.
+
+Seat totals per showing live on ``movies.Screening`` and are adjusted with
+``F()`` updates in the same transaction, so remaining seats is a single
+keyed read. The screening also carries a packed occupancy bitset (see
+``halls.utils``) that the seat-map endpoint serves directly.
+"""
+import json
+from dataclasses import dataclass, field
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from halls.utils import build_occupancy, get_layout_info, set_seats
+from movies.models import MovieAdminDetails, Screening
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+class SeatUnavailableError(Exception):
+    """Raised when one or more requested seats are already reserved."""
+
+    def __init__(self, seats):
+        self.seats = sorted(seats)
+        super().__init__(f"Seats already reserved: {', '.join(self.seats)}")
+
+
+@dataclass
+class SeatSwapResult:
+    """Outcome of ``swap_reservation_seats``."""
+    reservation: object
+    old_seats: list = field(default_factory=list)
+    seats: list = field(default_factory=list)
+    conflicts: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.conflicts
+
+    @property
+    def changed(self):
+        return set(self.seats) != set(self.old_seats)
+
+
+def normalize_seats(seats):
+    """Return a de-duplicated list of seat ids ("row-col") in selection order."""
+    if isinstance(seats, str):
+        try:
+            seats = json.loads(seats)
+        except json.JSONDecodeError:
+            return []
+    if not seats:
+        return []
+    return list(dict.fromkeys(str(seat) for seat in seats))
+
+
+def reserved_seats_for(movie_detail, selected_date, selected_showtime, exclude_reservation=None):
+    """Return the seat ids already taken for a screening (index range scan)."""
+    from .models import ReservedSeat
+
+    queryset = ReservedSeat.objects.filter(
+        movie_detail=movie_detail,
+        selected_date=selected_date,
+        selected_showtime=selected_showtime,
+    )
+    if exclude_reservation is not None:
+        queryset = queryset.exclude(reservation=exclude_reservation)
+    return list(queryset.values_list('seat', flat=True))
+
+
+def sync_reserved_seats(reservation):
+    """
+    Mirror ``reservation.selected_seats`` into ``ReservedSeat`` rows.
+
+    Must run inside the transaction that saves the reservation. Raises
+    ``SeatUnavailableError`` listing the clashing seats when another
+    reservation already holds any of them. Returns the seats added and
+    removed per showing as ``{(movie_detail_id, date, showtime): (added, removed)}``.
+    """
+    from .models import ReservedSeat
+
+    existing = ReservedSeat.objects.filter(reservation=reservation)
+    changes = {}
+    for movie_detail_id, selected_date, selected_showtime, seat in existing.values_list(
+        'movie_detail_id', 'selected_date', 'selected_showtime', 'seat'
+    ):
+        key = (movie_detail_id, selected_date, selected_showtime)
+        changes.setdefault(key, (set(), set()))[1].add(seat)
+    existing.delete()
+
+    if reservation.status not in ACTIVE_STATUSES:
+        return changes
+
+    seats = normalize_seats(reservation.selected_seats)
+    if not seats:
+        return changes
+
+    rows = [
+        ReservedSeat(
+            reservation=reservation,
+            movie_detail_id=reservation.movie_detail_id,
+            selected_date=reservation.selected_date,
+            selected_showtime=reservation.selected_showtime,
+            seat=seat,
+        )
+        for seat in seats
+    ]
+
+    try:
+        with transaction.atomic():
+            ReservedSeat.objects.bulk_create(rows)
+    except IntegrityError:
+        taken = ReservedSeat.objects.filter(
+            movie_detail_id=reservation.movie_detail_id,
+            selected_date=reservation.selected_date,
+            selected_showtime=reservation.selected_showtime,
+            seat__in=seats,
+        ).exclude(reservation=reservation).values_list('seat', flat=True)
+        raise SeatUnavailableError(set(taken) or set(seats))
+
+    key = (reservation.movie_detail_id, reservation.selected_date, reservation.selected_showtime)
+    added, removed = changes.setdefault(key, (set(), set()))
+    added.update(seat for seat in seats if seat not in removed)
+    removed.difference_update(seats)
+    return changes
+
+
+def get_or_create_screening(movie_detail, selected_date, selected_showtime):
+    """Return the ``Screening`` row for a showing, creating it on first use."""
+    screening, _ = Screening.objects.get_or_create(
+        movie_detail=movie_detail,
+        date=selected_date,
+        showtime=selected_showtime,
+        defaults={'capacity': movie_detail.get_showtime_capacity(selected_showtime)},
+    )
+    return screening
+
+
+def update_screening(movie_detail, selected_date, selected_showtime, delta=0, added=(), removed=()):
+    """
+    Apply a seat change to a screening's counter and occupancy bitset.
+
+    The screening row is locked for the rest of the transaction so bitset
+    updates from concurrent bookings never overwrite each other.
+    """
+    if not (delta or added or removed):
+        return
+    screening = get_or_create_screening(movie_detail, selected_date, selected_showtime)
+    screening = Screening.objects.select_for_update().get(pk=screening.pk)
+
+    layout = get_layout_info(movie_detail.hall) if movie_detail.hall_id else None
+    if layout is None:
+        occupancy, layout_version = b'', ''
+    elif screening.occupancy_layout != layout['version']:
+        # Layout changed (or first use): rebuild from the seat rows, which
+        # already reflect this change
+        occupancy = build_occupancy(
+            reserved_seats_for(movie_detail, selected_date, selected_showtime),
+            layout['rows'], layout['cols'],
+        )
+        layout_version = layout['version']
+    else:
+        bits = bytearray(screening.occupancy)
+        set_seats(bits, removed, layout['cols'], occupied=False)
+        set_seats(bits, added, layout['cols'])
+        occupancy, layout_version = bytes(bits), layout['version']
+
+    Screening.objects.filter(pk=screening.pk).update(
+        seats_reserved=F('seats_reserved') + delta,
+        version=F('version') + 1,
+        occupancy=occupancy,
+        occupancy_layout=layout_version,
+    )
+
+
+def get_occupancy(screening, layout):
+    """Return a screening's occupancy bitset, rebuilding it if the layout changed."""
+    if screening.occupancy_layout == layout['version']:
+        return bytes(screening.occupancy)
+
+    occupancy = build_occupancy(
+        reserved_seats_for(screening.movie_detail_id, screening.date, screening.showtime),
+        layout['rows'], layout['cols'],
+    )
+    Screening.objects.filter(pk=screening.pk, version=screening.version).update(
+        occupancy=occupancy,
+        occupancy_layout=layout['version'],
+    )
+    return occupancy
+
+
+def sync_screening_counters(reservation, previous=None, seat_changes=None):
+    """
+    Move the reservation's seats between screening counters and bitsets.
+
+    ``previous`` is the stored state of the reservation before this save
+    (``None`` for new reservations) as a dict with ``movie_detail_id``,
+    ``selected_date``, ``selected_showtime``, ``status`` and
+    ``number_of_seats``. ``seat_changes`` is the result of
+    ``sync_reserved_seats``.
+    """
+    deltas = {}
+
+    if previous and previous['status'] in ACTIVE_STATUSES:
+        key = (previous['movie_detail_id'], previous['selected_date'], previous['selected_showtime'])
+        deltas[key] = deltas.get(key, 0) - previous['number_of_seats']
+
+    if reservation.status in ACTIVE_STATUSES:
+        key = (reservation.movie_detail_id, reservation.selected_date, reservation.selected_showtime)
+        deltas[key] = deltas.get(key, 0) + reservation.number_of_seats
+
+    seat_changes = seat_changes or {}
+    for key in deltas.keys() | seat_changes.keys():
+        movie_detail_id, selected_date, selected_showtime = key
+        added, removed = seat_changes.get(key, ((), ()))
+        movie_detail = reservation.movie_detail
+        if movie_detail.pk != movie_detail_id:
+            movie_detail = MovieAdminDetails.objects.get(pk=movie_detail_id)
+        update_screening(movie_detail, selected_date, selected_showtime, deltas.get(key, 0), added, removed)
+
+
+def cancel_reservations(queryset):
+    """
+    Cancel every active reservation in ``queryset`` in bulk.
+
+    Seat rows are dropped and screening counters and bitsets are adjusted
+    with one update per affected showing instead of one save per row.
+    Returns the number of reservations cancelled.
+    """
+    from .models import ReservedSeat
+
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update().filter(status__in=ACTIVE_STATUSES).values(
+                'id', 'movie_detail_id', 'selected_date', 'selected_showtime', 'number_of_seats'
+            )
+        )
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+
+        changes = {}
+        for row in rows:
+            key = (row['movie_detail_id'], row['selected_date'], row['selected_showtime'])
+            seats, count = changes.get(key, (set(), 0))
+            changes[key] = (seats, count + row['number_of_seats'])
+
+        seat_rows = ReservedSeat.objects.filter(reservation_id__in=ids)
+        for movie_detail_id, selected_date, selected_showtime, seat in seat_rows.values_list(
+            'movie_detail_id', 'selected_date', 'selected_showtime', 'seat'
+        ):
+            changes[(movie_detail_id, selected_date, selected_showtime)][0].add(seat)
+        seat_rows.delete()
+
+        queryset.model.objects.filter(id__in=ids).update(status='cancelled')
+
+        details = MovieAdminDetails.objects.select_related('hall').in_bulk({key[0] for key in changes})
+        for (movie_detail_id, selected_date, selected_showtime), (seats, count) in changes.items():
+            update_screening(details[movie_detail_id], selected_date, selected_showtime, -count, removed=seats)
+
+    return len(ids)
+
+
+def swap_reservation_seats(reservation, seats):
+    """
+    Atomically move a reservation onto ``seats``.
+
+    The reservation and its screening are locked with ``select_for_update``
+    so concurrent edits of the same showing run one after another; the seat
+    rows, seat count, total cost and screening counters change in a single
+    transaction. Nothing is written when a seat is taken, and the result's
+    ``conflicts`` lists exactly the seats that clashed.
+    """
+    from .models import Reservation
+
+    seats = normalize_seats(seats)
+    with transaction.atomic():
+        reservation = Reservation.objects.select_for_update().select_related(
+            'movie_detail__hall'
+        ).get(pk=reservation.pk)
+        old_seats = normalize_seats(reservation.selected_seats)
+        old_count = reservation.number_of_seats
+
+        screening = get_or_create_screening(
+            reservation.movie_detail, reservation.selected_date, reservation.selected_showtime
+        )
+        Screening.objects.select_for_update().filter(pk=screening.pk).first()
+
+        taken = set(reserved_seats_for(
+            reservation.movie_detail,
+            reservation.selected_date,
+            reservation.selected_showtime,
+            exclude_reservation=reservation,
+        )) & set(seats)
+        if taken:
+            return SeatSwapResult(reservation, old_seats, old_seats, sorted(taken))
+
+        reservation.selected_seats = seats
+        reservation.number_of_seats = len(seats)
+        try:
+            with transaction.atomic():
+                reservation.save()
+        except SeatUnavailableError as e:
+            reservation.selected_seats = old_seats
+            reservation.number_of_seats = old_count
+            return SeatSwapResult(reservation, old_seats, old_seats, e.seats)
+
+    return SeatSwapResult(reservation, old_seats, seats)
@@ -0,0 +1,172 @@
+# reservations/management/commands/reconcile_screenings.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
+from datetime import datetime
+from halls.utils import build_occupancy, get_layout_info
+from movies.models import MovieAdminDetails, Screening
+from reservations.inventory import ACTIVE_STATUSES
+from reservations.models import Reservation, ReservedSeat
+
+# Screenings locked and rebuilt per transaction
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Screening seat counters and occupancy from reservations and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only reconcile screenings on or after this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing any changes',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+        dry_run = options['dry_run']
+
+        reservations = Reservation.objects.filter(status__in=ACTIVE_STATUSES)
+        screenings = Screening.objects.all()
+        if since:
+            reservations = reservations.filter(selected_date__gte=since)
+            screenings = screenings.filter(date__gte=since)
+
+        created = self.create_missing(reservations, dry_run)
+
+        # Walk screenings in key order so each batch's reservations are a narrow index range
+        ids = list(screenings.order_by('movie_detail_id', 'date', 'showtime').values_list('id', flat=True))
+        drifted = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            drifted += self.reconcile_batch(ids[start:start + BATCH_SIZE], created, dry_run)
+
+        if dry_run:
+            self.stdout.write(f"Dry run: {drifted} screenings drifted, {len(created)} missing")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {drifted} drifted and {len(created)} missing screenings")
+        )
+
+    def create_missing(self, reservations, dry_run):
+        """Create counter rows for showings with reservations but no ``Screening``; return their keys."""
+        has_screening = Screening.objects.filter(
+            movie_detail=OuterRef('movie_detail'),
+            date=OuterRef('selected_date'),
+            showtime=OuterRef('selected_showtime'),
+        )
+        missing = list(
+            reservations.filter(~Exists(has_screening))
+            .values('movie_detail_id', 'selected_date', 'selected_showtime')
+            .annotate(total=Sum('number_of_seats')).order_by()
+        )
+        details = MovieAdminDetails.objects.select_related('hall').in_bulk(
+            {row['movie_detail_id'] for row in missing}
+        )
+
+        to_create = []
+        for row in missing:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Missing screening for detail {row['movie_detail_id']} "
+                    f"({row['selected_date']} {row['selected_showtime']}): reserved {row['total']}"
+                )
+            )
+            detail = details[row['movie_detail_id']]
+            to_create.append(Screening(
+                movie_detail=detail,
+                date=row['selected_date'],
+                showtime=row['selected_showtime'],
+                capacity=detail.get_showtime_capacity(row['selected_showtime']),
+            ))
+
+        # Counters and bitsets are filled in by the locked pass that follows
+        if not dry_run:
+            Screening.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+        return {(s.movie_detail_id, s.date, s.showtime) for s in to_create}
+
+    def reconcile_batch(self, ids, created, dry_run):
+        """
+        Lock a batch of screenings and rebuild their counters and bitsets.
+
+        Bookings and cancellations lock the screening row before their
+        ``F()`` update, so while this transaction holds the locks the sums
+        read here can't go stale before they are written back. Rows in
+        ``created`` were just added (and already reported) so aren't drift.
+        Returns the number of drifted screenings.
+        """
+        with transaction.atomic():
+            screenings = Screening.objects.filter(id__in=ids)
+            if not dry_run:
+                screenings = screenings.select_for_update()
+            screenings = list(screenings.select_related('movie_detail__hall'))
+            if not screenings:
+                return 0
+
+            keys = {(s.movie_detail_id, s.date, s.showtime) for s in screenings}
+            scope = {
+                'movie_detail_id__in': {s.movie_detail_id for s in screenings},
+                'selected_date__range': (min(s.date for s in screenings), max(s.date for s in screenings)),
+            }
+            totals = {
+                (row['movie_detail_id'], row['selected_date'], row['selected_showtime']): row['total']
+                for row in Reservation.objects.filter(status__in=ACTIVE_STATUSES, **scope)
+                .values('movie_detail_id', 'selected_date', 'selected_showtime')
+                .annotate(total=Sum('number_of_seats')).order_by()
+            }
+            seats = {}
+            for movie_detail_id, selected_date, selected_showtime, seat in ReservedSeat.objects.filter(
+                **scope
+            ).values_list('movie_detail_id', 'selected_date', 'selected_showtime', 'seat'):
+                key = (movie_detail_id, selected_date, selected_showtime)
+                if key in keys:
+                    seats.setdefault(key, []).append(seat)
+
+            to_update = []
+            drifted = 0
+            for screening in screenings:
+                key = (screening.movie_detail_id, screening.date, screening.showtime)
+                detail = screening.movie_detail
+                expected = totals.get(key, 0)
+                capacity = detail.get_showtime_capacity(screening.showtime)
+                layout = get_layout_info(detail.hall) if detail.hall_id else None
+                if layout is None:
+                    occupancy, layout_version = b'', ''
+                else:
+                    occupancy = build_occupancy(seats.get(key, ()), layout['rows'], layout['cols'])
+                    layout_version = layout['version']
+
+                stale_occupancy = (
+                    bytes(screening.occupancy) != occupancy or screening.occupancy_layout != layout_version
+                )
+                if screening.seats_reserved == expected and screening.capacity == capacity and not stale_occupancy:
+                    continue
+
+                if key not in created:
+                    drifted += 1
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Drift on screening {screening.id} ({screening.date} {screening.showtime}): "
+                            f"reserved {screening.seats_reserved} -> {expected}, "
+                            f"capacity {screening.capacity} -> {capacity}"
+                            + (", occupancy rebuilt" if stale_occupancy else "")
+                        )
+                    )
+                screening.seats_reserved = expected
+                screening.capacity = capacity
+                screening.occupancy = occupancy
+                screening.occupancy_layout = layout_version
+                screening.version += 1
+                to_update.append(screening)
+
+            if not dry_run:
+                Screening.objects.bulk_update(
+                    to_update, ['seats_reserved', 'capacity', 'occupancy', 'occupancy_layout', 'version'],
+                )
+        return drifted
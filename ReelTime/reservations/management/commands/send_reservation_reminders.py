@@ -1,49 +1,257 @@
 # reservations/management/commands/send_reservation_reminders.py
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from reservations.models import Reservation
+from notifications.transport import MAX_PERSONALIZATIONS
+from reel_time import metrics
+from reel_time.ratelimit import TokenBucket
+from reservations.models import ReminderCheckpoint, Reservation
+from reservations.utils import send_reservation_reminder_batch, send_reservation_reminder_email
 
 class Command(BaseCommand):
-    help = 'Send reminder emails for reservations happening tomorrow'
+    help = 'Send reminder emails for reservations happening tomorrow, or continuously with --loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=MAX_PERSONALIZATIONS,
+            help=f'Reservations per batch request (at most {MAX_PERSONALIZATIONS})',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.REMINDER_CONCURRENCY,
+            help='Number of chunks sent in parallel',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=settings.SENDGRID_REQUESTS_PER_SECOND,
+            help='Maximum SendGrid API requests per second across all workers',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint and scan every reservation for tomorrow',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Run continuously, reminding each reservation a lead time before its showtime',
+        )
+        parser.add_argument(
+            '--window',
+            action='store_true',
+            help='Scan the lead-time window once and exit (for frequent cron runs)',
+        )
+        parser.add_argument(
+            '--lead-hours',
+            type=float,
+            default=settings.REMINDER_LEAD_TIME.total_seconds() / 3600,
+            help='How long before the showtime the reminder is sent',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.REMINDER_SCAN_INTERVAL,
+            help='Seconds between window scans with --loop',
+        )
+
+    def send_chunk(self, chunk, template_id, bucket):
+        """Send one chunk (runs on a worker thread) and return the reservations sent."""
+        if template_id:
+            # One API request for the whole chunk
+            bucket.acquire()
+            return chunk if send_reservation_reminder_batch(chunk) else []
+
+        sent = []
+        for reservation in chunk:
+            bucket.acquire()
+            if send_reservation_reminder_email(reservation):
+                sent.append(reservation)
+        return sent
+
+    def send_all(self, rows, chunk_size, concurrency, template_id, bucket, checkpoint=None, lead_time=None):
+        """
+        Send reminders for ``rows`` in chunks over a worker pool.
+
+        Returns ``(sent, failed)`` counts. With ``checkpoint`` its watermark
+        advances over fully sent chunks; with ``lead_time`` the delay between
+        each reminder falling due and being sent is recorded as ``reminder.lag``.
+        """
+        success_count = 0
+        failed_count = 0
+
+        # Chunks in id order; the checkpoint advances over the leading run of
+        # fully sent chunks only, so a failed chunk is retried on resume
+        pending = deque()  # [last_id, done, ok] per chunk, oldest first
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            in_flight = {}
+            exhausted = False
+            while in_flight or not exhausted:
+                # Keep the pool fed without loading every chunk up front
+                while not exhausted and len(in_flight) < concurrency * 2:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    state = [chunk[-1].id, False, False]
+                    pending.append(state)
+                    in_flight[pool.submit(self.send_chunk, chunk, template_id, bucket)] = (chunk, state)
+
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk, state = in_flight.pop(future)
+                    try:
+                        sent = future.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"Error sending reminder batch: {e}"))
+                        sent = []
+
+                    for reservation in sent:
+                        reservation.reminder_sent = True
+                    Reservation.objects.bulk_update(sent, ['reminder_sent'])
+
+                    if lead_time is not None:
+                        now = timezone.now()
+                        for reservation in sent:
+                            due_at = reservation.showing_at - lead_time
+                            metrics.observe('reminder.lag', (now - due_at).total_seconds())
+
+                    success_count += len(sent)
+                    failed_count += len(chunk) - len(sent)
+                    state[1], state[2] = True, len(sent) == len(chunk)
+                    self.stdout.write(f"Sent {len(sent)} of {len(chunk)} reminders in this batch")
+
+                    if checkpoint is not None:
+                        checkpoint.sent_count += len(sent)
+                        while pending and pending[0][1] and pending[0][2]:
+                            checkpoint.last_reservation_id = pending.popleft()[0]
+                        checkpoint.save(update_fields=['last_reservation_id', 'sent_count', 'updated_at'])
+
+        return success_count, failed_count
 
     def handle(self, *args, **options):
-        tomorrow = timezone.now().date() + timedelta(days=1)
-        
+        chunk_size = max(1, min(options['chunk_size'], MAX_PERSONALIZATIONS))
+        concurrency = max(1, options['concurrency'])
+        template_id = settings.SENDGRID_REMINDER_TEMPLATE_ID
+        bucket = TokenBucket(options['rate'])
+
+        if not template_id:
+            self.stdout.write(
+                self.style.WARNING("SENDGRID_REMINDER_TEMPLATE_ID is not set; sending reminders one by one")
+            )
+
+        if options['loop'] or options['window']:
+            self.run_scheduler(chunk_size, concurrency, template_id, bucket, options)
+        else:
+            self.run_daily(chunk_size, concurrency, template_id, bucket, options)
+
+    def run_scheduler(self, chunk_size, concurrency, template_id, bucket, options):
+        """Send reminders as showings come within the lead time, once or every interval."""
+        lead_time = timedelta(hours=options['lead_hours'])
+        interval = max(1, options['interval'])
+        self.stdout.write(
+            f"Reminding {options['lead_hours']:g}h before each showtime"
+            + (f", scanning every {interval}s" if options['loop'] else "")
+        )
+
+        try:
+            while True:
+                started = time.monotonic()
+                self.scan_window(chunk_size, concurrency, template_id, bucket, lead_time)
+                if not options['loop']:
+                    break
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write("Reminder scheduler stopped")
+
+    def scan_window(self, chunk_size, concurrency, template_id, bucket, lead_time):
+        """Send every unsent reminder whose showing starts within ``lead_time`` from now."""
+        now = timezone.now()
+        metrics.reset('email.')
+        metrics.reset('reminder.')
+
+        # Served by reservation_reminder_due_idx: two equalities and a range.
+        # Each scan only sees showings that entered the window since the last
+        # one, so the day's reminders go out a few at a time.
+        due = Reservation.objects.filter(
+            status='confirmed',
+            reminder_sent=False,
+            showing_at__gt=now,
+            showing_at__lte=now + lead_time,
+        ).select_related('user', 'movie_detail__movie').order_by('showing_at', 'id')
+
+        with metrics.timer('reminder.scan'):
+            success_count, failed_count = self.send_all(
+                due.iterator(chunk_size=chunk_size), chunk_size, concurrency, template_id, bucket,
+                lead_time=lead_time,
+            )
+
+        if not success_count and not failed_count:
+            return
+        lag = metrics.snapshot('reminder.lag').get('reminder.lag', {})
+        message = (
+            f"[{timezone.localtime(now):%Y-%m-%d %H:%M:%S}] Sent {success_count} reminders, "
+            f"lag p95 {lag.get('p95_ms', 0.0) / 1000:.1f}s, max {lag.get('max_ms', 0.0) / 1000:.1f}s"
+        )
+        if failed_count:
+            self.stdout.write(self.style.ERROR(f"{message}; {failed_count} failed and will be retried"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def run_daily(self, chunk_size, concurrency, template_id, bucket, options):
+        """Send every reminder for tomorrow's showings in one resumable run."""
+        tomorrow = timezone.localdate() + timedelta(days=1)
+
+        checkpoint, _ = ReminderCheckpoint.objects.get_or_create(run_date=tomorrow)
+        if options['restart']:
+            checkpoint.last_reservation_id = 0
+            checkpoint.sent_count = 0
+            checkpoint.completed_at = None
+            checkpoint.save()
+        elif checkpoint.last_reservation_id:
+            self.stdout.write(f"Resuming after reservation {checkpoint.last_reservation_id}")
+
         # Get confirmed reservations for tomorrow that haven't had reminders sent
         reservations = Reservation.objects.filter(
             selected_date=tomorrow,
             status='confirmed',
-            reminder_sent=False
-        ).select_related('user', 'movie_detail__movie')
-        
+            reminder_sent=False,
+            id__gt=checkpoint.last_reservation_id,
+        ).select_related('user', 'movie_detail__movie').order_by('id')
+
         self.stdout.write(f"Found {reservations.count()} reservations for tomorrow")
-        
-        success_count = 0
-        for reservation in reservations:
-            try:
-                if reservation.send_reminder_email():
-                    success_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Sent reminder for reservation {reservation.id} to {reservation.user.email}"
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Failed to send reminder for reservation {reservation.id}"
-                        )
-                    )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Error sending reminder for reservation {reservation.id}: {str(e)}"
-                    )
-                )
-        
+
+        metrics.reset('email.')
+        started = time.perf_counter()
+        success_count, failed_count = self.send_all(
+            reservations.iterator(chunk_size=chunk_size), chunk_size, concurrency, template_id, bucket,
+            checkpoint=checkpoint,
+        )
+
+        if not failed_count:
+            checkpoint.completed_at = timezone.now()
+            checkpoint.save(update_fields=['completed_at', 'updated_at'])
+
+        elapsed = time.perf_counter() - started
+        latency = metrics.snapshot('email.send').get('email.send', {})
+        if failed_count:
+            self.stdout.write(self.style.ERROR(f"Failed to send {failed_count} reminder emails"))
         self.stdout.write(
             self.style.SUCCESS(
                 f"Successfully sent {success_count} reminder emails"
             )
-        )
\ No newline at end of file
+        )
+        self.stdout.write(
+            f"Throughput: {success_count / elapsed if elapsed else 0:.1f} emails/sec over {elapsed:.2f}s, "
+            f"p95 send latency: {latency.get('p95_ms', 0.0)} ms ({latency.get('count', 0)} requests)"
+        )
@@ -0,0 +1,54 @@
+# reservations/management/commands/sweep_seat_holds.py
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reservations.holds import get_hold_store
+from reservations.inventory import cancel_reservations
+from reservations.models import Reservation
+
+
+class Command(BaseCommand):
+    help = 'Release expired seat holds and cancel stale pending reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending-ttl',
+            type=int,
+            default=settings.PENDING_RESERVATION_TTL,
+            help='Cancel pending reservations older than this many seconds',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping every --interval seconds instead of running once',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Seconds between sweeps when running with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options['pending_ttl'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, pending_ttl):
+        # Only meaningful for shared stores; in-process holds also expire lazily
+        released = get_hold_store().purge_expired()
+
+        cutoff = timezone.now() - timedelta(seconds=pending_ttl)
+        expired = cancel_reservations(
+            Reservation.objects.filter(status='pending', reservation_date__lt=cutoff)
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Released {released} expired seat holds and cancelled {expired} stale pending reservations"
+            )
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0009_alter_movie_rating'),
+        ('reservations', '0004_reservation_total_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservedSeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_date', models.DateField()),
+                ('selected_showtime', models.CharField(max_length=50)),
+                ('seat', models.CharField(max_length=20)),
+                ('movie_detail', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reserved_seats', to='movies.movieadmindetails')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reserved_seat_rows', to='reservations.reservation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('movie_detail', 'selected_date', 'selected_showtime', 'seat'), name='unique_reserved_seat_per_screening')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated manually to populate ReservedSeat from existing reservations
+
+from django.db import migrations
+import json
+
+
+def backfill_reserved_seats(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservedSeat = apps.get_model('reservations', 'ReservedSeat')
+    db_alias = schema_editor.connection.alias
+
+    reservations = Reservation.objects.using(db_alias).filter(
+        status__in=['pending', 'confirmed']
+    ).order_by('reservation_date').iterator(chunk_size=500)
+
+    rows = []
+    for reservation in reservations:
+        seats = reservation.selected_seats
+        if isinstance(seats, str):
+            try:
+                seats = json.loads(seats)
+            except json.JSONDecodeError:
+                seats = []
+
+        for seat in dict.fromkeys(str(s) for s in seats or []):
+            rows.append(ReservedSeat(
+                reservation_id=reservation.id,
+                movie_detail_id=reservation.movie_detail_id,
+                selected_date=reservation.selected_date,
+                selected_showtime=reservation.selected_showtime,
+                seat=seat,
+            ))
+
+        if len(rows) >= 1000:
+            # Older double bookings keep the earliest reservation's seat
+            ReservedSeat.objects.using(db_alias).bulk_create(rows, ignore_conflicts=True)
+            rows = []
+
+    if rows:
+        ReservedSeat.objects.using(db_alias).bulk_create(rows, ignore_conflicts=True)
+
+
+def clear_reserved_seats(apps, schema_editor):
+    ReservedSeat = apps.get_model('reservations', 'ReservedSeat')
+    ReservedSeat.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_reservedseat'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reserved_seats, clear_reserved_seats),
+    ]
@@ -0,0 +1,60 @@
+# Generated manually to populate Screening counters from existing reservations
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+def showtime_capacity(detail, showtime):
+    # Same rule as MovieAdminDetails.get_showtime_capacity: legacy string
+    # showtimes seat the whole hall
+    for s in detail.showing_times or []:
+        if isinstance(s, dict) and s.get('time') == showtime:
+            return s.get('max_seats', 0)
+        if s == showtime:
+            return detail.hall.capacity if detail.hall else 0
+    return 0
+
+
+def backfill_screenings(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    MovieAdminDetails = apps.get_model('movies', 'MovieAdminDetails')
+    Screening = apps.get_model('movies', 'Screening')
+    db_alias = schema_editor.connection.alias
+
+    totals = Reservation.objects.using(db_alias).filter(
+        status__in=['pending', 'confirmed']
+    ).values('movie_detail_id', 'selected_date', 'selected_showtime').annotate(
+        total=Sum('number_of_seats')
+    ).order_by()
+
+    details = MovieAdminDetails.objects.using(db_alias).select_related('hall').in_bulk(
+        {row['movie_detail_id'] for row in totals}
+    )
+
+    Screening.objects.using(db_alias).bulk_create([
+        Screening(
+            movie_detail_id=row['movie_detail_id'],
+            date=row['selected_date'],
+            showtime=row['selected_showtime'],
+            capacity=showtime_capacity(details[row['movie_detail_id']], row['selected_showtime']),
+            seats_reserved=row['total'],
+        )
+        for row in totals
+    ], batch_size=500, ignore_conflicts=True)
+
+
+def clear_screenings(apps, schema_editor):
+    Screening = apps.get_model('movies', 'Screening')
+    Screening.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0010_screening'),
+        ('reservations', '0006_backfill_reserved_seats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_screenings, clear_screenings),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0011_screening_occupancy'),
+        ('reservations', '0007_backfill_screenings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='showtime',
+            field=models.TimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['movie_detail', 'selected_date', 'showtime', 'status'], name='reservation_showing_idx'),
+        ),
+    ]
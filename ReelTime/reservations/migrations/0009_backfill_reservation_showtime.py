@@ -0,0 +1,41 @@
+# Generated manually to parse existing showtime strings into Reservation.showtime
+
+from django.db import migrations
+from datetime import datetime
+
+SHOWTIME_FORMATS = ('%I:%M %p', '%H:%M', '%H:%M:%S')
+
+
+def parse_showtime(value):
+    value = str(value or '').strip().upper()
+    for fmt in SHOWTIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def backfill_showtime(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    db_alias = schema_editor.connection.alias
+
+    # Parse each distinct string once and update every reservation sharing it
+    showtimes = Reservation.objects.using(db_alias).values_list('selected_showtime', flat=True).distinct()
+    for selected_showtime in list(showtimes):
+        showtime = parse_showtime(selected_showtime)
+        if showtime is not None:
+            Reservation.objects.using(db_alias).filter(
+                selected_showtime=selected_showtime
+            ).update(showtime=showtime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0008_reservation_showtime'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_showtime, migrations.RunPython.noop),
+    ]
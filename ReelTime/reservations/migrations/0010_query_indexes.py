@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_query_indexes'),
+        ('reservations', '0009_backfill_reservation_showtime'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'selected_date'], name='reservation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['movie_detail', 'reservation_date'], name='reservation_detail_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['selected_date', 'reminder_sent', 'status'], name='reservation_reminder_idx'),
+        ),
+    ]
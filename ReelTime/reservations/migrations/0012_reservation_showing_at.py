@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0013_query_indexes'),
+        ('reservations', '0011_reminder_checkpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='showing_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'reminder_sent', 'showing_at'], name='reservation_reminder_due_idx'),
+        ),
+    ]
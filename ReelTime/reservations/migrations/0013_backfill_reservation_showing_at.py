@@ -0,0 +1,30 @@
+# Generated manually to fill Reservation.showing_at from selected_date and showtime
+
+from django.db import migrations
+from django.utils import timezone
+from datetime import datetime
+
+
+def backfill_showing_at(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    db_alias = schema_editor.connection.alias
+
+    # One update per distinct showing instead of one per reservation
+    showings = Reservation.objects.using(db_alias).filter(
+        showtime__isnull=False
+    ).values_list('selected_date', 'showtime').distinct()
+    for selected_date, showtime in list(showings):
+        Reservation.objects.using(db_alias).filter(
+            selected_date=selected_date, showtime=showtime
+        ).update(showing_at=timezone.make_aware(datetime.combine(selected_date, showtime)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0012_reservation_showing_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_showing_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated manually to give screenings of legacy string showtimes the hall's
+# capacity (0007 backfilled them with 0 before it matched get_showtime_capacity)
+
+from django.db import migrations
+
+
+def fix_legacy_screening_capacity(apps, schema_editor):
+    Screening = apps.get_model('movies', 'Screening')
+    db_alias = schema_editor.connection.alias
+
+    screenings = []
+    for screening in Screening.objects.using(db_alias).filter(capacity=0).select_related('movie_detail__hall'):
+        detail = screening.movie_detail
+        if screening.showtime in (detail.showing_times or []) and detail.hall:
+            screening.capacity = detail.hall.capacity
+            screenings.append(screening)
+
+    Screening.objects.using(db_alias).bulk_update(screenings, ['capacity'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0013_backfill_reservation_showing_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_legacy_screening_capacity, migrations.RunPython.noop),
+    ]
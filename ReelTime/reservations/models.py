@@ -1,20 +1,87 @@
 # reservations/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from movies.models import MovieAdminDetails
-from datetime import date, timedelta, datetime
-from .utils import send_reservation_confirmation_email, send_reservation_cancellation_email, send_reservation_reminder_email, send_reservation_edit_email
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from movies.models import MovieAdminDetails, parse_showtime
+from datetime import date, time, timedelta, datetime
+from notifications.outbox import coalesce_email, enqueue_email
+from .utils import merge_edit_payloads, send_reservation_reminder_email
+from .inventory import ACTIVE_STATUSES, sync_reserved_seats, sync_screening_counters, update_screening
+
+# Fields whose change affects which seats a reservation occupies or how many it counts
+INVENTORY_FIELDS = {
+    'movie_detail', 'selected_date', 'selected_showtime', 'selected_seats', 'number_of_seats', 'status',
+}
+
+# Reservations can be edited until 2 hours and cancelled until 1 hour before showtime
+MODIFY_CUTOFF = timedelta(hours=2)
+CANCEL_CUTOFF = timedelta(hours=1)
+
+# Listing order: confirmed first, then pending, then cancelled
+STATUS_ORDER = Case(
+    When(status='confirmed', then=0),
+    When(status='pending', then=1),
+    default=2,
+)
+
+# Keyset order for paged listings (see ReservationQuerySet.in_display_order)
+DISPLAY_ORDERING = ('status_rank', 'selected_date', 'start_time', 'id')
 
 def get_tomorrow():
     return date.today() + timedelta(days=1)
 
+
+def starts_after(moment):
+    """
+    Return a filter for reservations whose showing starts after ``moment``.
+
+    Reservations whose showtime couldn't be parsed have no ``showtime`` and
+    always match, as before.
+    """
+    moment = timezone.localtime(moment)
+    return (
+        Q(selected_date__gt=moment.date())
+        | Q(selected_date=moment.date(), showtime__gt=moment.time())
+        | Q(showtime__isnull=True)
+    )
+
+
+class ReservationQuerySet(models.QuerySet):
+    def in_display_order(self):
+        """
+        Annotate ``status_rank`` and ``start_time`` and order by ``DISPLAY_ORDERING``.
+
+        That is status (confirmed first), then date, then showtime. Unparsed
+        showtimes sort as midnight, so the keyset never compares NULLs.
+        """
+        return self.annotate(
+            status_rank=STATUS_ORDER,
+            start_time=Coalesce('showtime', Value(time.min), output_field=models.TimeField()),
+        ).order_by(*DISPLAY_ORDERING)
+
+    def with_time_windows(self, now=None):
+        """Annotate ``modifiable`` and ``cancellable`` flags computed in SQL."""
+        now = now or timezone.now()
+        active = ~Q(status='cancelled')
+        return self.annotate(
+            modifiable=Case(When(active & starts_after(now + MODIFY_CUTOFF), then=True), default=False),
+            cancellable=Case(When(active & starts_after(now + CANCEL_CUTOFF), then=True), default=False),
+        )
+
+
 class Reservation(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reservations')
     movie_detail = models.ForeignKey(MovieAdminDetails, on_delete=models.CASCADE, related_name='reservations')
     cinema_name = models.CharField(max_length=255)
     selected_date = models.DateField(default=get_tomorrow)
     selected_showtime = models.CharField(max_length=50)
+    # Parsed from selected_showtime on save so ordering and time windows run in SQL
+    showtime = models.TimeField(null=True, blank=True, editable=False)
+    # Aware start of the showing, so the reminder scheduler can scan a time window
+    showing_at = models.DateTimeField(null=True, blank=True, editable=False)
     number_of_seats = models.PositiveIntegerField(default=1)
     selected_seats = models.JSONField(default=list, blank=True)
     reservation_date = models.DateTimeField(auto_now_add=True)
@@ -30,9 +97,27 @@ class Reservation(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
 
+    objects = ReservationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-reservation_date']
         db_table = 'movies_reservation'
+        indexes = [
+            models.Index(
+                fields=['movie_detail', 'selected_date', 'showtime', 'status'],
+                name='reservation_showing_idx',
+            ),
+            models.Index(fields=['user', 'selected_date'], name='reservation_user_date_idx'),
+            models.Index(fields=['movie_detail', 'reservation_date'], name='reservation_detail_booked_idx'),
+            models.Index(
+                fields=['selected_date', 'reminder_sent', 'status'],
+                name='reservation_reminder_idx',
+            ),
+            models.Index(
+                fields=['status', 'reminder_sent', 'showing_at'],
+                name='reservation_reminder_due_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.movie_detail.movie.title} ({self.selected_date} {self.selected_showtime}) - ${self.total_cost}"
@@ -66,32 +151,28 @@ class Reservation(models.Model):
         """Calculate total cost based on price per seat and number of seats"""
         return self.movie_detail.price * self.number_of_seats
 
-    def can_be_modified(self):
-        """Check if reservation can be modified (not within 2 hours of showtime)"""
+    def starts_at(self):
+        """Return the aware datetime the showing starts, or None if the showtime is unknown."""
+        if self.showtime is None:
+            return None
+        return timezone.make_aware(datetime.combine(self.selected_date, self.showtime))
+
+    def _time_window_open(self, annotation, cutoff):
         if self.status == 'cancelled':
             return False
-            
-        # Parse showtime and date to check if it's within 2 hours
-        try:
-            showtime_dt = datetime.combine(self.selected_date, datetime.strptime(self.selected_showtime, '%I:%M %p').time())
-            now = datetime.now()
-            time_diff = showtime_dt - now
-            return time_diff.total_seconds() > 7200  # 2 hours in seconds
-        except:
-            return True
+        # Prefer the flag computed by ReservationQuerySet.with_time_windows()
+        if hasattr(self, annotation):
+            return getattr(self, annotation)
+        starts_at = self.starts_at()
+        return starts_at is None or starts_at - timezone.now() > cutoff
+
+    def can_be_modified(self):
+        """Check if reservation can be modified (not within 2 hours of showtime)"""
+        return self._time_window_open('modifiable', MODIFY_CUTOFF)
 
     def can_be_cancelled(self):
         """Check if reservation can be cancelled (not within 1 hour of showtime)"""
-        if self.status == 'cancelled':
-            return False
-            
-        try:
-            showtime_dt = datetime.combine(self.selected_date, datetime.strptime(self.selected_showtime, '%I:%M %p').time())
-            now = datetime.now()
-            time_diff = showtime_dt - now
-            return time_diff.total_seconds() > 3600  # 1 hour in seconds
-        except:
-            return True
+        return self._time_window_open('cancellable', CANCEL_CUTOFF)
     
     def is_same_day_showing(self):
         """Check if the showing date is today"""
@@ -107,43 +188,72 @@ class Reservation(models.Model):
         else:
             self.total_cost = 0.00
             
+        if isinstance(self.selected_date, str):
+            self.selected_date = datetime.strptime(self.selected_date, '%Y-%m-%d').date()
+
+        self.showtime = parse_showtime(self.selected_showtime)
+        self.showing_at = self.starts_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'selected_date', 'selected_showtime'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'showtime', 'showing_at'}
+
         # Validate before saving
         self.clean()
-            
-        super().save(*args, **kwargs)
-        
-        # Send confirmation email for new confirmed reservations (synchronous)
-        if is_new and self.status == 'confirmed' and not self.confirmation_sent:
-            self.send_confirmation_email()
+
+        sync_inventory = update_fields is None or bool(INVENTORY_FIELDS & set(update_fields))
+
+        # Reservation, its seat rows and the screening counters are written
+        # together so a seat clash rolls back the whole booking
+        with transaction.atomic():
+            previous = None
+            if sync_inventory and not is_new:
+                previous = Reservation.objects.filter(pk=self.pk).values(
+                    'movie_detail_id', 'selected_date', 'selected_showtime', 'status', 'number_of_seats'
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            if sync_inventory:
+                seat_changes = sync_reserved_seats(self)
+                sync_screening_counters(self, previous, seat_changes)
+
+            # Queue confirmation email for new confirmed reservations (sent in the background)
+            if is_new and self.status == 'confirmed' and not self.confirmation_sent:
+                self.send_confirmation_email()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            seats = list(self.reserved_seat_rows.values_list('seat', flat=True))
+            result = super().delete(*args, **kwargs)
+            if self.status in ACTIVE_STATUSES:
+                update_screening(
+                    self.movie_detail, self.selected_date, self.selected_showtime,
+                    -self.number_of_seats, removed=seats,
+                )
+            return result
 
     def send_confirmation_email(self):
-        """Send reservation confirmation email using SendGrid"""
-        try:
-            success = send_reservation_confirmation_email(self.id)
-            if success:
-                self.confirmation_sent = True
-                self.save(update_fields=['confirmation_sent'])
-                print(f"🟢 Confirmation email sent successfully for reservation {self.id}")
-            return success
-        except Exception as e:
-            print(f"🔴 Failed to send confirmation email: {e}")
-            return False
+        """Queue reservation confirmation email (delivered in the background)"""
+        return enqueue_email(
+            'reservation_confirmation',
+            self.user.email,
+            {'reservation_id': self.id},
+            idempotency_key=f"reservation:{self.id}:confirmation",
+        )
 
     def send_cancellation_email(self):
-        """Send reservation cancellation email using SendGrid"""
-        try:
-            success = send_reservation_cancellation_email(self.id)
-            if success:
-                print(f"🟢 Cancellation email sent successfully for reservation {self.id}")
-            return success
-        except Exception as e:
-            print(f"🔴 Failed to send cancellation email: {e}")
-            return False
+        """Queue reservation cancellation email (delivered in the background)"""
+        return enqueue_email(
+            'reservation_cancellation',
+            self.user.email,
+            {'reservation_id': self.id},
+            idempotency_key=f"reservation:{self.id}:cancellation",
+        )
         
     def send_reminder_email(self):
         """Send reservation reminder email using SendGrid"""
         try:
-            success = send_reservation_reminder_email(self.id)
+            success = send_reservation_reminder_email(self)
             if success:
                 self.reminder_sent = True
                 self.save(update_fields=['reminder_sent'])
@@ -154,12 +264,54 @@ class Reservation(models.Model):
             return False
         
     def send_edit_email(self, changes=None):
-        """Send reservation edit confirmation email using SendGrid"""
-        try:
-            success = send_reservation_edit_email(self.id, changes)
-            if success:
-                print(f"🟢 Edit confirmation email sent successfully for reservation {self.id}")
-            return success
-        except Exception as e:
-            print(f"🔴 Failed to send edit confirmation email: {e}")
-            return False
\ No newline at end of file
+        """
+        Queue reservation edit confirmation email (delivered in the background)
+
+        Edits made within EDIT_EMAIL_COALESCE_WINDOW of the first one are
+        summarised in the same email.
+        """
+        return coalesce_email(
+            'reservation_edit',
+            self.user.email,
+            f"reservation:{self.id}:edit",
+            {'reservation_id': self.id, 'changes': changes},
+            merge=merge_edit_payloads,
+            window=timedelta(seconds=settings.EDIT_EMAIL_COALESCE_WINDOW),
+        )
+
+
+class ReservedSeat(models.Model):
+    """One row per occupied seat of an active reservation."""
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='reserved_seat_rows')
+    movie_detail = models.ForeignKey(MovieAdminDetails, on_delete=models.CASCADE, related_name='reserved_seats')
+    selected_date = models.DateField()
+    selected_showtime = models.CharField(max_length=50)
+    seat = models.CharField(max_length=20)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['movie_detail', 'selected_date', 'selected_showtime', 'seat'],
+                name='unique_reserved_seat_per_screening',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.seat} ({self.selected_date} {self.selected_showtime})"
+
+
+class ReminderCheckpoint(models.Model):
+    """
+    Progress of the reminder run for one showing date.
+
+    ``last_reservation_id`` only advances past chunks that were fully sent,
+    so a restarted run resumes after it without skipping failed chunks.
+    """
+    run_date = models.DateField(unique=True)
+    last_reservation_id = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reminders for {self.run_date} (after #{self.last_reservation_id})"
@@ -1,3 +1,723 @@
-from django.test import TestCase
+import base64
+import importlib
+import json
+import re
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from halls.models import Hall
+from halls.utils import build_occupancy, seat_index
+from movies.catalog import filter_details, showings_of
+from movies.models import CanonicalMovie, Movie, MovieAdminDetails, Screening
+from movies.search import search_movie_ids, search_sql
+from notifications.backends import MemoryTransport
+from notifications.models import OutboundEmail
+from reel_time.pagination import seek_filter
+from .holds import BaseSeatHoldStore, LocMemSeatHoldStore, screening_key
+from .inventory import SeatUnavailableError, cancel_reservations, swap_reservation_seats, sync_reserved_seats
+from .models import CANCEL_CUTOFF, DISPLAY_ORDERING, MODIFY_CUTOFF, Reservation, ReservedSeat
+from .utils import send_reservation_reminder_email, showing_day_phrase
 
-# Create your tests here.
+# Tables the hot queries must reach through an index
+INDEXED_TABLES = ('movies_reservation', 'movies_movieadmindetails')
+
+
+def find_full_scans(plan):
+    """
+    Return the lines of an EXPLAIN plan that read a hot table without an index.
+
+    SQLite reports these as ``SCAN <table>`` (with no ``USING ... INDEX``),
+    PostgreSQL as ``Seq Scan on <table>``.
+    """
+    scans = []
+    for line in plan.splitlines():
+        for table in INDEXED_TABLES:
+            if re.search(rf'\bSeq Scan on {table}\b', line):
+                scans.append(line.strip())
+            elif re.search(rf'\bSCAN {table}\b', line) and 'INDEX' not in line:
+                scans.append(line.strip())
+    return scans
+
+
+class HotQueryPlanTests(TestCase):
+    """Fail when a hot query falls back to a sequential scan on a large dataset."""
+    ADMINS = 20
+    DETAILS_PER_ADMIN = 4
+    USERS = 200
+    RESERVATIONS = 6000
+    SHOWTIMES = ('10:00 AM', '1:30 PM', '4:00 PM', '7:30 PM')
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+
+        admins = User.objects.bulk_create([
+            User(username=f'admin{i}', email=f'admin{i}@example.com', is_admin=True, cinema_name=f'Cinema {i}')
+            for i in range(cls.ADMINS)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com')
+            for i in range(cls.USERS)
+        ])
+        halls = Hall.objects.bulk_create([
+            Hall(admin=admin, name=f'Hall {admin.username}', capacity=100)
+            for admin in admins
+        ])
+
+        movies = Movie.objects.bulk_create([
+            Movie(title=f'Movie {i}', title_key=f'movie {i}', description='Seeded for query plan tests')
+            for i in range(cls.ADMINS * cls.DETAILS_PER_ADMIN)
+        ])
+        canonicals = CanonicalMovie.objects.bulk_create([
+            CanonicalMovie(title=movie.title, title_key=movie.title_key)
+            for movie in movies
+        ])
+        details = MovieAdminDetails.objects.bulk_create([
+            MovieAdminDetails(
+                movie=movies[i],
+                canonical_movie=canonicals[i],
+                admin=admins[i % cls.ADMINS],
+                hall=halls[i % cls.ADMINS],
+                release_date=today - timedelta(days=60 - i % 30),
+                end_date=today + timedelta(days=i % 90 - 45),
+                price=250,
+                showing_times=[{"time": t, "max_seats": 100} for t in cls.SHOWTIMES],
+            )
+            for i in range(len(movies))
+        ])
+
+        # bulk_create skips Reservation.save(), so no seat rows or emails
+        Reservation.objects.bulk_create([
+            Reservation(
+                user=users[i % cls.USERS],
+                movie_detail=details[i % len(details)],
+                cinema_name='Seeded',
+                selected_date=today + timedelta(days=i % 60 - 30),
+                selected_showtime=cls.SHOWTIMES[i % len(cls.SHOWTIMES)],
+                showtime=time(10 + i % 4 * 3, 0),
+                showing_at=timezone.make_aware(
+                    datetime.combine(today + timedelta(days=i % 60 - 30), time(10 + i % 4 * 3, 0))
+                ),
+                number_of_seats=1,
+                selected_seats=[f'1-{i % 10}'],
+                status=('confirmed', 'pending', 'cancelled')[i % 3],
+                reminder_sent=i % 2 == 0,
+            )
+            for i in range(cls.RESERVATIONS)
+        ], batch_size=1000)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.today = today
+        cls.admin = admins[0]
+        cls.user = users[0]
+        cls.detail = details[0]
+
+    def assertUsesIndexes(self, queryset):
+        plan = queryset.explain()
+        self.assertEqual(find_full_scans(plan), [], f"Sequential scan in plan:\n{plan}")
+
+    def test_showing_lookup(self):
+        self.assertUsesIndexes(Reservation.objects.filter(
+            movie_detail=self.detail,
+            selected_date=self.today,
+            showtime=time(13, 0),
+            status__in=('pending', 'confirmed'),
+        ))
+
+    def test_user_reservations_page(self):
+        cursor = [0, self.today + timedelta(days=10), time(13, 0), 0]
+        self.assertUsesIndexes(
+            Reservation.objects.filter(user=self.user, selected_date__gte=self.today)
+            .in_display_order().with_time_windows()
+            .filter(seek_filter(DISPLAY_ORDERING, cursor))[:21]
+        )
+
+    def test_admin_reservations_page(self):
+        cursor = [timezone.now(), 1000]
+        self.assertUsesIndexes(
+            Reservation.objects.filter(movie_detail__admin=self.admin)
+            .order_by('-reservation_date', '-id')
+            .filter(seek_filter(('-reservation_date', '-id'), cursor))[:6]
+        )
+
+    def test_admin_recent_reservations(self):
+        self.assertUsesIndexes(
+            Reservation.objects.filter(movie_detail__admin=self.admin).order_by('-reservation_date')[:5]
+        )
+
+    def test_admin_upcoming_reservations(self):
+        self.assertUsesIndexes(
+            Reservation.objects.filter(movie_detail__admin=self.admin, selected_date__gte=self.today)
+        )
+
+    def test_reminder_batch(self):
+        self.assertUsesIndexes(Reservation.objects.filter(
+            selected_date=self.today + timedelta(days=1),
+            status='confirmed',
+            reminder_sent=False,
+        ))
+
+    def test_reminder_window(self):
+        now = timezone.now()
+        self.assertUsesIndexes(Reservation.objects.filter(
+            status='confirmed',
+            reminder_sent=False,
+            showing_at__gt=now,
+            showing_at__lte=now + timedelta(hours=24),
+        ).order_by('showing_at', 'id'))
+
+    def test_same_film_details(self):
+        self.assertUsesIndexes(showings_of(self.detail.movie).select_related('movie'))
+
+    def test_now_showing_details(self):
+        self.assertUsesIndexes(
+            MovieAdminDetails.objects.select_related('movie').filter(end_date__gte=self.today)
+        )
+
+    def test_filtered_now_showing_details(self):
+        queryset = filter_details(
+            MovieAdminDetails.objects.select_related('movie').filter(end_date__gte=self.today),
+            genres=['horror', 'drama'],
+            ratings=['PG'],
+        )
+        self.assertUsesIndexes(queryset)
+        # No B-tree serves genre_mask & mask > 0 (and rating has two values), so both are
+        # checked on movies joined by primary key from the running details
+        self.assertIn('detail_end_date_idx', queryset.explain())
+
+    def test_admin_current_details(self):
+        self.assertUsesIndexes(
+            MovieAdminDetails.objects.filter(admin=self.admin, end_date__gte=self.today)
+        )
+
+    def test_movie_search(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest('No full-text index on this backend')
+        self.assertEqual(search_movie_ids('movie 7')[0], Movie.objects.get(title='Movie 7').id)
+
+        sql, params = search_sql(connection.vendor, ['movie', '7'], limit=20)
+        explain = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Too few movies for the planner to prefer the GIN index; check it can be used
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(explain + sql, params)
+            plan = '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+        self.assertNotRegex(plan, r'\bSeq Scan on movies_movie\b|\bSCAN movies_movie\b')
+
+
+class ShowingTestCase(TestCase):
+    """One showing in an eight-seat hall (two rows of four behind the screen)."""
+    SHOWTIME = '7:30 PM'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'cinema', 'cinema@example.com', 'password', is_admin=True, cinema_name='Cinema 1'
+        )
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.other_user = User.objects.create_user('bob', 'bob@example.com', 'password')
+        layout = [{"row": 0, "col": col, "type": "screen"} for col in range(4)] + [
+            {"row": row, "col": col, "type": "seat"} for row in (1, 2) for col in range(4)
+        ]
+        cls.hall = Hall.objects.create(admin=cls.admin, name='Hall 1', capacity=8, layout=layout)
+        cls.movie = Movie.objects.create(title='Heneral Luna', description='Seeded for behavior tests')
+        cls.detail = MovieAdminDetails.objects.create(
+            movie=cls.movie,
+            admin=cls.admin,
+            hall=cls.hall,
+            release_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            price=250,
+            showing_times=[{"time": cls.SHOWTIME, "max_seats": 8}],
+        )
+        cls.date = date.today() + timedelta(days=1)
+
+    def reserve(self, seats, user=None, status='confirmed', **kwargs):
+        return Reservation.objects.create(
+            user=user or self.user,
+            movie_detail=self.detail,
+            cinema_name=self.admin.cinema_name,
+            selected_date=kwargs.pop('selected_date', self.date),
+            selected_showtime=kwargs.pop('selected_showtime', self.SHOWTIME),
+            number_of_seats=len(seats),
+            selected_seats=seats,
+            status=status,
+            **kwargs,
+        )
+
+    def seat_rows(self, reservation):
+        return set(reservation.reserved_seat_rows.values_list('seat', flat=True))
+
+
+class ReservationTimeWindowTests(ShowingTestCase):
+    def start(self, showtime):
+        return timezone.make_aware(datetime.combine(self.date, showtime))
+
+    def windows(self, reservation, now):
+        """Return ``(modifiable, cancellable)`` from SQL and from the instance methods."""
+        annotated = Reservation.objects.with_time_windows(now).get(pk=reservation.pk)
+        with mock.patch('reservations.models.timezone.now', return_value=now):
+            fresh = Reservation.objects.get(pk=reservation.pk)
+            from_python = (fresh.can_be_modified(), fresh.can_be_cancelled())
+        from_sql = (annotated.modifiable, annotated.cancellable)
+        self.assertEqual(from_sql, from_python)
+        return from_sql
+
+    def test_legacy_showtimes_are_parsed_on_save(self):
+        for selected_showtime, expected in (('7:30 PM', time(19, 30)), ('19:30', time(19, 30)), ('soon', None)):
+            with self.subTest(selected_showtime=selected_showtime):
+                reservation = self.reserve(['1-0'], selected_showtime=selected_showtime)
+                reservation.refresh_from_db()
+                self.assertEqual(reservation.showtime, expected)
+                self.assertEqual(reservation.showing_at, expected and self.start(expected))
+
+    def test_cutoffs_close_modify_before_cancel(self):
+        for selected_showtime in ('7:30 PM', '19:30'):
+            with self.subTest(selected_showtime=selected_showtime):
+                reservation = self.reserve(['1-0'], selected_showtime=selected_showtime)
+                start = self.start(time(19, 30))
+                minute = timedelta(minutes=1)
+
+                self.assertEqual(self.windows(reservation, start - MODIFY_CUTOFF - minute), (True, True))
+                self.assertEqual(self.windows(reservation, start - MODIFY_CUTOFF), (False, True))
+                self.assertEqual(self.windows(reservation, start - CANCEL_CUTOFF - minute), (False, True))
+                self.assertEqual(self.windows(reservation, start - CANCEL_CUTOFF), (False, False))
+
+    def test_unparsed_showtimes_stay_open_until_cancelled(self):
+        reservation = self.reserve(['1-0'], selected_showtime='soon')
+        self.assertEqual(self.windows(reservation, self.start(time(23, 59))), (True, True))
+
+        reservation.status = 'cancelled'
+        reservation.save()
+        self.assertEqual(self.windows(reservation, self.start(time(0, 0))), (False, False))
+
+    def test_backfills_parse_existing_rows(self):
+        parsed = self.reserve(['1-0'], selected_showtime=' 7:30 pm ')
+        unparsed = self.reserve(['1-1'], selected_showtime='soon')
+        Reservation.objects.update(showtime=None, showing_at=None)
+
+        schema_editor = SimpleNamespace(connection=connection)
+        importlib.import_module('reservations.migrations.0009_backfill_reservation_showtime').backfill_showtime(
+            apps, schema_editor
+        )
+        importlib.import_module('reservations.migrations.0013_backfill_reservation_showing_at').backfill_showing_at(
+            apps, schema_editor
+        )
+
+        parsed.refresh_from_db()
+        unparsed.refresh_from_db()
+        self.assertEqual((parsed.showtime, parsed.showing_at), (time(19, 30), self.start(time(19, 30))))
+        self.assertEqual((unparsed.showtime, unparsed.showing_at), (None, None))
+
+
+class ReservationListingTests(ShowingTestCase):
+    def listing(self, **params):
+        self.client.force_login(self.user)
+        return self.client.get(reverse('reservations'), params, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+
+    def test_pages_list_confirmed_first_then_by_schedule(self):
+        later = self.date + timedelta(days=1)
+        pending = self.reserve(['1-0'], status='pending')
+        cancelled = self.reserve(['1-1'], status='cancelled')
+        confirmed_later = self.reserve(['1-0'], selected_date=later)
+        confirmed_evening = self.reserve(['1-2'])
+        confirmed_noon = self.reserve(['1-0'], selected_showtime='12:00 PM')
+
+        ids, cursor = [], None
+        while True:
+            page = self.listing(per_page=2, **({'cursor': cursor} if cursor else {}))
+            ids.extend(result['id'] for result in page['results'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(ids, [
+            confirmed_noon.id, confirmed_evening.id, confirmed_later.id, pending.id, cancelled.id,
+        ])
+
+
+class SeatInventoryTests(ShowingTestCase):
+    def test_active_reservation_claims_its_seats(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        self.assertEqual(self.seat_rows(reservation), {'1-0', '1-1'})
+
+    def test_clashing_reservation_is_rejected(self):
+        self.reserve(['1-0', '1-1'])
+        with self.assertRaises(SeatUnavailableError) as raised:
+            self.reserve(['1-1', '1-2'], user=self.other_user)
+
+        self.assertEqual(raised.exception.seats, ['1-1'])
+        # The whole booking rolled back, including its free seat
+        self.assertFalse(Reservation.objects.filter(user=self.other_user).exists())
+        self.assertFalse(ReservedSeat.objects.filter(seat='1-2').exists())
+
+    def test_same_seat_at_another_showing_is_free(self):
+        self.reserve(['1-0'])
+        other = self.reserve(['1-0'], user=self.other_user, selected_date=self.date + timedelta(days=1))
+        self.assertEqual(self.seat_rows(other), {'1-0'})
+
+    def test_sync_reports_added_and_removed_seats(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        reservation.selected_seats = ['1-1', '1-2']
+
+        changes = sync_reserved_seats(reservation)
+
+        key = (self.detail.id, self.date, self.SHOWTIME)
+        self.assertEqual(changes, {key: ({'1-2'}, {'1-0'})})
+        self.assertEqual(self.seat_rows(reservation), {'1-1', '1-2'})
+
+    def test_cancelling_frees_the_seats(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        reservation.status = 'cancelled'
+        reservation.save()
+
+        self.assertEqual(self.seat_rows(reservation), set())
+        self.reserve(['1-0'], user=self.other_user)
+
+
+class ScreeningCounterTests(ShowingTestCase):
+    def screening(self, selected_date=None):
+        return Screening.objects.get(
+            movie_detail=self.detail, date=selected_date or self.date, showtime=self.SHOWTIME
+        )
+
+    def test_booking_counts_seats(self):
+        self.reserve(['1-0', '1-1'])
+        self.reserve(['2-0'], user=self.other_user, status='pending')
+
+        screening = self.screening()
+        self.assertEqual(screening.capacity, 8)
+        self.assertEqual(screening.seats_reserved, 3)
+        self.assertEqual(self.detail.get_remaining_seats(self.SHOWTIME, self.date), 5)
+
+    def test_editing_seats_adjusts_the_count(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        reservation.selected_seats = ['1-0']
+        reservation.number_of_seats = 1
+        reservation.save()
+        self.assertEqual(self.screening().seats_reserved, 1)
+
+    def test_seat_count_only_update_adjusts_the_count(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        reservation.number_of_seats = 1
+        reservation.save(update_fields=['number_of_seats'])
+        self.assertEqual(self.screening().seats_reserved, 1)
+
+    def test_moving_date_moves_the_count(self):
+        reservation = self.reserve(['1-0', '1-1'])
+        reservation.selected_date = self.date + timedelta(days=1)
+        reservation.save()
+
+        self.assertEqual(self.screening().seats_reserved, 0)
+        self.assertEqual(self.screening(self.date + timedelta(days=1)).seats_reserved, 2)
+
+    def test_cancel_and_delete_release_the_count(self):
+        cancelled = self.reserve(['1-0', '1-1'])
+        deleted = self.reserve(['2-0'], user=self.other_user)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        deleted.delete()
+        self.assertEqual(self.screening().seats_reserved, 0)
+
+    def test_bulk_cancel_releases_the_count(self):
+        self.reserve(['1-0', '1-1'], status='pending')
+        self.reserve(['2-0'], user=self.other_user)
+
+        cancelled = cancel_reservations(Reservation.objects.filter(status='pending'))
+
+        self.assertEqual(cancelled, 1)
+        self.assertEqual(self.screening().seats_reserved, 1)
+        self.assertFalse(ReservedSeat.objects.filter(seat__in=['1-0', '1-1']).exists())
+
+    def test_reconcile_repairs_drift(self):
+        self.reserve(['1-0', '1-1'])
+        Screening.objects.update(seats_reserved=7)
+        # bulk_create skips save(), so this showing has no counter row yet
+        Reservation.objects.bulk_create([Reservation(
+            user=self.other_user, movie_detail=self.detail, cinema_name=self.admin.cinema_name,
+            selected_date=self.date + timedelta(days=2), selected_showtime=self.SHOWTIME,
+            number_of_seats=3, selected_seats=['1-0', '1-1', '1-2'], status='confirmed',
+        )])
+
+        out = StringIO()
+        call_command('reconcile_screenings', '--dry-run', stdout=out)
+        self.assertIn('1 screenings drifted, 1 missing', out.getvalue())
+        self.assertEqual(self.screening().seats_reserved, 7)
+
+        call_command('reconcile_screenings', stdout=StringIO())
+        self.assertEqual(self.screening().seats_reserved, 2)
+        self.assertEqual(self.screening(self.date + timedelta(days=2)).seats_reserved, 3)
+
+    def test_reconcile_rebuilds_occupancy(self):
+        self.reserve(['1-0', '2-3'])
+        Screening.objects.update(occupancy=b'\xff\xff', occupancy_layout='stale')
+
+        out = StringIO()
+        call_command('reconcile_screenings', stdout=out)
+
+        self.assertIn('occupancy rebuilt', out.getvalue())
+        screening = self.screening()
+        self.assertEqual(bytes(screening.occupancy), build_occupancy(['1-0', '2-3'], self.hall.rows, self.hall.cols))
+        self.assertEqual(screening.occupancy_layout, self.hall.layout_version)
+
+    def test_reconcile_seats_legacy_showtimes_by_hall_capacity(self):
+        MovieAdminDetails.objects.filter(id=self.detail.id).update(showing_times=['1:00 PM'])
+        Screening.objects.create(movie_detail=self.detail, date=self.date, showtime='1:00 PM', capacity=0)
+
+        call_command('reconcile_screenings', stdout=StringIO())
+
+        self.detail.refresh_from_db()
+        screening = Screening.objects.get(showtime='1:00 PM')
+        self.assertEqual(screening.capacity, self.hall.capacity)
+        self.assertEqual(self.detail.get_remaining_seats('1:00 PM', self.date), self.hall.capacity)
+
+
+class SeatOccupancyTests(ShowingTestCase):
+    def seat_map(self, **params):
+        self.client.force_login(self.user)
+        url = reverse('get_seat_map', args=[self.detail.id, self.date.isoformat(), self.SHOWTIME])
+        return self.client.get(url, params).json()
+
+    def occupied(self, data):
+        """Decode the seat map's occupancy bitset back into seat ids."""
+        bits = base64.b64decode(data['occupancy'])
+        cells = [cell for cell in self.hall.layout if cell['type'] == 'seat']
+        seats = {f"{cell['row']}-{cell['col']}" for cell in cells}
+        return {
+            seat for seat in seats
+            if bits[seat_index(seat, data['width']) >> 3] >> (seat_index(seat, data['width']) & 7) & 1
+        }
+
+    def test_seat_map_reports_booked_seats(self):
+        self.reserve(['1-0', '2-3'])
+        cancelled = self.reserve(['1-1'], user=self.other_user)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+
+        data = self.seat_map()
+        self.assertEqual(data['width'], 4)
+        self.assertEqual(self.occupied(data), {'1-0', '2-3'})
+        self.assertEqual(len(data['seat_map']), 12)
+
+        # Clients that already have this layout only get the bitset
+        self.assertNotIn('seat_map', self.seat_map(layout_version=data['layout_version']))
+
+    def test_occupancy_rebuilt_after_layout_change(self):
+        self.reserve(['1-0', '2-3'])
+        self.hall.layout = self.hall.layout + [{"row": 1, "col": 4, "type": "seat"}]
+        self.hall.capacity = 9
+        self.hall.save()
+
+        data = self.seat_map()
+        self.assertEqual(data['width'], 5)
+        self.assertEqual(self.occupied(data), {'1-0', '2-3'})
+
+
+class SeatHoldTests(ShowingTestCase):
+    def setUp(self):
+        self.store = LocMemSeatHoldStore()
+        self.key = screening_key(self.detail.id, self.date, self.SHOWTIME)
+        self.now = 1_000_000.0
+        clock = mock.patch('reservations.holds.time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_store_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            BaseSeatHoldStore()
+
+    def test_hold_blocks_other_owners_until_it_expires(self):
+        self.assertEqual(self.store.hold(self.key, ['1-0', '1-1'], self.user.id, ttl=300), set())
+        self.assertEqual(self.store.hold(self.key, ['1-1', '1-2'], self.other_user.id, ttl=300), {'1-1'})
+        self.assertEqual(self.store.held_seats(self.key, exclude_owner=self.other_user.id), {'1-0', '1-1'})
+
+        self.now += 301
+        self.assertEqual(self.store.held_seats(self.key), set())
+        self.assertEqual(self.store.hold(self.key, ['1-1', '1-2'], self.other_user.id, ttl=300), set())
+
+    def test_hold_replaces_the_owners_selection(self):
+        self.store.hold(self.key, ['1-0', '1-1'], self.user.id, ttl=300)
+        self.store.hold(self.key, ['2-0'], self.user.id, ttl=300)
+        self.assertEqual(self.store.held_seats(self.key), {'2-0'})
+
+        self.store.release(self.key, self.user.id)
+        self.assertEqual(self.store.held_seats(self.key), set())
+
+    def test_purge_drops_only_expired_holds(self):
+        self.store.hold(self.key, ['1-0', '1-1'], self.user.id, ttl=60)
+        self.store.hold(self.key, ['2-0'], self.other_user.id, ttl=600)
+        self.now += 120
+        self.assertEqual(self.store.purge_expired(), 2)
+        self.assertEqual(self.store.held_seats(self.key), {'2-0'})
+
+    def test_hold_view_rejects_seats_held_by_others(self):
+        self.store.hold(self.key, ['1-1'], self.other_user.id, ttl=300)
+        self.client.force_login(self.user)
+        with mock.patch('movies.views.get_hold_store', return_value=self.store):
+            response = self.client.post(reverse('hold_seats', args=[self.detail.id]), {
+                'selected_date': self.date.isoformat(),
+                'selected_showtime': self.SHOWTIME,
+                'selected_seats': '["1-0", "1-1"]',
+            })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], ['1-1'])
+        self.assertEqual(self.store.held_seats(self.key, exclude_owner=self.other_user.id), set())
+
+    def test_malformed_dates_are_rejected(self):
+        self.client.force_login(self.user)
+        with mock.patch('movies.views.get_hold_store', return_value=self.store):
+            for selected_date in ('tomorrow', '2025-13-40'):
+                with self.subTest(selected_date=selected_date):
+                    response = self.client.post(reverse('hold_seats', args=[self.detail.id]), {
+                        'selected_date': selected_date,
+                        'selected_showtime': self.SHOWTIME,
+                        'selected_seats': '["1-0"]',
+                    })
+                    self.assertEqual(response.status_code, 400)
+                    response = self.client.get(
+                        reverse('get_seat_map', args=[self.detail.id, selected_date, self.SHOWTIME])
+                    )
+                    self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.store.held_seats(screening_key(self.detail.id, 'tomorrow', self.SHOWTIME)), set())
+
+    def test_hold_key_uses_the_parsed_date(self):
+        self.client.force_login(self.user)
+        unpadded = f"{self.date.year}-{self.date.month}-{self.date.day}"
+        with mock.patch('movies.views.get_hold_store', return_value=self.store):
+            response = self.client.post(reverse('hold_seats', args=[self.detail.id]), {
+                'selected_date': unpadded,
+                'selected_showtime': self.SHOWTIME,
+                'selected_seats': '["1-0"]',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.store.held_seats(self.key), {'1-0'})
+
+    def test_sweeper_releases_holds_and_cancels_stale_pending(self):
+        self.store.hold(self.key, ['2-0'], self.other_user.id, ttl=60)
+        stale = self.reserve(['1-0', '1-1'], status='pending')
+        fresh = self.reserve(['1-2'], user=self.other_user, status='pending')
+        Reservation.objects.filter(pk=stale.pk).update(reservation_date=timezone.now() - timedelta(hours=1))
+        self.now += 120
+
+        out = StringIO()
+        with mock.patch('reservations.management.commands.sweep_seat_holds.get_hold_store', return_value=self.store):
+            call_command('sweep_seat_holds', '--pending-ttl', '900', stdout=out)
+
+        self.assertIn('Released 1 expired seat holds and cancelled 1 stale pending', out.getvalue())
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), ('cancelled', 'pending'))
+        self.assertEqual(self.seat_rows(stale), set())
+
+
+class SeatSwapTests(ShowingTestCase):
+    def setUp(self):
+        self.reservation = self.reserve(['1-0', '1-1'])
+        self.reserve(['1-2'], user=self.other_user)
+        self.client.force_login(self.user)
+
+    def edit(self, seats, ajax=True):
+        headers = {'X-Requested-With': 'XMLHttpRequest'} if ajax else {}
+        return self.client.post(
+            reverse('edit_reservation', args=[self.reservation.id]),
+            {'selected_seats': seats if isinstance(seats, str) else json.dumps(seats)},
+            headers=headers,
+        )
+
+    def test_swap_moves_seats_and_counters(self):
+        result = swap_reservation_seats(self.reservation, ['2-0'])
+
+        self.assertTrue(result.ok)
+        self.assertEqual((result.old_seats, result.seats), (['1-0', '1-1'], ['2-0']))
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.number_of_seats, 1)
+        self.assertEqual(self.reservation.total_cost, 250)
+        self.assertEqual(self.seat_rows(self.reservation), {'2-0'})
+        screening = Screening.objects.get(movie_detail=self.detail, date=self.date, showtime=self.SHOWTIME)
+        self.assertEqual(screening.seats_reserved, 2)
+
+    def test_conflicting_swap_returns_409_and_changes_nothing(self):
+        screening = Screening.objects.get(movie_detail=self.detail, date=self.date, showtime=self.SHOWTIME)
+
+        response = self.edit(['1-1', '1-2'])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], ['1-2'])
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.selected_seats, ['1-0', '1-1'])
+        self.assertEqual(self.seat_rows(self.reservation), {'1-0', '1-1'})
+        screening_after = Screening.objects.get(pk=screening.pk)
+        self.assertEqual(
+            (screening_after.seats_reserved, bytes(screening_after.occupancy)),
+            (screening.seats_reserved, bytes(screening.occupancy)),
+        )
+        self.assertFalse(OutboundEmail.objects.filter(kind='reservation_edit').exists())
+
+    def test_successful_edit_queues_one_email(self):
+        response = self.edit(['2-0', '2-1'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['redirect_url'], reverse('reservations'))
+        self.assertEqual(self.seat_rows(self.reservation), {'2-0', '2-1'})
+        self.assertEqual(OutboundEmail.objects.filter(kind='reservation_edit').count(), 1)
+
+    def test_ajax_validation_errors_are_json(self):
+        for seats in ('not json', [], ['2-0', '2-1', '2-2']):
+            response = self.edit(seats)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json()['success'])
+        self.assertEqual(self.seat_rows(self.reservation), {'1-0', '1-1'})
+
+    def test_ajax_edit_by_another_user_is_forbidden(self):
+        self.client.force_login(self.other_user)
+        response = self.edit(['2-0'])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.seat_rows(self.reservation), {'1-0', '1-1'})
+
+    def test_form_post_conflict_redirects_back(self):
+        response = self.edit(['1-2'], ajax=False)
+        self.assertRedirects(
+            response, reverse('edit_reservation', args=[self.reservation.id]), fetch_redirect_response=False
+        )
+
+
+class ReminderEmailTests(ShowingTestCase):
+    def at(self, day, hour):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def test_phrase_follows_the_time_left_before_the_showing(self):
+        reservation = self.reserve(['1-0'])
+        day_before = self.date - timedelta(days=1)
+
+        self.assertEqual(showing_day_phrase(reservation, now=self.at(self.date, 17)), 'today')
+        self.assertEqual(showing_day_phrase(reservation, now=self.at(day_before, 19)), 'tomorrow')
+        self.assertEqual(
+            showing_day_phrase(reservation, now=self.at(day_before - timedelta(days=2), 10)),
+            f"on {self.date:%A, %B} {self.date.day}",
+        )
+
+    @override_settings(EMAIL_TRANSPORT='notifications.backends.MemoryTransport')
+    def test_reminder_says_when_the_showing_is(self):
+        MemoryTransport.clear()
+        showing_date = date.today() + timedelta(days=3)
+        reservation = self.reserve(['1-0'], selected_date=showing_date)
+        when = f"on {showing_date:%A, %B} {showing_date.day}"
+
+        self.assertTrue(send_reservation_reminder_email(reservation))
+
+        email = MemoryTransport.outbox[-1]
+        self.assertEqual(email['subject'], f"⏰ Movie Reminder - {self.movie.title} {when}!")
+        self.assertIn(f"reservation {when}!", email['text'])
+        self.assertIn(f"<strong>{when}</strong>", email['html'])
+        self.assertNotIn('tomorrow', email['text'] + email['html'])
@@ -1,46 +1,46 @@
 # reservations/utils.py
 import logging
 from django.conf import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, To
+from django.utils import timezone
+from notifications.emails import render_email
+from notifications.transport import send_email, send_template_batch
 
 logger = logging.getLogger(__name__)
 
-def send_sendgrid_email(to_email, subject, plain_text_content, html_content=None):
-    """
-    Send email using SendGrid Web API
-    """
-    try:
-        # Initialize SendGrid client
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        
-        # Create Mail object
-        from_email = settings.SENDGRID_SENDER_EMAIL
-        to_emails = [To(email=to_email)]
-        
-        message = Mail(
-            from_email=from_email,
-            to_emails=to_emails,
-            subject=subject,
-            plain_text_content=plain_text_content,
-            html_content=html_content
-        )
-        
-        # Send email
-        response = sg.send(message)
-        
-        if response.status_code in [200, 202]:
-            print(f"🟢 SendGrid: Email sent successfully to {to_email}, Status: {response.status_code}")
-            return True
-        else:
-            print(f"🔴 SendGrid: Failed to send email, Status: {response.status_code}, Body: {response.body}")
-            logger.error(f"SendGrid API error: {response.status_code} - {response.body}")
-            return False
-            
-    except Exception as e:
-        print(f"🔴 SendGrid: Exception occurred: {e}")
-        logger.error(f"SendGrid exception: {e}")
-        return False
+def reservation_email_context(reservation):
+    """Return the template context shared by every reservation email."""
+    user = reservation.user
+    return {
+        'name': user.first_name or user.username,
+        'movie_title': reservation.movie_detail.movie.title,
+        'cinema_name': reservation.cinema_name,
+        'date': str(reservation.selected_date),
+        'showtime': reservation.selected_showtime,
+        'number_of_seats': reservation.number_of_seats,
+        'seats': ', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified',
+        'total_cost': str(reservation.total_cost),
+        'reservation_id': reservation.id,
+    }
+
+def reservation_summary(reservation):
+    """Return the JSON listing entry for a reservation (paged reservation listings)."""
+    summary = {
+        'id': reservation.id,
+        'movie_title': reservation.movie_detail.movie.title,
+        'cinema_name': reservation.cinema_name,
+        'selected_date': reservation.selected_date.isoformat(),
+        'selected_showtime': reservation.selected_showtime,
+        'number_of_seats': reservation.number_of_seats,
+        'selected_seats': reservation.selected_seats,
+        'total_cost': str(reservation.total_cost),
+        'status': reservation.status,
+        'reservation_date': reservation.reservation_date.isoformat(),
+    }
+    for attr in ('formatted_seat_labels', 'modifiable', 'cancellable'):
+        if hasattr(reservation, attr):
+            summary[attr] = getattr(reservation, attr)
+    return summary
+
 
 def send_reservation_confirmation_email(reservation_id):
     """
@@ -54,68 +54,12 @@ def send_reservation_confirmation_email(reservation_id):
         user = reservation.user
         
         subject = f"🎬 Reservation Confirmed - {reservation.movie_detail.movie.title}"
-        
-        # Plain text content
-        plain_text_message = (
-            f"Hello {user.first_name or user.username},\n\n"
-            f"Your movie reservation has been confirmed!\n\n"
-            f"📋 Reservation Details:\n"
-            f"Movie: {reservation.movie_detail.movie.title}\n"
-            f"Cinema: {reservation.cinema_name}\n"
-            f"Date: {reservation.selected_date}\n"
-            f"Showtime: {reservation.selected_showtime}\n"
-            f"Number of Seats: {reservation.number_of_seats}\n"
-            f"Seats: {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}\n"
-            f"Total Cost: ${reservation.total_cost}\n"
-            f"Reservation ID: {reservation.id}\n\n"
-            f"We look forward to seeing you at the cinema!\n\n"
-            f"Thank you for choosing ReelTime!"
+        plain_text_message, html_message = render_email(
+            'reservations/emails/confirmation', reservation_email_context(reservation)
         )
         
-        # HTML content (optional but recommended)
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #f8f9fa; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .details {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-                .footer {{ padding: 20px; text-align: center; color: #666; font-size: 14px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🎬 Reservation Confirmed!</h1>
-            </div>
-            <div class="content">
-                <p>Hello <strong>{user.first_name or user.username}</strong>,</p>
-                <p>Your movie reservation has been confirmed!</p>
-                
-                <div class="details">
-                    <h3>📋 Reservation Details:</h3>
-                    <p><strong>Movie:</strong> {reservation.movie_detail.movie.title}</p>
-                    <p><strong>Cinema:</strong> {reservation.cinema_name}</p>
-                    <p><strong>Date:</strong> {reservation.selected_date}</p>
-                    <p><strong>Showtime:</strong> {reservation.selected_showtime}</p>
-                    <p><strong>Number of Seats:</strong> {reservation.number_of_seats}</p>
-                    <p><strong>Seats:</strong> {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}</p>
-                    <p><strong>Total Cost:</strong> ${reservation.total_cost}</p>
-                    <p><strong>Reservation ID:</strong> {reservation.id}</p>
-                </div>
-                
-                <p>We look forward to seeing you at the cinema!</p>
-            </div>
-            <div class="footer">
-                <p>Thank you for choosing <strong>ReelTime</strong>!</p>
-            </div>
-        </body>
-        </html>
-        """
-        
         # Send email using SendGrid
-        success = send_sendgrid_email(
+        success = send_email(
             to_email=user.email,
             subject=subject,
             plain_text_content=plain_text_message,
@@ -138,71 +82,77 @@ def send_reservation_confirmation_email(reservation_id):
         logger.error(f"Error sending confirmation email for reservation {reservation_id}: {e}")
         return False
 
-def send_reservation_reminder_email(reservation_id):
+def deliver_reservation_confirmation(reservation_id):
+    """
+    Outbox sender for confirmation emails: send and mark the reservation
+    as confirmed-by-email.
+    """
+    from .models import Reservation
+
+    success = send_reservation_confirmation_email(reservation_id)
+    if success:
+        Reservation.objects.filter(id=reservation_id).update(confirmation_sent=True)
+    return success
+
+def showing_day_phrase(reservation, now=None):
+    """
+    Return when a reservation's showing is, relative to ``now``: "today",
+    "tomorrow" or "on Friday, October 17".
+
+    Reminders go out a configurable lead time before the showtime, so the
+    showing isn't necessarily tomorrow.
+    """
+    starts_at = reservation.showing_at or reservation.starts_at()
+    day = timezone.localtime(starts_at).date() if starts_at else reservation.selected_date
+    today = timezone.localtime(now).date() if now else timezone.localdate()
+    days = (day - today).days
+    if days == 0:
+        return 'today'
+    if days == 1:
+        return 'tomorrow'
+    return f"on {day:%A, %B} {day.day}"
+
+def reminder_template_data(reservation, now=None):
+    """Return the dynamic template data for a reservation's reminder email."""
+    context = reservation_email_context(reservation)
+    context['when'] = showing_day_phrase(reservation, now)
+    context['subject'] = f"⏰ Movie Reminder - {context['movie_title']} {context['when']}!"
+    return context
+
+def send_reservation_reminder_batch(reservations):
+    """
+    Send reminders for up to 1000 reservations in one SendGrid request using
+    the ``SENDGRID_REMINDER_TEMPLATE_ID`` dynamic template.
+
+    Reservations must come with ``user`` and ``movie_detail__movie`` loaded.
+    Returns True when the whole batch was accepted.
+    """
+    return send_template_batch(
+        settings.SENDGRID_REMINDER_TEMPLATE_ID,
+        [(reservation.user.email, reminder_template_data(reservation)) for reservation in reservations],
+    )
+
+def send_reservation_reminder_email(reservation):
     """
     Send reservation reminder email using SendGrid
+
+    Accepts a reservation (with related user and movie already loaded, so
+    nothing is re-fetched) or a reservation id.
     """
     from .models import Reservation
     
+    reservation_id = getattr(reservation, 'id', reservation)
     try:
-        reservation = Reservation.objects.get(id=reservation_id)
+        if not isinstance(reservation, Reservation):
+            reservation = Reservation.objects.select_related('user', 'movie_detail__movie').get(id=reservation_id)
         user = reservation.user
         
-        subject = f"⏰ Movie Reminder - {reservation.movie_detail.movie.title} tomorrow!"
-        
-        # Plain text content
-        plain_text_message = (
-            f"Hello {user.first_name or user.username},\n\n"
-            f"This is a friendly reminder about your movie reservation tomorrow!\n\n"
-            f"🎟️ Your Reservation:\n"
-            f"Movie: {reservation.movie_detail.movie.title}\n"
-            f"Cinema: {reservation.cinema_name}\n"
-            f"Date: {reservation.selected_date}\n"
-            f"Showtime: {reservation.selected_showtime}\n"
-            f"Seats: {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}\n\n"
-            f"Please arrive at least 15 minutes before the showtime.\n\n"
-            f"Enjoy your movie experience! 🍿"
-        )
-        
-        # HTML content
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #fff3cd; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .details {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>⏰ Movie Reminder!</h1>
-            </div>
-            <div class="content">
-                <p>Hello <strong>{user.first_name or user.username}</strong>,</p>
-                <p>This is a friendly reminder about your movie reservation <strong>tomorrow</strong>!</p>
-                
-                <div class="details">
-                    <h3>🎟️ Your Reservation:</h3>
-                    <p><strong>Movie:</strong> {reservation.movie_detail.movie.title}</p>
-                    <p><strong>Cinema:</strong> {reservation.cinema_name}</p>
-                    <p><strong>Date:</strong> {reservation.selected_date}</p>
-                    <p><strong>Showtime:</strong> {reservation.selected_showtime}</p>
-                    <p><strong>Seats:</strong> {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}</p>
-                </div>
-                
-                <p><strong>Please arrive at least 15 minutes before the showtime.</strong></p>
-                <p>Enjoy your movie experience! 🍿</p>
-            </div>
-        </body>
-        </html>
-        """
+        context = reminder_template_data(reservation)
+        plain_text_message, html_message = render_email('reservations/emails/reminder', context)
         
-        success = send_sendgrid_email(
+        success = send_email(
             to_email=user.email,
-            subject=subject,
+            subject=context['subject'],
             plain_text_content=plain_text_message,
             html_content=html_message
         )
@@ -225,63 +175,11 @@ def send_reservation_cancellation_email(reservation_id):
         user = reservation.user
         
         subject = f"❌ Reservation Cancelled - {reservation.movie_detail.movie.title}"
-        
-        # Plain text content
-        plain_text_message = (
-            f"Hello {user.first_name or user.username},\n\n"
-            f"Your movie reservation has been cancelled.\n\n"
-            f"📋 Cancelled Reservation Details:\n"
-            f"Movie: {reservation.movie_detail.movie.title}\n"
-            f"Cinema: {reservation.cinema_name}\n"
-            f"Date: {reservation.selected_date}\n"
-            f"Showtime: {reservation.selected_showtime}\n"
-            f"Number of Seats: {reservation.number_of_seats}\n"
-            f"Seats: {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}\n"
-            f"Reservation ID: {reservation.id}\n\n"
-            f"If this was a mistake or you'd like to make a new reservation, "
-            f"please visit our website.\n\n"
-            f"We hope to see you at the cinema soon!"
+        plain_text_message, html_message = render_email(
+            'reservations/emails/cancellation', reservation_email_context(reservation)
         )
         
-        # HTML content
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #f8d7da; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .details {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>❌ Reservation Cancelled</h1>
-            </div>
-            <div class="content">
-                <p>Hello <strong>{user.first_name or user.username}</strong>,</p>
-                <p>Your movie reservation has been cancelled.</p>
-                
-                <div class="details">
-                    <h3>📋 Cancelled Reservation Details:</h3>
-                    <p><strong>Movie:</strong> {reservation.movie_detail.movie.title}</p>
-                    <p><strong>Cinema:</strong> {reservation.cinema_name}</p>
-                    <p><strong>Date:</strong> {reservation.selected_date}</p>
-                    <p><strong>Showtime:</strong> {reservation.selected_showtime}</p>
-                    <p><strong>Number of Seats:</strong> {reservation.number_of_seats}</p>
-                    <p><strong>Seats:</strong> {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}</p>
-                    <p><strong>Reservation ID:</strong> {reservation.id}</p>
-                </div>
-                
-                <p>If this was a mistake or you'd like to make a new reservation, please visit our website.</p>
-                <p>We hope to see you at the cinema soon!</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        success = send_sendgrid_email(
+        success = send_email(
             to_email=user.email,
             subject=subject,
             plain_text_content=plain_text_message,
@@ -299,6 +197,25 @@ def send_reservation_cancellation_email(reservation_id):
         logger.error(f"Error sending cancellation email for reservation {reservation_id}: {e}")
         return False
 
+def merge_edit_payloads(earlier, later):
+    """
+    Merge two queued edit emails for one reservation.
+
+    Each field keeps its oldest old value and newest new value; fields that
+    ended up back where they started are dropped. Returns None when nothing
+    changed overall.
+    """
+    changes = dict(earlier.get('changes') or {})
+    for field, (old_value, new_value) in (later.get('changes') or {}).items():
+        if field in changes:
+            old_value = changes[field][0]
+        changes[field] = [old_value, new_value]
+
+    changes = {field: values for field, values in changes.items() if values[0] != values[1]}
+    if not changes:
+        return None
+    return {**later, 'changes': changes}
+
 def send_reservation_edit_email(reservation_id, changes=None):
     """
     Send reservation edit confirmation email using SendGrid
@@ -311,100 +228,20 @@ def send_reservation_edit_email(reservation_id, changes=None):
         user = reservation.user
         
         subject = f"✏️ Reservation Updated - {reservation.movie_detail.movie.title}"
-        
-        # Prepare changes summary
-        changes_summary = ""
-        if changes:
-            changes_summary = "\n\n📝 Changes Made:\n"
-            for field, (old_value, new_value) in changes.items():
-                changes_summary += f"{field}: {old_value} → {new_value}\n"
-        
-        # Plain text content
-        plain_text_message = (
-            f"Hello {user.first_name or user.username},\n\n"
-            f"Your movie reservation has been successfully updated!\n\n"
-            f"📋 Updated Reservation Details:\n"
-            f"Movie: {reservation.movie_detail.movie.title}\n"
-            f"Cinema: {reservation.cinema_name}\n"
-            f"Date: {reservation.selected_date}\n"
-            f"Showtime: {reservation.selected_showtime}\n"
-            f"Number of Seats: {reservation.number_of_seats}\n"
-            f"Seats: {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}\n"
-            f"Total Cost: ${reservation.total_cost}\n"
-            f"Reservation ID: {reservation.id}\n"
-            f"{changes_summary}"
-            f"\nIf you did not make these changes, please contact our support team immediately.\n\n"
-            f"We look forward to seeing you at the cinema!\n\n"
-            f"Thank you for choosing ReelTime!"
-        )
-        
-        # HTML content
-        html_changes = ""
-        if changes:
-            html_changes = """
-            <div class="changes">
-                <h4>📝 Changes Made:</h4>
-                <ul>
-            """
-            for field, (old_value, new_value) in changes.items():
-                field_name = field.replace('_', ' ').title()
-                html_changes += f'<li><strong>{field_name}:</strong> {old_value} → <strong>{new_value}</strong></li>'
-            html_changes += """
-                </ul>
-            </div>
-            """
-        
-        html_message = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #e3f2fd; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .details {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0; }}
-                .changes {{ background-color: #fff3cd; padding: 15px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #ffc107; }}
-                .warning {{ background-color: #fff3cd; padding: 10px; border-radius: 5px; margin: 15px 0; text-align: center; }}
-                .footer {{ padding: 20px; text-align: center; color: #666; font-size: 14px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>✏️ Reservation Updated!</h1>
-            </div>
-            <div class="content">
-                <p>Hello <strong>{user.first_name or user.username}</strong>,</p>
-                <p>Your movie reservation has been successfully updated!</p>
-                
-                <div class="details">
-                    <h3>📋 Updated Reservation Details:</h3>
-                    <p><strong>Movie:</strong> {reservation.movie_detail.movie.title}</p>
-                    <p><strong>Cinema:</strong> {reservation.cinema_name}</p>
-                    <p><strong>Date:</strong> {reservation.selected_date}</p>
-                    <p><strong>Showtime:</strong> {reservation.selected_showtime}</p>
-                    <p><strong>Number of Seats:</strong> {reservation.number_of_seats}</p>
-                    <p><strong>Seats:</strong> {', '.join(reservation.selected_seats) if reservation.selected_seats else 'Not specified'}</p>
-                    <p><strong>Total Cost:</strong> ${reservation.total_cost}</p>
-                    <p><strong>Reservation ID:</strong> {reservation.id}</p>
-                </div>
-                
-                {html_changes}
-                
-                <div class="warning">
-                    <p><strong>⚠️ Security Note:</strong> If you did not make these changes, please contact our support team immediately.</p>
-                </div>
-                
-                <p>We look forward to seeing you at the cinema!</p>
-            </div>
-            <div class="footer">
-                <p>Thank you for choosing <strong>ReelTime</strong>!</p>
-            </div>
-        </body>
-        </html>
-        """
+        context = reservation_email_context(reservation)
+        context['changes'] = [
+            {
+                'field': field,
+                'label': field.replace('_', ' ').title(),
+                'old': old_value,
+                'new': new_value,
+            }
+            for field, (old_value, new_value) in (changes or {}).items()
+        ]
+        plain_text_message, html_message = render_email('reservations/emails/edit', context)
         
         # Send email using SendGrid
-        success = send_sendgrid_email(
+        success = send_email(
             to_email=user.email,
             subject=subject,
             plain_text_content=plain_text_message,
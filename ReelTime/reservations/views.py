@@ -1,14 +1,23 @@
 # re# reservations/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse
 from django.utils import timezone
 from datetime import datetime, date
-from .models import Reservation
+from .models import DISPLAY_ORDERING, Reservation
+from .inventory import reserved_seats_for, swap_reservation_seats
 from .forms import ReservationEditForm
+from .utils import reservation_summary
+from halls.utils import get_seat_label_index
+from reel_time.pagination import paginate
 import json
 
+RESERVATIONS_PER_PAGE = 20
+
 @login_required
 def user_reservations_view(request):
     today = timezone.now().date()
@@ -24,245 +33,141 @@ def user_reservations_view(request):
         reservations = Reservation.objects.filter(
             user=request.user,
             selected_date__gte=today
-        ).select_related('movie_detail__movie', 'movie_detail__hall')
-    
-    # Sort reservations: confirmed first, then by selected_date ascending, then by selected_showtime
-    # We'll sort in Python to handle complex ordering
-    reservations_list = list(reservations)
-    
-    # Define a key function for sorting
-    def reservation_sort_key(res):
-        # Primary sort: status (confirmed comes first)
-        status_order = {'confirmed': 0, 'pending': 1, 'cancelled': 2}
-        
-        # Convert selected_showtime to comparable format if it's a time
-        showtime_str = str(res.selected_showtime)
-        # Handle different time formats
-        try:
-            # Try to parse as time
-            from datetime import datetime as dt
-            showtime = dt.strptime(showtime_str, '%H:%M:%S').time()
-        except:
-            try:
-                showtime = dt.strptime(showtime_str, '%H:%M').time()
-            except:
-                # If parsing fails, use string comparison
-                showtime = showtime_str
-        
-        return (
-            status_order.get(res.status, 99),  # Sort by status order
-            res.selected_date,                  # Then by date ascending
-            showtime                           # Then by showtime
-        )
-    
-    # Sort the reservations
-    reservations_list.sort(key=reservation_sort_key)
-    
-    # Process each reservation to add formatted seat labels
+        ).select_related('movie_detail__movie', 'movie_detail__hall', 'movie_detail__admin')
+    
+    # Confirmed first, then by date and showtime, one page at a time, with
+    # edit/cancel windows computed in SQL
+    page = paginate(
+        request,
+        reservations.in_display_order().with_time_windows(),
+        ordering=DISPLAY_ORDERING,
+        per_page=RESERVATIONS_PER_PAGE,
+    )
+    reservations_list = page.object_list
+    
+    # Add formatted seat labels from each hall's compiled label index
+    label_indexes = {}
     for reservation in reservations_list:
-        if reservation.selected_seats and reservation.movie_detail.hall:
-            formatted_seats = []
-            
-            # Get hall layout to determine seat numbering
-            hall = reservation.movie_detail.hall
-            if hall and hall.layout:
-                try:
-                    # Parse layout
-                    if isinstance(hall.layout, str):
-                        layout_data = json.loads(hall.layout)
-                        if isinstance(layout_data, dict):
-                            seat_map = layout_data.get('seat_map', [])
-                        elif isinstance(layout_data, list):
-                            seat_map = layout_data
-                        else:
-                            seat_map = []
-                    elif isinstance(hall.layout, dict):
-                        seat_map = hall.layout.get('seat_map', [])
-                    elif isinstance(hall.layout, list):
-                        seat_map = hall.layout
-                    else:
-                        seat_map = []
-                    
-                    if seat_map:
-                        # Find min row for seats
-                        seat_rows = [s['row'] for s in seat_map if s.get('type') == 'seat']
-                        min_seat_row = min(seat_rows) if seat_rows else 0
-                        
-                        # Group seats by row to calculate right-to-left numbering
-                        rows_dict = {}
-                        for seat in seat_map:
-                            if seat.get('type') == 'seat':
-                                row = seat['row']
-                                if row not in rows_dict:
-                                    rows_dict[row] = []
-                                rows_dict[row].append(seat['col'])
-                        
-                        # Sort columns right to left for each row
-                        for row in rows_dict:
-                            rows_dict[row].sort(reverse=True)
-                        
-                        # Convert selected seats
-                        for seat_id in reservation.selected_seats:
-                            try:
-                                row, col = map(int, seat_id.split('-'))
-                                # Calculate row letter (A, B, C, etc.)
-                                row_letter = chr(65 + (row - min_seat_row))
-                                # Calculate seat number (right to left)
-                                if row in rows_dict and col in rows_dict[row]:
-                                    seat_number = rows_dict[row].index(col) + 1
-                                    formatted_seats.append(f"{row_letter}{seat_number}")
-                            except:
-                                pass
-                except:
-                    pass
-            
-            # Store formatted seats as a new attribute
-            reservation.formatted_seat_labels = ', '.join(formatted_seats) if formatted_seats else ''
+        hall = reservation.movie_detail.hall
+        if reservation.selected_seats and hall:
+            if hall.id not in label_indexes:
+                label_indexes[hall.id] = get_seat_label_index(hall)
+            index = label_indexes[hall.id]
+            formatted_seats = [index[seat] for seat in reservation.selected_seats if seat in index]
+            reservation.formatted_seat_labels = ', '.join(formatted_seats)
         else:
             reservation.formatted_seat_labels = ''
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'results': [reservation_summary(reservation) for reservation in reservations_list],
+            **page.cursors(),
+        })
     
-    return render(request, 'reservations/reservations.html', {'reservations': reservations_list})
+    return render(request, 'reservations/reservations.html', {'reservations': reservations_list, 'page': page})
 
 @login_required
 def edit_reservation(request, reservation_id):
     reservation = get_object_or_404(Reservation, id=reservation_id)
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
     
-    # Check permissions
+    # Check permissions, cancellation and same-day bookings
+    error, status = None, 400
     if not request.user.is_admin and reservation.user != request.user:
-        messages.error(request, "You don't have permission to edit this reservation.")
-        return redirect('reservations')
-    
-    # Check if reservation is cancelled
-    if reservation.status == 'cancelled':
-        messages.error(request, "Cannot edit a cancelled reservation.")
-        return redirect('reservations')
-    
-    # Check if booking is same day and user is not admin
-    if reservation.is_same_day_showing() and not request.user.is_admin:
-        messages.error(request, "Bookings within the day can only be edited by administrators. Please contact admin for seat selection changes.")
+        error, status = "You don't have permission to edit this reservation.", 403
+    elif reservation.status == 'cancelled':
+        error = "Cannot edit a cancelled reservation."
+    elif reservation.is_same_day_showing() and not request.user.is_admin:
+        error = "Bookings within the day can only be edited by administrators. Please contact admin for seat selection changes."
+    if error:
+        if is_ajax:
+            return JsonResponse({'success': False, 'message': error}, status=status)
+        messages.error(request, error)
         return redirect('reservations')
     
     # Track changes for email
     changes = {}
-    old_seats = reservation.selected_seats.copy() if reservation.selected_seats else []
     old_seat_count = reservation.number_of_seats
-    old_total_cost = reservation.total_cost
     
     if request.method == 'POST':
-        # Get the selected seats from the form
-        selected_seats_json = request.POST.get('selected_seats', '[]')
-        print(f"DEBUG: Received selected_seats: {selected_seats_json}")
-        
+        old_total_cost = reservation.total_cost
+        result = None
         try:
-            selected_seats = json.loads(selected_seats_json)
-            print(f"DEBUG: Parsed seats: {selected_seats}, Count: {len(selected_seats)}")
-            
+            selected_seats = json.loads(request.POST.get('selected_seats', '[]'))
+        except json.JSONDecodeError:
+            error = "Invalid seat selection data."
+        else:
             # Validate that seats were actually selected
-            if not selected_seats or len(selected_seats) == 0:
-                messages.error(request, "Please select at least one seat.")
+            if not selected_seats:
+                error = "Please select at least one seat."
             elif len(selected_seats) > reservation.number_of_seats:
                 # Check if trying to select more seats than originally reserved
-                messages.error(request, f"You cannot select more seats than originally reserved ({reservation.number_of_seats} seat(s)). Please select {reservation.number_of_seats} or fewer seats.")
+                error = f"You cannot select more seats than originally reserved ({reservation.number_of_seats} seat(s)). Please select {reservation.number_of_seats} or fewer seats."
             else:
-                # Verify that selected seats are not already reserved by others
-                reserved_reservations = Reservation.objects.filter(
-                    movie_detail=reservation.movie_detail,
-                    selected_date=reservation.selected_date,
-                    selected_showtime=reservation.selected_showtime,
-                    status__in=['pending', 'confirmed']
-                ).exclude(id=reservation.id)
-                
-                reserved_seats = []
-                for res in reserved_reservations:
-                    if res.selected_seats:
-                        reserved_seats.extend(res.selected_seats)
-                
-                # Check if any selected seat is already reserved
-                conflicting_seats = set(selected_seats) & set(reserved_seats)
-                if conflicting_seats:
-                    messages.error(request, "Some of the selected seats are already reserved by other users. Please select different seats.")
-                else:
-                    # All validations passed, update the reservation
-                    # Record changes if seats changed
-                    if set(selected_seats) != set(old_seats):
-                        old_seats_str = ', '.join(old_seats) if old_seats else 'None'
-                        new_seats_str = ', '.join(selected_seats) if selected_seats else 'None'
-                        changes['seats'] = (old_seats_str, new_seats_str)
-                    
-                    # Record changes if seat count changed
-                    new_seat_count = len(selected_seats)
-                    if new_seat_count != old_seat_count:
-                        changes['number_of_seats'] = (str(old_seat_count), str(new_seat_count))
-                    
-                    # Update reservation
-                    reservation.selected_seats = selected_seats
-                    reservation.number_of_seats = new_seat_count
-                    reservation.total_cost = reservation.calculate_total_cost()
-                    
-                    # Record total cost change if different
-                    if reservation.total_cost != old_total_cost:
-                        changes['total_cost'] = (f"${old_total_cost}", f"${reservation.total_cost}")
-                    
-                    reservation.save()
-                    
-                    print(f"DEBUG: Reservation saved successfully!")
-                    
-                    # Send edit confirmation email if there were changes
-                    if changes:
-                        from .utils import send_reservation_edit_email
-                        send_reservation_edit_email(reservation.id, changes)
-                    
-                    messages.success(request, "Reservation updated successfully!")
-                    return redirect('reservations')
-                    
-        except json.JSONDecodeError as e:
-            print(f"DEBUG: JSON decode error: {e}")
-            messages.error(request, "Invalid seat selection data.")
-        except Exception as e:
-            print(f"DEBUG: Unexpected error: {e}")
-            messages.error(request, f"An error occurred: {str(e)}")
+                # Lock the reservation and screening, then swap seats atomically
+                try:
+                    result = swap_reservation_seats(reservation, selected_seats)
+                    reservation = result.reservation
+                except ValidationError as e:
+                    error = ' '.join(e.messages)
+        
+        if error:
+            if is_ajax:
+                return JsonResponse({'success': False, 'message': error}, status=400)
+            messages.error(request, error)
+        elif not result.ok:
+            message = "Some of the selected seats are already reserved by other users. Please select different seats."
+            if is_ajax:
+                return JsonResponse({
+                    'success': False,
+                    'message': message,
+                    'conflicts': result.conflicts,
+                }, status=409)
+            messages.error(request, message)
+            return redirect('edit_reservation', reservation_id=reservation.id)
+        else:
+            # Record changes if seats changed
+            if result.changed:
+                old_seats_str = ', '.join(result.old_seats) if result.old_seats else 'None'
+                new_seats_str = ', '.join(result.seats) if result.seats else 'None'
+                changes['seats'] = (old_seats_str, new_seats_str)
+            
+            # Record changes if seat count changed
+            if reservation.number_of_seats != old_seat_count:
+                changes['number_of_seats'] = (str(old_seat_count), str(reservation.number_of_seats))
+            
+            # Record total cost change if different
+            if reservation.total_cost != old_total_cost:
+                changes['total_cost'] = (f"${old_total_cost}", f"${reservation.total_cost}")
+            
+            # Queue edit confirmation email if there were changes
+            if changes:
+                reservation.send_edit_email(changes)
+            
+            message = "Reservation updated successfully!"
+            if is_ajax:
+                return JsonResponse({
+                    'success': True,
+                    'message': message,
+                    'redirect_url': reverse('reservations'),
+                })
+            messages.success(request, message)
+            return redirect('reservations')
     
     # If we get here, either GET request or POST with validation errors
     form = ReservationEditForm(instance=reservation)
     
-    # Get the hall layout for seat selection
+    # Get the hall layout for seat selection (stored in canonical form)
     hall = reservation.movie_detail.hall
-    if hall and hall.layout:
-        # Parse layout if it's a string
-        if isinstance(hall.layout, str):
-            try:
-                layout_data = json.loads(hall.layout)
-                # Check if layout_data is a dict with 'seat_map' key, or if it's directly the seat_map list
-                if isinstance(layout_data, dict):
-                    seat_map = layout_data.get('seat_map', [])
-                elif isinstance(layout_data, list):
-                    seat_map = layout_data
-                else:
-                    seat_map = []
-            except json.JSONDecodeError:
-                seat_map = []
-        elif isinstance(hall.layout, dict):
-            seat_map = hall.layout.get('seat_map', [])
-        elif isinstance(hall.layout, list):
-            seat_map = hall.layout
-        else:
-            seat_map = []
-    else:
-        seat_map = []
-    
-    # Get all reservations for this showtime to mark seats as reserved
-    reserved_reservations = Reservation.objects.filter(
-        movie_detail=reservation.movie_detail,
-        selected_date=reservation.selected_date,
-        selected_showtime=reservation.selected_showtime,
-        status__in=['pending', 'confirmed']
-    ).exclude(id=reservation.id)  # Exclude current reservation
+    seat_map = hall.layout if hall else []
     
-    # Collect all reserved seats
-    reserved_seats = []
-    for res in reserved_reservations:
-        if res.selected_seats:
-            reserved_seats.extend(res.selected_seats)
+    # Get all seats taken for this showtime by other reservations
+    reserved_seats = reserved_seats_for(
+        reservation.movie_detail,
+        reservation.selected_date,
+        reservation.selected_showtime,
+        exclude_reservation=reservation,
+    )
     
     return render(request, 'reservations/edit_reservation.html', {
         'form': form,
@@ -287,11 +192,11 @@ def cancel_reservation(request, reservation_id):
         return redirect('reservations')
     
     if request.method == 'POST':
-        reservation.status = 'cancelled'
-        reservation.save()
-        
-        # Send cancellation email
-        reservation.send_cancellation_email()
+        # Cancel and queue the cancellation email together
+        with transaction.atomic():
+            reservation.status = 'cancelled'
+            reservation.save()
+            reservation.send_cancellation_email()
         
         messages.success(request, "Reservation cancelled successfully!")
         return redirect('reservations')
@@ -6,9 +6,11 @@ document.addEventListener("DOMContentLoaded", () => {
 
   if (!movieGrid) return; // Exit if no movie grid exists
 
+  const serverSearch = Boolean(searchInput && searchInput.dataset.suggestUrl);
+
   function filterMovies() {
     const searchTerm = searchInput.value.toLowerCase();
-    const selectedGenre = genreFilter.value.toLowerCase();
+    const selectedGenre = genreFilter ? genreFilter.value.toLowerCase() : "all";
     
     const movieCards = movieGrid.querySelectorAll(".movie-card");
     
@@ -19,7 +21,8 @@ document.addEventListener("DOMContentLoaded", () => {
       // Parse genres as comma-separated list
       const genres = genresData.split(',').map(g => g.trim().toLowerCase());
       
-      const matchesSearch = title.includes(searchTerm);
+      // Inputs with a suggest URL search on the server (see movies/search.py)
+      const matchesSearch = serverSearch || title.includes(searchTerm);
       const matchesGenre = selectedGenre === "all" || genres.includes(selectedGenre);
       
       if (matchesSearch && matchesGenre) {
@@ -30,8 +33,46 @@ card.style.display = "none";
     });
   }
 
+  // Autocomplete: fill the datalist with matching titles as the user types
+  let suggestTimer = null;
+  let suggestRequest = null;
+
+  function suggestMovies() {
+    const datalist = document.getElementById(searchInput.getAttribute("list"));
+    const query = searchInput.value.trim();
+    if (!datalist) return;
+    if (!query) {
+      datalist.innerHTML = "";
+      return;
+    }
+
+    if (suggestRequest) suggestRequest.abort();
+    suggestRequest = new AbortController();
+
+    fetch(`${searchInput.dataset.suggestUrl}?q=${encodeURIComponent(query)}`, {
+      headers: { "x-requested-with": "XMLHttpRequest" },
+      signal: suggestRequest.signal,
+    })
+      .then((response) => response.json())
+      .then((data) => {
+        datalist.innerHTML = "";
+        data.results.forEach((movie) => {
+          const option = document.createElement("option");
+          option.value = movie.title;
+          option.label = movie.release_label;
+          datalist.appendChild(option);
+        });
+      })
+      .catch(() => {}); // Superseded or offline: keep the old suggestions
+  }
+
   // Add event listeners
-  if (searchInput) {
+  if (searchInput && serverSearch) {
+    searchInput.addEventListener("input", () => {
+      clearTimeout(suggestTimer);
+      suggestTimer = setTimeout(suggestMovies, 150);
+    });
+  } else if (searchInput) {
     searchInput.addEventListener("input", filterMovies);
   }
   
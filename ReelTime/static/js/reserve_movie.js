@@ -173,6 +173,7 @@ document.addEventListener("DOMContentLoaded", function () {
                         }
                         selectedSeatsInput.value = JSON.stringify(selectedSeats);
                         updateSelectedSeatsDisplay(selectedSeats, minSeatRow, rowSeatNumbers, matrix);
+                        holdSelection(selectedSeats);
                     });
                 }
 
@@ -237,9 +238,35 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
+    // Seat layouts already fetched, keyed by movie detail id
+    const layoutCache = {};
+
+    // Helper: unpack the base64 occupancy bitset (bit = row * width + col)
+    function decodeOccupancy(occupancy, width) {
+        const reserved = [];
+        if (!occupancy || !width) return reserved;
+
+        const bytes = atob(occupancy);
+        for (let i = 0; i < bytes.length; i++) {
+            const byte = bytes.charCodeAt(i);
+            if (!byte) continue;
+            for (let bit = 0; bit < 8; bit++) {
+                if (byte & (1 << bit)) {
+                    const index = i * 8 + bit;
+                    reserved.push(`${Math.floor(index / width)}-${index % width}`);
+                }
+            }
+        }
+        return reserved;
+    }
+
     // Helper: load seat map from server
     function loadSeatMap(detailId, date, showtime, maxSelectable) {
-        const url = `/movies/get_seat_map/${detailId}/${date}/${encodeURIComponent(showtime)}/`;
+        const cached = layoutCache[detailId];
+        let url = `/movies/get_seat_map/${detailId}/${date}/${encodeURIComponent(showtime)}/`;
+        if (cached) {
+            url += `?layout_version=${encodeURIComponent(cached.version)}`;
+        }
 
         fetch(url)
             .then(response => {
@@ -249,27 +276,31 @@ document.addEventListener("DOMContentLoaded", function () {
                 return response.json();
             })
             .then(data => {
-                console.log("Seat map data received:", data);
-                
-                if (!data.seat_map) {
-                    seatLayoutContainer.innerHTML = `<p class="error">No seat layout available for this showtime.</p>`;
-                    return;
+                // The server only sends the layout when our cached copy is stale
+                if (data.seat_map) {
+                    let seatMapData = data.seat_map;
+                    if (typeof seatMapData === 'string') {
+                        try {
+                            seatMapData = JSON.parse(seatMapData);
+                        } catch (e) {
+                            console.error("Failed to parse seat_map JSON:", e);
+                            seatLayoutContainer.innerHTML = `<p class="error">Invalid seat layout data.</p>`;
+                            return;
+                        }
+                    }
+                    layoutCache[detailId] = { version: data.layout_version, seatMap: seatMapData };
                 }
 
-                // Parse the seat_map if it's a string
-                let seatMapData = data.seat_map;
-                if (typeof seatMapData === 'string') {
-                    try {
-                        seatMapData = JSON.parse(seatMapData);
-                    } catch (e) {
-                        console.error("Failed to parse seat_map JSON:", e);
-                        seatLayoutContainer.innerHTML = `<p class="error">Invalid seat layout data.</p>`;
-                        return;
-                    }
+                const layout = layoutCache[detailId];
+                if (!layout || !layout.seatMap) {
+                    seatLayoutContainer.innerHTML = `<p class="error">No seat layout available for this showtime.</p>`;
+                    return;
                 }
 
-                const reservedSeats = data.reserved || [];
-                renderSeatLayout(seatMapData, reservedSeats, maxSelectable);
+                // Seats held by other shoppers at checkout are shown as taken
+                const reservedSeats = decodeOccupancy(data.occupancy, data.width)
+                    .concat(decodeOccupancy(data.held, data.width));
+                renderSeatLayout(layout.seatMap, reservedSeats, maxSelectable);
             })
             .catch(err => {
                 console.error("Failed to load seat map:", err);
@@ -277,6 +308,72 @@ document.addEventListener("DOMContentLoaded", function () {
             });
     }
 
+    // Hold the current selection so other shoppers can't take it mid-checkout
+    function holdSelection(seats) {
+        const detailId = form.action.split("/").slice(-2)[0];
+        const body = new FormData();
+        body.append('selected_date', dateInput.value);
+        body.append('selected_showtime', selectedShowtimeInput.value);
+        body.append('selected_seats', JSON.stringify(seats));
+
+        fetch(`/movies/hold_seats/${detailId}/`, {
+            method: 'POST',
+            headers: { 'X-CSRFToken': form.querySelector('[name=csrfmiddlewaretoken]').value },
+            body: body,
+        })
+            .then(response => {
+                if (response.status === 409) {
+                    showValidationError('Some of your selected seats were just taken by another customer. Please pick other seats.');
+                    loadSeatMap(detailId, dateInput.value, selectedShowtimeInput.value, parseInt(seatsInput.value));
+                }
+            })
+            .catch(err => console.error("Failed to hold seats:", err));
+    }
+
+    // Remaining seats per cinema, date and showtime for the whole run, fetched once
+    let availabilityCalendar = null;
+    if (window.availabilityUrl) {
+        fetch(window.availabilityUrl)
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                availabilityCalendar = data ? data.cinemas : null;
+                const detailId = form.action.split("/").slice(-2)[0];
+                if (modal.style.display === "flex") {
+                    refreshShowtimeAvailability(detailId);
+                }
+            })
+            .catch(err => console.error("Failed to load availability:", err));
+    }
+
+    function remainingFor(detailId, date, time, fallback) {
+        const cinema = availabilityCalendar && availabilityCalendar[detailId];
+        if (!cinema || !cinema.dates[date]) return fallback;
+        const remaining = cinema.dates[date][time];
+        return remaining === undefined ? fallback : remaining;
+    }
+
+    // Update showtime buttons for the currently selected date
+    function refreshShowtimeAvailability(detailId) {
+        document.querySelectorAll('.showtime-option').forEach(btn => {
+            const time = btn.dataset.time;
+            const remaining = remainingFor(detailId, dateInput.value, time, parseInt(btn.dataset.remaining));
+            btn.textContent = remaining > 0 ? time : `${time} (Sold Out)`;
+            btn.disabled = remaining <= 0;
+
+            if (btn.disabled && btn.classList.contains("selected")) {
+                btn.classList.remove("selected");
+                selectedShowtimeInput.value = "";
+                seatLayoutContainer.innerHTML = "";
+                selectedSeatsInput.value = "";
+            }
+        });
+
+        const cinema = availabilityCalendar && availabilityCalendar[detailId];
+        if (cinema && cinema.sold_out_dates.includes(dateInput.value)) {
+            showValidationError('This date is sold out. Please pick another date.');
+        }
+    }
+
     // Populate showtimes
     function populateShowtimes(showtimesData, detailId, price) {
         showtimesContainer.innerHTML = "";
@@ -293,6 +390,8 @@ document.addEventListener("DOMContentLoaded", function () {
             const btn = document.createElement("button");
             btn.type = "button";
             btn.className = "showtime-option btn-secondary";
+            btn.dataset.time = time;
+            btn.dataset.remaining = remaining;
             btn.textContent = remaining > 0 ? time : `${time} (Sold Out)`;
             if (remaining <= 0) btn.disabled = true;
 
@@ -311,11 +410,14 @@ document.addEventListener("DOMContentLoaded", function () {
 
             showtimesContainer.appendChild(btn);
         });
+
+        refreshShowtimeAvailability(detailId);
     }
 
     // Update seat layout when date or number of seats changes
     dateInput.addEventListener("change", () => {
         const detailId = form.action.split("/").slice(-2)[0];
+        refreshShowtimeAvailability(detailId);
         if (selectedShowtimeInput.value) {
             loadSeatMap(detailId, dateInput.value, selectedShowtimeInput.value, parseInt(seatsInput.value));
         }